@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Analytics throughput on synthetic data with high-cardinality customers.
+
+Times region_wise_sales, top_selling_products, customer_analysis (full
+ranking vs. heap top-n), daily_sales_trend and find_peak_sales_day on the
+list-of-dicts path and, with --table, on the columnar TransactionTable.
+
+Usage: python benchmarks/bench_analytics.py --rows 1000000 --customers 500000 [--table]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_processor import (
+    region_wise_sales, top_selling_products, customer_analysis,
+    daily_sales_trend, find_peak_sales_day
+)
+
+REGIONS = ['North', 'South', 'East', 'West']
+
+def synthetic_records(rows, customers, products, days, seed=7):
+    rnd = random.Random(seed)
+    return [{
+        'TransactionID': f'T{i}',
+        'Date': f'2024-{1 + (d // 28) % 12:02d}-{1 + d % 28:02d}',
+        'ProductID': f'P{p}',
+        'ProductName': f'Product {p}',
+        'Quantity': rnd.randint(1, 10),
+        'UnitPrice': float(rnd.randint(100, 50000)),
+        'CustomerID': f'C{rnd.randrange(customers)}',
+        'Region': REGIONS[rnd.randrange(4)],
+    } for i, p, d in ((i, rnd.randrange(products), rnd.randrange(days)) for i in range(rows))]
+
+def synthetic_table(rows, customers, products, days, seed=7):
+    import numpy as np
+    from utils.transaction_table import TransactionTable
+
+    rng = np.random.default_rng(seed)
+    day_names = [f'2024-{1 + (d // 28) % 12:02d}-{1 + d % 28:02d}' for d in range(days)]
+    codes = {
+        'TransactionID': np.arange(rows, dtype=np.int32),
+        'Date': rng.integers(0, days, rows, dtype=np.int32),
+        'ProductID': rng.integers(0, products, rows, dtype=np.int32),
+        'CustomerID': rng.integers(0, customers, rows, dtype=np.int32),
+        'Region': rng.integers(0, 4, rows, dtype=np.int32),
+    }
+    codes['ProductName'] = codes['ProductID']
+    categories = {
+        'TransactionID': np.char.add('T', np.arange(rows).astype(str)),
+        'Date': day_names,
+        'ProductID': [f'P{p}' for p in range(products)],
+        'ProductName': [f'Product {p}' for p in range(products)],
+        'CustomerID': np.char.add('C', np.arange(customers).astype(str)),
+        'Region': REGIONS,
+    }
+    return TransactionTable(codes, categories, rng.integers(1, 11, rows),
+                            rng.integers(100, 50000, rows).astype(float))
+
+def timed(label, rows, func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed:9.3f}s  {rows / elapsed:>14,.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=500_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--table', action='store_true', help="benchmark the TransactionTable path")
+    args = parser.parse_args()
+
+    build = synthetic_table if args.table else synthetic_records
+    start = time.perf_counter()
+    data = build(args.rows, args.customers, args.products, args.days)
+    print(f"{'table' if args.table else 'records'}: {args.rows:,} rows, "
+          f"{args.customers:,} customers (built in {time.perf_counter() - start:.1f}s)")
+
+    timed("region_wise_sales", args.rows, region_wise_sales, data)
+    timed("top_selling_products(n=5)", args.rows, top_selling_products, data, n=5)
+    timed("customer_analysis (full sort)", args.rows, customer_analysis, data)
+    timed("customer_analysis(n=5) heap", args.rows, customer_analysis, data, n=5)
+    timed("daily_sales_trend", args.rows, daily_sales_trend, data)
+    timed("find_peak_sales_day", args.rows, find_peak_sales_day, data)
+
+if __name__ == '__main__':
+    main()
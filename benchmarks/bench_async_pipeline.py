@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+End-to-end latency: sequential flow (parse -> validate -> fetch catalog ->
+enrich) versus the asyncio pipeline, against a local stand-in for DummyJSON
+with artificial per-request latency.
+
+Usage: python benchmarks/bench_async_pipeline.py [--rows 200000] [--latency 0.2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import read_sales_data
+from utils.data_processor import parse_transactions, process_transactions
+from utils.api_handler import fetch_all_products, create_product_mapping, enrich_sales_data
+from utils.async_pipeline import run_pipeline
+
+CATALOG = [{'id': i, 'title': f'Product {i}', 'category': 'misc', 'brand': 'Acme', 'rating': 4.5}
+           for i in range(1, 195)]
+
+def start_mock_server(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            url = urllib.parse.urlparse(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            if url.path == '/products':
+                skip, limit = int(query.get('skip', 0)), int(query.get('limit', 30))
+                body = {'products': CATALOG[skip:skip + limit], 'total': len(CATALOG)}
+            else:
+                product_id = int(url.path.rsplit('/', 1)[1])
+                if not 1 <= product_id <= len(CATALOG):
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = CATALOG[product_id - 1]
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/products'
+
+def sequential(lines, url):
+    parsed = parse_transactions(lines)
+    valid, _, _, _ = process_transactions(parsed)
+    product_map = create_product_mapping(fetch_all_products(url))
+    return enrich_sales_data(valid, product_map)
+
+def overlapped(lines, url, concurrency):
+    _, _, _, enriched = run_pipeline(
+        iter(lines), concurrency=concurrency, base_url=url,
+        catalog_loader=lambda: fetch_all_products(url),
+    )
+    return enriched
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per API request")
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    base = read_sales_data('data/sales_data.txt')
+    lines = (base * (args.rows // len(base) + 1))[:args.rows]
+    server, url = start_mock_server(args.latency)
+
+    try:
+        results = {}
+        for name, run in (('sequential', lambda: sequential(lines, url)),
+                          ('async', lambda: overlapped(lines, url, args.concurrency))):
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                enriched = run()
+            results[name] = (time.perf_counter() - start, enriched)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert results['sequential'][1] == results['async'][1], "pipelines disagree"
+    print(f"rows={args.rows} latency={args.latency}s concurrency={args.concurrency}")
+    for name, (elapsed, _) in results.items():
+        print(f"{name:<12} {elapsed:8.3f}s")
+    print(f"speedup      {results['sequential'][0] / results['async'][0]:8.2f}x")
+
+if __name__ == '__main__':
+    main()
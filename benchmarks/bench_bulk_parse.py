@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Parse throughput of the per-line parse_transactions against the block
+tokenizer in utils/bulk_parser.py, on the bundled rows scaled up.
+
+With --check the bulk result is compared row for row with the line parser
+(slow and memory hungry for very large --rows).
+
+Usage: python benchmarks/bench_bulk_parse.py [--rows 10000000] [--repeat 1] [--check]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import iter_sales_data
+from utils.data_processor import parse_transactions
+from utils.bulk_parser import parse_sales_file
+from bench_columnar_cache import write_synthetic_file
+
+def timed(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sales_data.txt')
+        write_synthetic_file(source, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(source) / 2**20:.1f} MiB")
+
+        line_time, records = timed(lambda: parse_transactions(iter_sales_data(source)), args.repeat)
+        parsed = len(records)
+        if not args.check:
+            records = None
+        bulk_time, table = timed(lambda: parse_sales_file(source), args.repeat)
+
+        for name, seconds in (('parse_transactions', line_time), ('parse_sales_file', bulk_time)):
+            print(f"{name:<20} {seconds:8.2f}s  {parsed / seconds:12,.0f} rows/s")
+        print(f"speedup              {line_time / bulk_time:8.1f}x")
+
+        if args.check:
+            same = repr(table.to_records()) == repr([dict(t) for t in records])
+            print(f"identical rows       {same}")
+
+if __name__ == '__main__':
+    main()
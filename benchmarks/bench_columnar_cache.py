@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Cold versus warm start of steps 1-4: parsing and validating the text file
+against loading the validated rows from the memory-mapped columnar cache.
+
+cold:  read + parse + validate the text file, then write the cache
+warm:  map the cache (typed columns, no decoding or parsing)
+text:  the default list-of-records path, for reference
+
+Each warm/text timing is followed by validate_and_filter over the result,
+i.e. the point where step 4 of the pipeline starts.
+
+Usage: python benchmarks/bench_columnar_cache.py [--rows 500000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import read_sales_data, iter_sales_data
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.columnar_cache import load_sales_table
+
+def write_synthetic_file(path, rows, seed=12):
+    """Bundled rows (including the invalid ones) with unique TransactionIDs."""
+    base = [line.split('|') for line in read_sales_data('data/sales_data.txt')]
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n')
+        for i in range(rows):
+            fields = list(rnd.choice(base))
+            fields[0] = f"T{i:08d}"
+            f.write('|'.join(fields) + '\n')
+
+def timed(func):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sales_data.txt')
+        cache = source + '.colcache'
+        write_synthetic_file(source, args.rows)
+
+        def text_path():
+            return validate_and_filter(parse_transactions(iter_sales_data(source)))
+
+        def cold():
+            table, _, _ = load_sales_table(source, cache, rebuild=True)
+            return validate_and_filter(table)
+
+        def warm():
+            table, _, hit = load_sales_table(source, cache)
+            assert hit, "expected a cache hit"
+            return validate_and_filter(table)
+
+        results = {}
+        for name, func in (('text (records)', text_path), ('cold (build cache)', cold),
+                           ('warm (mmap cache)', warm)):
+            best, rows = min((timed(func) for _ in range(args.repeat)), key=lambda r: r[0])
+            results[name] = best
+            print(f"{name:<20} {best:8.3f}s  {len(rows):>9} valid rows")
+
+        print(f"cache size           {os.path.getsize(cache) / 2**20:8.1f} MiB "
+              f"(source {os.path.getsize(source) / 2**20:.1f} MiB)")
+        print(f"warm vs text         {results['text (records)'] / results['warm (mmap cache)']:8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Multi-file ingestion: many small daily extracts loaded into one set of
+merged aggregates.
+
+--files files of --rows rows each are generated with generate_sales_data.py
+(sales_data_YYYYMMDD_sNN.txt). Then the directory is loaded:
+
+    sequential     one file at a time in this process
+    per-file pool  ProcessPoolExecutor, one task and one aggregates result per file
+    load_dataset   grouped tasks with worker-side aggregation, for each --workers
+
+Totals are checked to agree; times are the best of --repeat runs.
+
+Usage: python benchmarks/bench_multi_file_load.py [--files 2000] [--rows 200]
+           [--workers 1 2 4] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import iter_sales_data
+from utils.data_processor import (
+    parse_transactions, process_transactions, new_aggregates, merge_aggregates
+)
+from utils.dataset_loader import resolve_inputs, load_dataset
+from generate_sales_data import generate_sales_file
+
+def load_one(filename):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return process_transactions(parse_transactions(iter_sales_data(filename)))[3]
+
+def sequential(files):
+    aggregates = new_aggregates()
+    for filename in files:
+        merge_aggregates(aggregates, load_one(filename))
+    return aggregates
+
+def per_file_pool(files, workers):
+    aggregates = new_aggregates()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(load_one, files):
+            merge_aggregates(aggregates, partial)
+    return aggregates
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--stores', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = date(2024, 1, 1)
+        for i in range(args.files):
+            day = first + timedelta(days=i // args.stores)
+            path = os.path.join(tmp, f"sales_data_{day:%Y%m%d}_s{i % args.stores:02d}.txt")
+            generate_sales_file(path, args.rows, days=1, start_date=day.isoformat(), seed=i)
+        files = resolve_inputs(tmp)
+        total_rows = args.files * args.rows
+        print(f"{len(files):,} files x {args.rows} rows ({total_rows:,} rows), {os.cpu_count()} CPU(s)")
+
+        runs = [('sequential', lambda: sequential(files))]
+        for workers in args.workers:
+            if workers > 1:
+                runs.append((f'per-file pool x{workers}', lambda w=workers: per_file_pool(files, w)))
+            runs.append((f'load_dataset x{workers}', lambda w=workers: load_dataset(tmp, workers=w)[0]))
+
+        expected = None
+        for name, func in runs:
+            elapsed, aggregates = best_of(func, args.repeat)
+            totals = (round(aggregates['total_revenue'], 2), aggregates['transaction_count'])
+            expected = expected or totals
+            check = '' if totals == expected else f"  ! totals {totals} != {expected}"
+            print(f"  {name:<22} {elapsed:8.2f}s {total_rows / elapsed:12,.0f} rows/s "
+                  f"{len(files) / elapsed:9,.0f} files/s{check}")
+
+if __name__ == '__main__':
+    main()
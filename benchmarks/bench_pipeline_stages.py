@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Throughput and peak memory of each pipeline stage on generated data, with a
+history file so regressions show up between commits.
+
+For every --rows scale a file is produced by generate_sales_data.py and the
+stages run in pipeline order, each on the previous stage's output:
+
+    read_sales_data, parse_transactions, validate_and_filter,
+    process_transactions, low_performing_products, generate_sales_report
+    (and parse_sales_file, the numpy block parser, when numpy is installed)
+
+Time is the best of --repeat runs; peak memory is the tracemalloc peak of a
+separate run, so tracing does not distort the timings. Each result is
+appended to --history (git-ignored by default, so it stays local to the
+checkout) as one JSON line tagged with the git commit. Results
+are compared with the latest earlier entry for the same stage, scale and
+host: a throughput drop or memory growth beyond --tolerance is reported as
+a regression, and --fail-on-regression turns that into exit status 1.
+
+Usage: python benchmarks/bench_pipeline_stages.py [--rows 10000 100000 1000000]
+           [--repeat 3] [--history benchmarks/results/pipeline_stages.jsonl]
+           [--tolerance 0.15] [--fail-on-regression]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import read_sales_data
+from utils.data_processor import (
+    parse_transactions, validate_and_filter, process_transactions,
+    low_performing_products, generate_sales_report
+)
+from generate_sales_data import generate_sales_file
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(BENCH_DIR, 'results', 'pipeline_stages.jsonl')
+
+def timed(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def peak_memory(func):
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=BENCH_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def stages(source, report_file):
+    """(name, stage whose output is the input, function) in pipeline order."""
+    pipeline = [
+        ('read_sales_data', None, lambda _: read_sales_data(source)),
+        ('parse_transactions', 'read_sales_data', parse_transactions),
+        ('validate_and_filter', 'parse_transactions', validate_and_filter),
+        ('process_transactions', 'parse_transactions', process_transactions),
+        ('low_performing_products', 'process_transactions',
+         lambda processed: low_performing_products(processed[0])),
+        ('generate_sales_report', 'process_transactions',
+         lambda processed: generate_sales_report(processed[0], None, report_file,
+                                                 aggregates=processed[3])),
+    ]
+    try:
+        from utils.bulk_parser import parse_sales_file
+    except ImportError:
+        return pipeline
+    return pipeline + [('parse_sales_file', None, lambda _: parse_sales_file(source))]
+
+def run_scale(rows, args, tmp):
+    source = os.path.join(tmp, f'sales_{rows}.txt')
+    generate_sales_file(source, rows, messy_rate=args.messy_rate, seed=args.seed)
+    report_file = os.path.join(tmp, 'report.txt')
+
+    results = []
+    outputs = {}
+    for name, input_stage, func in stages(source, report_file):
+        stage_input = outputs.get(input_stage)
+        elapsed, outputs[name] = timed(lambda: func(stage_input), args.repeat)
+        peak = None if args.no_memory else peak_memory(lambda: func(stage_input))
+        results.append({'stage': name, 'rows': rows, 'seconds': round(elapsed, 6),
+                        'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+                        'peak_memory_bytes': peak})
+    return results
+
+def load_history(path):
+    history = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    history.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return history
+
+def find_regressions(result, history, tolerance):
+    """Compares a result with the latest earlier run of the same stage and scale."""
+    earlier = [h for h in history
+               if h.get('stage') == result['stage'] and h.get('rows') == result['rows']
+               and h.get('host') == result['host'] and h.get('messy_rate') == result['messy_rate']]
+    if not earlier:
+        return []
+    base = earlier[-1]
+    problems = []
+    if base.get('rows_per_second') and result['rows_per_second']:
+        change = result['rows_per_second'] / base['rows_per_second'] - 1
+        if change < -tolerance:
+            problems.append(f"throughput {change:+.0%} vs {base.get('commit')}")
+    if base.get('peak_memory_bytes') and result['peak_memory_bytes']:
+        change = result['peak_memory_bytes'] / base['peak_memory_bytes'] - 1
+        if change > tolerance:
+            problems.append(f"peak memory {change:+.0%} vs {base.get('commit')}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--messy-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=17)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--history', default=DEFAULT_HISTORY,
+                        help="JSON lines file results are appended to ('' to disable)")
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    history = load_history(args.history) if args.history else []
+    run = {'commit': git_commit(), 'ts': round(time.time(), 3), 'host': platform.node(),
+           'python': platform.python_version(), 'messy_rate': args.messy_rate}
+    regressions = 0
+    new_entries = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            print(f"\n{rows:,} rows")
+            for result in run_scale(rows, args, tmp):
+                result.update(run)
+                peak = result['peak_memory_bytes']
+                problems = find_regressions(result, history, args.tolerance)
+                regressions += bool(problems)
+                print(f"  {result['stage']:<24} {result['seconds']:9.3f}s "
+                      f"{result['rows_per_second'] or 0:13,.0f} rows/s  "
+                      f"{'-' if peak is None else f'{peak / 2**20:8.1f} MiB'}"
+                      f"{'  REGRESSION: ' + '; '.join(problems) if problems else ''}")
+                new_entries.append(result)
+
+    if args.history:
+        directory = os.path.dirname(args.history)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            for entry in new_entries:
+                f.write(json.dumps(entry) + "\n")
+        print(f"\nresults appended to {args.history}")
+
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
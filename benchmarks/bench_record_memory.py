@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Per-row memory of parsed transactions: the original one-dict-per-row
+records versus the interned __slots__ Transaction records that
+parse_transactions now emits.
+
+Usage: python benchmarks/bench_record_memory.py [--rows 500000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import read_sales_data
+from utils.data_processor import parse_transactions
+
+def parse_as_dicts(raw_lines):
+    """The original dict-per-row parser, kept here as the baseline."""
+    parsed = []
+    for line in raw_lines:
+        values = [v.strip() for v in line.split('|')]
+        if len(values) == 8:
+            try:
+                parsed.append({
+                    'TransactionID': values[0], 'Date': values[1],
+                    'ProductID': values[2], 'ProductName': values[3].replace(',', ''),
+                    'Quantity': int(values[4].replace(',', '')),
+                    'UnitPrice': float(values[5].replace(',', '')),
+                    'CustomerID': values[6], 'Region': values[7]
+                })
+            except ValueError:
+                continue
+    return parsed
+
+def synthetic_lines(rows, seed=11):
+    """Bundled rows with unique TransactionIDs, as in a real extract."""
+    base = [line.split('|') for line in read_sales_data('data/sales_data.txt')]
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(rows):
+        fields = list(rnd.choice(base))
+        fields[0] = f"T{i:08d}"
+        lines.append('|'.join(fields))
+    return lines
+
+def measure(parser, lines):
+    gc.collect()
+    tracemalloc.start()
+    records = parser(lines)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(records), current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.rows)
+    results = {}
+    for name, func in (('dict records', parse_as_dicts), ('Transaction records', parse_transactions)):
+        rows, size = measure(func, lines)
+        results[name] = size / rows
+        print(f"{name:<22} {size / 2**20:9.1f} MiB  {size / rows:7.1f} bytes/row")
+    print(f"reduction              {results['dict records'] / results['Transaction records']:9.2f}x")
+
+if __name__ == '__main__':
+    main()
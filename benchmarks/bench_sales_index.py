@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Filtered analytics: linear validate_and_filter scans vs. SalesIndex lookups.
+
+A file from generate_sales_data.py is parsed and validated once, a
+SalesIndex is built over the valid rows, and each filter combination is
+answered both ways. Results are checked to match; times are the best of
+--repeat runs.
+
+Usage: python benchmarks/bench_sales_index.py [--rows 1000000] [--customers 50000] [--repeat 5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import iter_sales_data
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.sales_index import SalesIndex
+from generate_sales_data import generate_sales_file
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def linear(records, region=None, min_amount=None, max_amount=None, product_id=None,
+           customer_id=None, start_date=None, end_date=None):
+    """validate_and_filter plus the predicates it has no parameter for."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = validate_and_filter(records, region, min_amount, max_amount)
+    return [t for t in rows
+            if (not product_id or t['ProductID'] == product_id)
+            and (not customer_id or t['CustomerID'] == customer_id)
+            and (not start_date or t['Date'] >= start_date)
+            and (not end_date or t['Date'] <= end_date)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sales.txt')
+        generate_sales_file(source, args.rows, customers=args.customers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            records = validate_and_filter(parse_transactions(iter_sales_data(source)))
+
+    start = time.perf_counter()
+    index = SalesIndex(records)
+    print(f"{len(records):,} valid rows, index built in {time.perf_counter() - start:.2f}s")
+
+    cases = [
+        ('region', {'region': 'North'}),
+        ('amount band', {'min_amount': 100_000, 'max_amount': 110_000}),
+        ('region + amount', {'region': 'North', 'min_amount': 100_000, 'max_amount': 110_000}),
+        ('one week', {'start_date': '2024-03-04', 'end_date': '2024-03-10'}),
+        ('customer', {'customer_id': 'C0042'}),
+        ('customer + region', {'customer_id': 'C0042', 'region': 'South'}),
+        ('product + week + amount', {'product_id': 'P105', 'start_date': '2024-03-04',
+                                     'end_date': '2024-03-10', 'min_amount': 1000}),
+    ]
+    print(f"  {'filter':<26} {'rows':>9} {'scan ms':>9} {'index ms':>9} {'speedup':>8}")
+    for name, filters in cases:
+        # First index call includes building the sorted Date / revenue index
+        index.filter(**filters)
+        scan_time, expected = best_of(lambda: linear(records, **filters), args.repeat)
+        index_time, result = best_of(lambda: index.filter(**filters), args.repeat)
+        if result != expected:
+            print(f"  ! {name}: index returned {len(result)} rows, scan {len(expected)}")
+        print(f"  {name:<26} {len(result):>9,} {scan_time * 1000:9.2f} {index_time * 1000:9.3f} "
+              f"{scan_time / index_time if index_time else float('inf'):7.0f}x")
+
+if __name__ == '__main__':
+    main()
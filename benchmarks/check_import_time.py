@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Cold-start check for main.py: import time against a fixed budget.
+
+`python -X importtime -c "import main"` is run --repeat times in a fresh
+interpreter; the best cumulative time of the main module is compared with
+--budget-ms and the slowest imports under it are listed. Heavy modules that
+only some runs need (numpy, requests, the process pool, the HTTP server...)
+must not be imported at startup at all.
+
+Exits 1 when the budget is exceeded or a lazy module is imported eagerly,
+so it can gate cron-driven short runs; tests/test_import_time.py runs the
+same check().
+
+Usage: python benchmarks/check_import_time.py [--budget-ms 150] [--repeat 5] [--top 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; importing main must not pull these in
+LAZY_MODULES = ['numpy', 'requests', 'urllib3', 'asyncio', 'http.server',
+                'concurrent.futures.process', 'utils.transaction_table']
+
+def import_times(module):
+    """
+    Modules imported by one cold `import module`, as
+    {name: (self us, cumulative us)} with module itself included.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = len(name) - len(name.lstrip())
+        rows.append((depth, name.strip(), int(own), int(cumulative)))
+
+    # A module is listed after everything it imported, one indent level deeper
+    end = max(i for i, row in enumerate(rows) if row[1] == module and row[0] == 1)
+    start = end
+    while start and rows[start - 1][0] > 1:
+        start -= 1
+    return {name: (own, cumulative) for _, name, own, cumulative in rows[start:end + 1]}
+
+BUDGET_MS = 150.0
+
+def check(module='main', budget_ms=BUDGET_MS, repeat=5):
+    """
+    Best of `repeat` cold imports of module, against budget_ms.
+
+    Returns: (import_times of the best run, its total ms, list of problems:
+    lazy modules imported eagerly and/or the budget exceeded)
+    """
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module][1])
+    total_ms = best[module][1] / 1000
+    problems = []
+    eager = [name for name in LAZY_MODULES if name in best]
+    if eager:
+        problems.append(f"imported at startup: {', '.join(eager)}")
+    if total_ms > budget_ms:
+        problems.append(f"{total_ms:.1f} ms is over the {budget_ms:.0f} ms budget")
+    return best, total_ms, problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    best, total_ms, problems = check(args.module, args.budget_ms, args.repeat)
+    print(f"import {args.module}: best {total_ms:.1f} ms of {args.repeat} run(s) "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    under = sorted(best, key=lambda name: best[name][0], reverse=True)
+    print(f"  {'module':<36} {'self ms':>8} {'total ms':>9}")
+    for name in under[:args.top]:
+        own, cumulative = best[name]
+        print(f"  {name:<36} {own / 1000:8.2f} {cumulative / 1000:9.2f}")
+
+    for problem in problems:
+        print(f"  ! {problem}")
+    print("FAIL" if problems else "OK")
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
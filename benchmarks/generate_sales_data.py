@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Deterministic synthetic sales file in the data/sales_data.txt schema, at any
+scale (10K to 100M rows), streamed to disk in fixed-size chunks.
+
+The same arguments always produce the same bytes. Cardinality of customers,
+products, regions and dates is configurable, and a fraction of the rows
+(--messy-rate) reproduce the problems found in the real export:
+
+    thousands       comma thousands separators in Quantity / UnitPrice
+    zero_quantity   Quantity 0
+    negative_price  negative UnitPrice
+    bad_prefix      TransactionID / ProductID / CustomerID with a wrong prefix
+    missing_value   empty CustomerID or Region
+    missing_field   a field dropped (7 columns)
+    not_a_number    'N/A' / '12a' in a numeric column
+    whitespace      padding around fields, e.g. 'South '
+    blank_line      an empty line
+    latin1          a line encoded as latin-1 inside a UTF-8 file
+
+Commas inside product names ('Mouse,Wireless') are part of the product pool
+itself, not a messy kind.
+
+Usage: python benchmarks/generate_sales_data.py OUTPUT [--rows 1000000]
+           [--customers 5000] [--products 200] [--regions 4] [--days 365]
+           [--messy-rate 0.1] [--encoding utf-8|latin-1] [--seed 17]
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+HEADER = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region'
+CHUNK_ROWS = 50_000
+
+BASE_PRODUCTS = [
+    ('Laptop', 45000), ('Laptop,Premium', 80000), ('Laptop Charger', 1800),
+    ('Laptop Charger,65W', 2200), ('Mouse', 500), ('Mouse,Wireless', 900),
+    ('Wireless Mouse', 1500), ('Wireless Mouse,Gaming', 2500), ('Keyboard', 2400),
+    ('Keyboard,Mechanical', 5500), ('Monitor', 12000), ('Monitor,LED', 10000),
+    ('USB Cable', 300), ('Webcam', 4000), ('Webcam,HD', 3000), ('Headphones', 2800),
+    ('External Hard Drive', 6000), ('External Hard Drive,1TB', 8500),
+    ('Câble HDMI', 700), ('Écran Tactile', 15000), ('Souris Ergonomique', 1900),
+]
+BASE_REGIONS = ['North', 'South', 'East', 'West', 'Central', 'Northeast',
+                'Northwest', 'Southeast', 'Southwest']
+
+MESSY_KINDS = ['thousands', 'zero_quantity', 'negative_price', 'bad_prefix',
+               'missing_value', 'missing_field', 'not_a_number', 'whitespace',
+               'blank_line', 'latin1']
+
+def build_catalog(products, regions, customers, days, start_date):
+    """Fixed pools the rows are drawn from (ProductID -> name and base price)."""
+    catalog = []
+    for i in range(products):
+        name, price = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        if i >= len(BASE_PRODUCTS):
+            name = f"{name} {i // len(BASE_PRODUCTS) + 1}"
+        catalog.append((f"P{101 + i}", name, price))
+    region_pool = [BASE_REGIONS[i] if i < len(BASE_REGIONS) else f"Region{i + 1}"
+                   for i in range(regions)]
+    customer_pool = [f"C{i + 1:04d}" for i in range(customers)]
+    first = date.fromisoformat(start_date)
+    date_pool = [(first + timedelta(days=i)).isoformat() for i in range(days)]
+    return catalog, region_pool, customer_pool, date_pool
+
+def _thousands(value):
+    return f"{value:,}"
+
+def _messy(kind, fields, rnd):
+    """Applies one messy case to the fields of a row; returns the line (str)."""
+    if kind == 'thousands':
+        fields[4] = _thousands(int(fields[4]) * 250)
+        fields[5] = _thousands(max(int(fields[5]), 1000))
+    elif kind == 'zero_quantity':
+        fields[4] = '0'
+    elif kind == 'negative_price':
+        fields[5] = f"-{fields[5]}"
+    elif kind == 'bad_prefix':
+        column = rnd.choice((0, 2, 6))
+        fields[column] = 'X' + fields[column][1:]
+    elif kind == 'missing_value':
+        fields[rnd.choice((6, 7))] = ''
+    elif kind == 'missing_field':
+        del fields[rnd.randrange(1, 8)]
+    elif kind == 'not_a_number':
+        fields[rnd.choice((4, 5))] = rnd.choice(('N/A', '12a', ''))
+    elif kind == 'whitespace':
+        fields[7] = fields[7] + ' '
+        fields[3] = ' ' + fields[3]
+    elif kind == 'blank_line':
+        return ''
+    elif kind == 'latin1':
+        fields[3] = fields[3] + ' Édition Spéciale'
+    return '|'.join(fields)
+
+def generate_sales_file(path, rows, customers=5000, products=200, regions=4, days=365,
+                        start_date='2024-01-01', messy_rate=0.1, encoding='utf-8', seed=17):
+    """
+    Writes `rows` data lines (plus the header) to path.
+
+    Returns: {messy kind: count} of the rows that were made messy
+    """
+    rnd = random.Random(seed)
+    catalog, region_pool, customer_pool, date_pool = build_catalog(
+        products, regions, customers, days, start_date)
+    counts = dict.fromkeys(MESSY_KINDS, 0)
+    # In a latin-1 file every line is latin-1 already
+    line_encoding = 'latin-1' if encoding == 'latin-1' else 'utf-8'
+    bom = '\ufeff' if line_encoding == 'utf-8' else ''
+
+    with open(path, 'wb') as f:
+        f.write(f"{bom}{HEADER}\n".encode(line_encoding))
+        written = 0
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            picked = rnd.choices(catalog, k=n)
+            dates = rnd.choices(date_pool, k=n)
+            cust = rnd.choices(customer_pool, k=n)
+            region = rnd.choices(region_pool, k=n)
+            quantities = rnd.choices(range(1, 11), k=n)
+            jitter = rnd.choices(range(80, 121), k=n)
+            messy = [rnd.random() < messy_rate for _ in range(n)]
+
+            out = []
+            for i in range(n):
+                product_id, name, price = picked[i]
+                line = (f"T{written + i + 1:09d}|{dates[i]}|{product_id}|{name}|"
+                        f"{quantities[i]}|{price * jitter[i] // 100}|{cust[i]}|{region[i]}")
+                if messy[i]:
+                    kind = rnd.choice(MESSY_KINDS)
+                    counts[kind] += 1
+                    line = _messy(kind, line.split('|'), rnd)
+                    if kind == 'latin1' and line_encoding == 'utf-8':
+                        # Flush what we have so the odd line keeps its bytes
+                        f.write(("\n".join(out) + "\n").encode('utf-8') if out else b'')
+                        f.write((line + "\n").encode('latin-1'))
+                        out = []
+                        continue
+                out.append(line)
+            if out:
+                f.write(("\n".join(out) + "\n").encode(line_encoding))
+            written += n
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--start-date', default='2024-01-01')
+    parser.add_argument('--messy-rate', type=float, default=0.1)
+    parser.add_argument('--encoding', choices=('utf-8', 'latin-1'), default='utf-8')
+    parser.add_argument('--seed', type=int, default=17)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate_sales_file(
+        args.output, args.rows, customers=args.customers, products=args.products,
+        regions=args.regions, days=args.days, start_date=args.start_date,
+        messy_rate=args.messy_rate, encoding=args.encoding, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows:,} rows, {os.path.getsize(args.output) / 2**20:.1f} MiB "
+          f"in {elapsed:.1f}s -> {args.output}")
+    print("messy rows: " + ", ".join(f"{kind} {count}" for kind, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
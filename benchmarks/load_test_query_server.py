@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Load test for the query server (main.py --serve): latency percentiles per
+endpoint and overall throughput against localhost.
+
+Without --url a server is started in this process on a file produced by
+generate_sales_data.py (--rows), on a free port. Each of --clients threads
+keeps one HTTP/1.1 connection open and cycles through every report endpoint
+with no filter, a region filter and an amount filter, for --duration
+seconds. Against a local server, rows are then appended to the file to time
+the first query after a change (the incremental refresh).
+
+Usage: python benchmarks/load_test_query_server.py [--rows 100000]
+           [--clients 4] [--duration 10] [--url http://127.0.0.1:8765]
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_sales_data import generate_sales_file
+
+ENDPOINTS = ['/regions', '/top-products?n=5', '/top-customers?n=5', '/daily-trend',
+             '/peak-day', '/low-performers?threshold=10']
+FILTERS = ['', 'region=North', 'min_amount=5000&max_amount=50000']
+
+def query_mix():
+    """Every endpoint with every filter, as request paths."""
+    paths = []
+    for endpoint in ENDPOINTS:
+        for filters in FILTERS:
+            joiner = '&' if '?' in endpoint else '?'
+            paths.append(endpoint + (joiner + filters if filters else ''))
+    return paths
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def get(conn, path):
+    start = time.perf_counter()
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+    elapsed = time.perf_counter() - start
+    if response.status != 200:
+        raise RuntimeError(f"{path}: HTTP {response.status} {body[:200]!r}")
+    return elapsed, body
+
+def client(host, port, paths, deadline, latencies, errors):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            try:
+                elapsed, _ = get(conn, path)
+            except (OSError, http.client.HTTPException, RuntimeError) as e:
+                errors.append(str(e))
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies.setdefault(path.split('?')[0], []).append(elapsed)
+    finally:
+        conn.close()
+
+def run_load(host, port, clients, duration):
+    paths = query_mix()
+    # One pass first so every filter is cached, as in steady state
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for path in paths:
+        get(conn, path)
+    conn.close()
+
+    per_client = [{} for _ in range(clients)]
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(host, port, paths, deadline, latencies, errors))
+               for latencies in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = {}
+    for results in per_client:
+        for endpoint, values in results.items():
+            latencies.setdefault(endpoint, []).extend(values)
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n{total:,} requests from {clients} client(s) in {elapsed:.1f}s "
+          f"= {total / elapsed:,.0f} req/s, {len(errors)} error(s)")
+    print(f"  {'endpoint':<18} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for endpoint, values in sorted(latencies.items()):
+        print(f"  {endpoint:<18} {len(values):>7} {percentile(values, 0.5) * 1000:8.2f} "
+              f"{percentile(values, 0.95) * 1000:8.2f} {percentile(values, 0.99) * 1000:8.2f} "
+              f"{max(values) * 1000:8.2f}")
+    for error in errors[:5]:
+        print(f"  ! {error}")
+    return not errors
+
+def time_refresh(host, port, source, rows, tmp):
+    """
+    Appends rows to the served file and times the first query that sees
+    them. Returns the summary line (the server prints while parsing).
+    """
+    from utils.query_server import POLL_INTERVAL
+
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    before = json.loads(get(conn, '/status')[1])
+    extra = os.path.join(tmp, 'append.txt')
+    generate_sales_file(extra, rows, seed=before['parsed'])
+    with open(extra, 'rb') as f:
+        f.readline()
+        tail = f.read()
+    with open(source, 'ab') as f:
+        f.write(tail)
+    # Changes are noticed on the first request after the poll interval
+    time.sleep(POLL_INTERVAL)
+    elapsed, _ = get(conn, '/regions')
+    after = json.loads(get(conn, '/status')[1])
+    conn.close()
+    return (f"\nappended {rows:,} rows: first query took {elapsed * 1000:.1f} ms "
+            f"({after['parsed'] - before['parsed']:,} rows parsed, "
+            f"appends {before['appends']} -> {after['appends']}, reloads {after['reloads']})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help="query an already running server instead of starting one")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--append-rows', type=int, default=10_000,
+                        help="rows appended to time an incremental refresh (local server only, 0 to skip)")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        ok = run_load(url.hostname, url.port or 80, args.clients, args.duration)
+        sys.exit(0 if ok else 1)
+
+    from utils.query_server import make_server
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sales.txt')
+        generate_sales_file(source, args.rows)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            server = make_server(source, port=0)
+        print(f"{args.rows:,} rows loaded in {time.perf_counter() - start:.2f}s")
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            ok = run_load(host, port, args.clients, args.duration)
+            if args.append_rows:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    summary = time_refresh(host, port, source, args.append_rows, tmp)
+                print(summary)
+        finally:
+            server.shutdown()
+            server.server_close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
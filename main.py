@@ -6,48 +6,217 @@
 
 import sys
 import os
+import argparse
+import time
 from datetime import datetime
 
 # Import all modules created in previous tasks
-from utils.file_handler import read_sales_data
+from utils.file_handler import iter_sales_data, file_version
 from utils.data_processor import (
-    parse_transactions, validate_and_filter, region_wise_sales,
-    top_selling_products, customer_analysis, daily_sales_trend,
-    find_peak_sales_day, low_performing_products, enrich_sales_data,
-    save_enriched_data, generate_sales_report
+    parse_transactions, filter_options, process_transactions, generate_sales_report,
+    new_aggregates, merge_aggregates, summarize_enrichment, approximate_settings,
+    aggregate_transactions, generate_trend_report, write_cached_report, TREND_GRAINS
 )
-from utils.api_handler import fetch_all_products, create_product_mapping
+from utils.api_handler import load_product_catalog, enrich_sales_data, save_enriched_data
+from utils.product_index import build_product_index, catalog_version
+from utils.report_cache import ReportCache, report_cache_key, REPORT_CACHE_DIR
+from utils.dataset_loader import resolve_inputs, load_dataset, TASKS_PER_WORKER
+from utils import instrumentation
 
-def main():
+def parse_args(argv=None):
+    """Command line options for the pipeline."""
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument('--async-pipeline', action='store_true',
+                        help="overlap API lookups with parsing using asyncio")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="maximum concurrent API lookups in async mode (default: 8)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only process rows appended since the last checkpoint")
+    parser.add_argument('--verify', action='store_true',
+                        help="with --incremental: re-hash the whole processed part of the "
+                             "file instead of its first and last segments")
+    parser.add_argument('--columnar-cache', action='store_true',
+                        help="load validated rows from a memory-mapped binary cache next to the source")
+    parser.add_argument('--rollup-cube', action='store_true',
+                        help="write the region, sales trend and peak sections of --input from a "
+                             "persisted rollup cube, without reading the rows while it is current")
+    parser.add_argument('--trend-grain', choices=TREND_GRAINS, default='day',
+                        help="with --rollup-cube: trend and peak buckets (default: day)")
+    parser.add_argument('--report-cache', nargs='?', const=REPORT_CACHE_DIR, metavar='DIR',
+                        help="reuse report sections whose data, filters and catalog are unchanged "
+                             f"(default DIR: {REPORT_CACHE_DIR})")
+
+    server = parser.add_argument_group(
+        "query server", "keep the validated data in memory and answer report queries "
+                        "as JSON over HTTP (see utils/query_server.py for the endpoints)")
+    server.add_argument('--serve', action='store_true',
+                        help="run the query server on --input (default: data/sales_data.txt); "
+                             "--no-api skips the product catalog")
+    server.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    server.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+
+    approximate = parser.add_argument_group(
+        "approximate mode", "bounded-memory sketches for unique and top customers "
+                            "(every mode except the query server)")
+    approximate.add_argument('--approximate', action='store_true',
+                             help="estimate customer figures with HyperLogLog, "
+                                  "Space-Saving and Count-Min sketches")
+    approximate.add_argument('--distinct-error', type=float, default=0.02, metavar='FRACTION',
+                             help="relative error of unique-customer counts (default: 0.02)")
+    approximate.add_argument('--top-error', type=float, default=0.001, metavar='FRACTION',
+                             help="top-customer overcount as a fraction of the total (default: 0.001)")
+
+    batch = parser.add_argument_group(
+        "batch mode", "non-interactive run over one or more files; "
+                      "enabled by any of the options below")
+    batch.add_argument('--input', metavar='PATH',
+                       help="sales file, directory of *.txt files or glob pattern "
+                            "(default: data/sales_data.txt)")
+    batch.add_argument('--region', help="keep only transactions from this region")
+    batch.add_argument('--min-amount', type=float, metavar='AMOUNT',
+                       help="keep only transactions worth at least AMOUNT")
+    batch.add_argument('--max-amount', type=float, metavar='AMOUNT',
+                       help="keep only transactions worth at most AMOUNT")
+    batch.add_argument('--output-dir', metavar='DIR',
+                       help="directory for reports and enriched files (default: output)")
+    batch.add_argument('--no-api', action='store_true',
+                       help="skip the product catalog and enrichment steps")
+    batch.add_argument('--jobs', type=int, metavar='N',
+                       help="files processed concurrently (default: 1)")
+    batch.add_argument('--merge', action='store_true',
+                       help="write one merged report instead of one report per file")
+
+    metrics = parser.add_argument_group(
+        "instrumentation", "per-stage wall/CPU time, rows/sec and peak memory (off by default)")
+    metrics.add_argument('--metrics', metavar='FILE',
+                         help="write stage metrics to FILE (JSON lines, or a Prometheus "
+                              "textfile if FILE ends in .prom)")
+    metrics.add_argument('--metrics-format', choices=('jsonl', 'prometheus'),
+                         help="override the format inferred from --metrics")
+    metrics.add_argument('--no-trace-memory', action='store_true',
+                         help="skip tracemalloc peaks, which slow allocation-heavy stages")
+    args = parser.parse_args(argv)
+
+    # Options the selected flow would ignore are errors, not silently dropped
+    mode = selected_mode(args)
+    ignored = [action.option_strings[0] for action in parser._actions
+               if action.dest not in MODE_OPTIONS[mode] + (mode,) + METRICS_OPTIONS
+               and getattr(args, action.dest, action.default) != action.default]
+    if ignored:
+        label = f"--{mode.replace('_', '-')}" if mode in MODE_FLAGS else f"{mode} mode"
+        parser.error(f"{label} cannot be combined with {', '.join(ignored)}")
+    return args
+
+BATCH_OPTIONS = ('input', 'region', 'min_amount', 'max_amount', 'output_dir', 'jobs')
+APPROXIMATE_OPTIONS = ('approximate', 'distinct_error', 'top_error')
+# Modes chosen by their own flag, in dispatch order
+MODE_FLAGS = ('async_pipeline', 'incremental', 'serve', 'rollup_cube')
+# Options honoured by each flow
+MODE_OPTIONS = {
+    'async_pipeline': ('concurrency', 'input', 'region', 'min_amount', 'max_amount')
+                      + APPROXIMATE_OPTIONS,
+    'incremental': ('input', 'no_api', 'report_cache', 'verify') + APPROXIMATE_OPTIONS,
+    'serve': ('input', 'no_api', 'host', 'port'),
+    'rollup_cube': ('input', 'region', 'output_dir', 'trend_grain'),
+    'batch': BATCH_OPTIONS + ('no_api', 'merge', 'report_cache') + APPROXIMATE_OPTIONS,
+    'interactive': ('columnar_cache', 'report_cache') + APPROXIMATE_OPTIONS,
+}
+METRICS_OPTIONS = ('metrics', 'metrics_format', 'no_trace_memory')
+
+def selected_mode(args):
+    """The flow main() runs for args: a key of MODE_OPTIONS."""
+    for mode in MODE_FLAGS:
+        if getattr(args, mode):
+            return mode
+    if args.no_api or args.merge or any(getattr(args, name) is not None
+                                        for name in BATCH_OPTIONS):
+        return 'batch'
+    return 'interactive'
+
+def main(argv=None):
     """
     Orchestrates the full data pipeline: Extraction, Transformation, 
     API Enrichment, and Reporting.
+
+    Returns the process exit status: 0 on success, 1 on failure.
     """
+    args = parse_args(argv)
+
     print("=" * 50)
     print("      SALES ANALYTICS SYSTEM - VERSION 2.0")
     print("=" * 50)
 
+    try:
+        args.approximate = approximate_settings(args.distinct_error, args.top_error) \
+            if args.approximate else None
+    except ValueError as e:
+        print(f"! Error: {e}")
+        return 1
+
+    if args.metrics:
+        instrumentation.configure(args.metrics, args.metrics_format,
+                                  memory=not args.no_trace_memory)
+    try:
+        with instrumentation.stage('pipeline'):
+            mode = selected_mode(args)
+            if mode == 'async_pipeline':
+                return run_async_flow(args)
+            if mode == 'incremental':
+                return run_incremental_flow(args)
+            if mode == 'serve':
+                return run_server_flow(args)
+            if mode == 'rollup_cube':
+                return run_cube_flow(args)
+            if mode == 'batch':
+                return run_batch_flow(args)
+            return run_interactive_flow(args)
+    finally:
+        instrumentation.disable()
+
+def run_interactive_flow(args):
+    """
+    Default mode: steps 1-10 on data/sales_data.txt, prompting for filters.
+    """
     try:
         # [1/10] Reading Data
+        # Lines are streamed straight into the parser, so the raw file is
+        # never held in memory as a list.
         print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data('data/sales_data.txt')
-        if not raw_lines:
+        if not os.path.exists('data/sales_data.txt'):
             print("! Error: sales_data.txt is empty or missing.")
-            return
-        print(f"✓ Found {len(raw_lines)} raw transactions.")
+            return 1
+        # Rows already rejected before step 4 (columnar cache only)
+        rejected = 0
+        if args.columnar_cache:
+            # Warm runs map typed columns straight from disk: no decode, no parse
+            from utils.columnar_cache import load_sales_table
+            print("\n[2/10] Loading columnar cache...")
+            start = time.perf_counter()
+            parsed_records, total_parsed, hit = load_sales_table('data/sales_data.txt')
+            rejected = total_parsed - len(parsed_records)
+            if not total_parsed:
+                print("! Error: sales_data.txt is empty or missing.")
+                return 1
+            print(f"✓ {len(parsed_records)} validated records "
+                  f"({'cache hit' if hit else 'cache rebuilt'}) in {time.perf_counter() - start:.3f}s")
+        else:
+            raw_lines = iter_sales_data('data/sales_data.txt')
+            print("✓ Streaming raw transactions from data/sales_data.txt")
 
-        # [2/10] Parsing
-        print("\n[2/10] Parsing and cleaning...")
-        parsed_records = parse_transactions(raw_lines)
-        print(f"✓ {len(parsed_records)} records successfully parsed.")
+            # [2/10] Parsing
+            print("\n[2/10] Parsing and cleaning...")
+            parsed_records = parse_transactions(raw_lines)
+            if not parsed_records:
+                print("! Error: sales_data.txt is empty or missing.")
+                return 1
+            print(f"✓ {len(parsed_records)} records successfully parsed.")
 
         # [3/10] User Interaction: Filtering
         print("\n[3/10] Filter Options Available:")
-        regions = sorted(list(set(t['Region'] for t in parsed_records)))
-        amounts = [t['Quantity'] * t['UnitPrice'] for t in parsed_records]
+        regions, min_amount, max_amount = filter_options(parsed_records)
         
         print(f"   Available Regions: {', '.join(regions)}")
-        print(f"   Amount Range:      ₹{min(amounts):,.2f} - ₹{max(amounts):,.2f}")
+        print(f"   Amount Range:      ₹{min_amount:,.2f} - ₹{max_amount:,.2f}")
 
         do_filter = input("\nApply filters before analysis? (y/n): ").lower().strip()
         f_region, f_min, f_max = None, None, None
@@ -63,12 +232,16 @@ def main():
             except ValueError:
                 print("   ! Invalid numeric input. Proceeding without price filters.")
 
+        filters = {'region': f_region, 'min_amount': f_min, 'max_amount': f_max}
+
         # [4/10] Validation & Filtering Execution
+        # Validation, filtering and every report aggregate share one pass
         print("\n[4/10] Validating and filtering transactions...")
-        valid_data, invalid_count, filter_summary = validate_and_filter(
-            parsed_records, region=f_region, min_amount=f_min, max_amount=f_max
+        valid_data, invalid_count, filter_summary, aggregates = process_transactions(
+            parsed_records, region=f_region, min_amount=f_min, max_amount=f_max,
+            approximate=args.approximate
         )
-        print(f"✓ Valid: {len(valid_data)} | Invalid/Filtered: {invalid_count}")
+        print(f"✓ Valid: {len(valid_data)} | Invalid/Filtered: {invalid_count + rejected}")
 
         # [5/10] Analysis
         print("\n[5/10] Performing statistical analysis...")
@@ -77,16 +250,19 @@ def main():
         print("✓ Analysis logic verified.")
 
         # [6/10] API Integration
+        # Served from data/product_catalog.json; the API is only called once it expires
         print("\n[6/10] Fetching external product metadata (DummyJSON)...")
-        api_products = fetch_all_products()
+        api_products = load_product_catalog()
         if not api_products:
             print("   ! Warning: API fetch failed. Proceeding with local data only.")
-        product_map = create_product_mapping(api_products)
-        print(f"✓ Mapping created for {len(product_map)} API products.")
+        # Join index (ID / name / fuzzy tiers) built once per catalog version
+        product_index = build_product_index(api_products)
+        print(f"✓ Mapping created for {len(product_index)} API products.")
 
         # [7/10] Enrichment
         print("\n[7/10] Enriching sales data with API information...")
-        enriched_data = enrich_sales_data(valid_data, product_map)
+        enriched_data = enrich_sales_data(valid_data, product_index)
+        product_index.save()
         match_count = sum(1 for item in enriched_data if item.get('API_Match'))
         print(f"✓ Enrichment complete: {match_count}/{len(valid_data)} matched.")
 
@@ -97,8 +273,15 @@ def main():
 
         # [9/10] Reporting
         print("\n[9/10] Generating comprehensive report...")
-        generate_sales_report(valid_data, enriched_data, 'output/sales_report.txt')
+        report_cache = ReportCache(cache_dir=args.report_cache) if args.report_cache else None
+        cache_key = report_cache_key(
+            file_version('data/sales_data.txt'), filters, product_index.version,
+            approximate=args.approximate) if report_cache else None
+        generate_sales_report(valid_data, enriched_data, 'output/sales_report.txt',
+                              aggregates=aggregates, cache=report_cache, cache_key=cache_key)
         print("✓ Report saved to: output/sales_report.txt")
+        if report_cache:
+            print(report_cache_summary(report_cache.stats()))
 
         # [10/10] Conclusion
         print("\n" + "=" * 50)
@@ -111,7 +294,390 @@ def main():
         print(f"FATAL ERROR: {str(e)}")
         print("Ensure all 'utils/' modules are correctly implemented.")
         print("!" * 50)
+        return 1
+    return 0
+
+def run_async_flow(args):
+    """
+    Async mode: parsing, validation and API enrichment run overlapped
+    (steps 2-7), then the dataset is saved and reported as usual.
+    """
+    from utils.async_pipeline import run_pipeline
+
+    filename = args.input or 'data/sales_data.txt'
+    try:
+        print("\n[1/10] Reading sales data...")
+        if not os.path.isfile(filename):
+            print(f"! Error: {filename} is empty or missing.")
+            return 1
+
+        print(f"\n[2-7/10] Parsing, validating and enriching "
+              f"(async, concurrency={args.concurrency})...")
+        start = time.perf_counter()
+        valid_data, invalid_count, aggregates, enriched_data = run_pipeline(
+            iter_sales_data(filename), region=args.region, min_amount=args.min_amount,
+            max_amount=args.max_amount, concurrency=args.concurrency,
+            approximate=args.approximate
+        )
+        match_count = sum(1 for item in enriched_data if item.get('API_Match'))
+        print(f"✓ Valid: {len(valid_data)} | Invalid: {invalid_count} | "
+              f"Enriched: {match_count}/{len(valid_data)} in {time.perf_counter() - start:.2f}s")
+
+        print("\n[8/10] Saving enriched dataset...")
+        save_enriched_data(enriched_data, 'data/enriched_sales_data.txt')
+
+        print("\n[9/10] Generating comprehensive report...")
+        generate_sales_report(valid_data, enriched_data, 'output/sales_report.txt',
+                              aggregates=aggregates)
+
+        print("\n" + "=" * 50)
+        print(f"PROCESS COMPLETED AT {datetime.now().strftime('%H:%M:%S')}")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n" + "!" * 50)
+        print(f"FATAL ERROR: {str(e)}")
+        print("!" * 50)
+        return 1
+    return 0
+
+def run_incremental_flow(args):
+    """
+    Incremental mode: merges newly appended rows into the checkpointed
+    aggregates and regenerates the report from them (no API step).
+    """
+    from utils.incremental import run_incremental
+
+    filename = args.input or 'data/sales_data.txt'
+    report_file = 'output/sales_report.txt'
+    try:
+        print("\n[1-4/10] Processing rows appended since the last checkpoint...")
+        if not os.path.isfile(filename):
+            print(f"! Error: {filename} is empty or missing.")
+            return 1
+        report_cache = ReportCache(cache_dir=args.report_cache) if args.report_cache else None
+        cache_key = report_cache_key(file_version(filename),
+                                     approximate=args.approximate) if report_cache else None
+        if report_cache and write_cached_report(report_file, report_cache, cache_key):
+            # Every section is cached for this version of the file: no checkpoint or row is read
+            print(f"✓ {filename} unchanged since its cached report")
+        else:
+            aggregates, stats = run_incremental(filename, approximate=args.approximate,
+                                                verify=args.verify)
+            mode = "full rescan" if stats['full_rescan'] else "incremental"
+            print(f"✓ {stats['new_parsed']} new records parsed ({mode}); "
+                  f"totals: Valid {stats['total_valid']} | Invalid {stats['total_invalid']}")
+
+            print("\n[9/10] Generating comprehensive report...")
+            generate_sales_report(None, None, report_file, aggregates=aggregates,
+                                  cache=report_cache, cache_key=cache_key)
+        if report_cache:
+            print(report_cache_summary(report_cache.stats()))
+
+        print("\n" + "=" * 50)
+        print(f"PROCESS COMPLETED AT {datetime.now().strftime('%H:%M:%S')}")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n" + "!" * 50)
+        print(f"FATAL ERROR: {str(e)}")
+        print("!" * 50)
+        return 1
+    return 0
+
+def run_server_flow(args):
+    """
+    Server mode: loads the sales file and the product catalog once, then
+    answers queries until interrupted, picking up rows appended to the file.
+    """
+    from utils.query_server import make_server
+
+    filename = args.input or 'data/sales_data.txt'
+    try:
+        print(f"\n[1-4/10] Loading {filename}...")
+        if not os.path.isfile(filename):
+            print(f"! Error: {filename} is empty or missing.")
+            return 1
+        product_index = None
+        if not args.no_api:
+            print("\n[6/10] Fetching external product metadata (DummyJSON)...")
+            api_products = load_product_catalog()
+            if not api_products:
+                print("   ! Warning: API fetch failed. Serving without catalog data.")
+            product_index = build_product_index(api_products)
+
+        start = time.perf_counter()
+        server = make_server(filename, args.host, args.port, product_index)
+        status = server.dataset.status()
+        print(f"✓ {status['valid']} valid records loaded in {time.perf_counter() - start:.2f}s")
+        host, port = server.server_address[:2]
+        print(f"\nServing on http://{host}:{port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server...")
+        finally:
+            server.server_close()
+            if product_index is not None:
+                product_index.save()
+
+    except Exception as e:
+        print("\n" + "!" * 50)
+        print(f"FATAL ERROR: {str(e)}")
+        print("!" * 50)
+        return 1
+    return 0
+
+def run_cube_flow(args):
+    """
+    Rollup cube mode: region, sales trend and peak sections of one file at
+    --trend-grain. While the persisted cube matches the file's version (see
+    load_saved_cube) they are read from its cells and no row is parsed, so
+    the run costs the same whatever the file's size; Unique Cust are then
+    HyperLogLog estimates. Otherwise the file is processed exactly and the
+    cube rebuilt from every valid row for the next run.
+    """
+    from utils.rollup_cube import load_saved_cube, save_new_cube, CUBE_FILE
+
+    filename = args.input or 'data/sales_data.txt'
+    output_file = os.path.join(args.output_dir or 'output', 'trend_report.txt')
+    try:
+        print(f"\n[1-4/10] Looking up the rollup cube of {filename}...")
+        if not os.path.isfile(filename):
+            print(f"! Error: {filename} is empty or missing.")
+            return 1
+        start = time.perf_counter()
+        # Keyed on the file alone: --region selects cells at query time
+        source = load_saved_cube(filename)
+        if source is not None:
+            print(f"✓ Rollup cube loaded from {CUBE_FILE} in {time.perf_counter() - start:.3f}s")
+        else:
+            print("✓ No current rollup cube: processing every row")
+            parsed_records = parse_transactions(iter_sales_data(filename))
+            if not parsed_records:
+                print(f"! Error: {filename} is empty or missing.")
+                return 1
+            valid_data, invalid_count, _, source = process_transactions(parsed_records)
+            print(f"✓ Valid: {len(valid_data)} | Invalid: {invalid_count}")
+            if args.region:
+                source = aggregate_transactions(t for t in valid_data if t['Region'] == args.region)
+            start = time.perf_counter()
+            save_new_cube(filename, valid_data)
+            print(f"✓ Rollup cube built and saved to {CUBE_FILE} in {time.perf_counter() - start:.2f}s")
+
+        print("\n[9/10] Generating trend report...")
+        generate_trend_report(source, output_file, args.trend_grain, args.region)
+
+        print("\n" + "=" * 50)
+        print(f"PROCESS COMPLETED AT {datetime.now().strftime('%H:%M:%S')}")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n" + "!" * 50)
+        print(f"FATAL ERROR: {str(e)}")
+        print("!" * 50)
+        return 1
+    return 0
+
+def report_cache_summary(stats):
+    """One-line hit/miss summary of ReportCache.stats()."""
+    recomputed = [name for name, counts in stats['sections'].items() if counts['misses']]
+    return (f"✓ Report cache: {stats['hits'] + stats['disk_hits']} section(s) reused "
+            f"({stats['disk_hits']} from disk), {stats['misses']} recomputed"
+            f"{': ' + ', '.join(recomputed) if recomputed else ''}")
+
+def merge_cache_stats(all_stats):
+    """Sums the ReportCache.stats() of several batch workers."""
+    total = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'sections': {}}
+    for stats in all_stats:
+        for counter in ('hits', 'disk_hits', 'misses', 'evictions', 'entries'):
+            total[counter] += stats[counter]
+        for name, counts in stats['sections'].items():
+            section = total['sections'].setdefault(name, {'hits': 0, 'misses': 0})
+            section['hits'] += counts['hits']
+            section['misses'] += counts['misses']
+    return total
+
+def process_sales_file(task):
+    """
+    Batch worker: steps 1-9 for a single file. Runs in a worker process when
+    --jobs > 1, so it takes and returns plain picklable data.
+
+    Returns: dict with the file name, counts, aggregates and enrichment
+    summary, {'file', 'cached': True, 'report_cache'} if the report came
+    from the cache without reading the file, or {'file': ..., 'error':
+    message} if the file failed.
+    """
+    filename = task['file']
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    report_path = os.path.join(task['output_dir'], f"{stem}_report.txt")
+    try:
+        product_index = None
+        if task['api_products'] is not None:
+            product_index = build_product_index(task['api_products'])
+
+        # Keyed on the file's version, so the cache is checked before reading it
+        report_cache = cache_key = None
+        if task['report_cache'] and not task['merge']:
+            report_cache = ReportCache(cache_dir=task['report_cache'])
+            cache_key = report_cache_key(
+                file_version(filename),
+                {'region': task['region'], 'min_amount': task['min_amount'],
+                 'max_amount': task['max_amount']},
+                product_index.version if product_index is not None else None,
+                approximate=task['approximate'])
+            # The report is the only output without the API step
+            if product_index is None and write_cached_report(report_path, report_cache, cache_key):
+                return {'file': filename, 'cached': True, 'report_cache': report_cache.stats()}
+
+        parsed_records = parse_transactions(iter_sales_data(filename))
+        if not parsed_records:
+            return {'file': filename, 'error': "empty, missing or unreadable"}
+
+        valid_data, invalid_count, _, aggregates = process_transactions(
+            parsed_records, region=task['region'],
+            min_amount=task['min_amount'], max_amount=task['max_amount'],
+            approximate=task['approximate']
+        )
+        parsed_count = len(parsed_records)
+        parsed_records = None
+
+        enrichment = None
+        if product_index is not None:
+            enriched_path = os.path.join(task['output_dir'], f"{stem}_enriched.txt")
+            enriched_data = enrich_sales_data(valid_data, product_index)
+            product_index.save()
+            if save_enriched_data(enriched_data, enriched_path) is None:
+                return {'file': filename, 'error': f"could not write {enriched_path}"}
+            enrichment = summarize_enrichment(enriched_data)
+
+        if not task['merge']:
+            generate_sales_report(valid_data, enrichment, report_path, aggregates=aggregates,
+                                  cache=report_cache, cache_key=cache_key)
+
+        return {'file': filename, 'parsed': parsed_count, 'valid': len(valid_data),
+                'invalid': invalid_count, 'aggregates': aggregates, 'enrichment': enrichment,
+                'report_cache': report_cache.stats() if report_cache else None}
+    except Exception as e:
+        return {'file': filename, 'error': str(e)}
+
+def run_batch_flow(args):
+    """
+    Batch mode: no prompts. Every input file is processed with the filters
+    from the command line, concurrently when --jobs > 1, and reported either
+    per file or as one merged report. A file that fails does not stop the
+    others, but makes the run exit non-zero.
+
+    A merged report without the API step writes nothing per file, so it
+    goes through load_dataset: files are grouped into a few tasks per job
+    and only merged aggregates and counts come back from the workers.
+    """
+    input_spec = args.input or 'data/sales_data.txt'
+    output_dir = args.output_dir or 'output'
+    jobs = max(args.jobs or 1, 1)
+
+    try:
+        print("\n[1/10] Resolving input files...")
+        files = resolve_inputs(input_spec)
+        if not files:
+            print(f"! Error: no sales files match {input_spec}")
+            return 1
+        print(f"✓ {len(files)} file(s) from {input_spec}")
+        os.makedirs(output_dir, exist_ok=True)
+
+        api_products = None
+        if not args.no_api:
+            # Fetched (or read from the local cache) once, shared by every file
+            print("\n[6/10] Fetching external product metadata (DummyJSON)...")
+            api_products = load_product_catalog()
+            if not api_products:
+                print("   ! Warning: API fetch failed. Proceeding with local data only.")
+                api_products = []
+
+        report_cache = merged_key = None
+        if args.merge and args.report_cache:
+            report_path = os.path.join(output_dir, 'sales_report.txt')
+            report_cache = ReportCache(cache_dir=args.report_cache)
+            merged_key = report_cache_key(
+                [file_version(filename) for filename in files],
+                {'region': args.region, 'min_amount': args.min_amount, 'max_amount': args.max_amount},
+                catalog_version(api_products) if api_products is not None else None,
+                approximate=args.approximate)
+            # Every section cached for these file versions: no file is read
+            if args.no_api and write_cached_report(report_path, report_cache, merged_key):
+                print("\n[9/10] Generating merged report...")
+                print(f"✓ {len(files)} file(s) unchanged since their cached report")
+                print(f"✓ Report saved to: {report_path}")
+                print(report_cache_summary(report_cache.stats()))
+                print("\n" + "=" * 50)
+                print(f"PROCESS COMPLETED AT {datetime.now().strftime('%H:%M:%S')}")
+                print("=" * 50)
+                return 0
+
+        tasks = [{'file': filename, 'region': args.region, 'min_amount': args.min_amount,
+                  'max_amount': args.max_amount, 'output_dir': output_dir,
+                  'api_products': api_products, 'merge': args.merge,
+                  'approximate': args.approximate, 'report_cache': args.report_cache}
+                 for filename in files]
+
+        print(f"\n[2-9/10] Processing {len(files)} file(s) with {min(jobs, len(files))} job(s)...")
+        start = time.perf_counter()
+        aggregates = None
+        if args.merge and args.no_api:
+            aggregates, results = load_dataset(files, args.region, args.min_amount, args.max_amount,
+                                               workers=jobs, approximate=args.approximate)
+        elif jobs > 1 and len(files) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+                # Several files per round trip once there are many more files than jobs
+                results = list(pool.map(process_sales_file, tasks,
+                                         chunksize=max(1, len(tasks) // (jobs * TASKS_PER_WORKER))))
+        else:
+            results = [process_sales_file(task) for task in tasks]
+
+        failed = [r for r in results if 'error' in r]
+        done = [r for r in results if 'error' not in r]
+        for r in results:
+            if 'error' in r:
+                print(f"   ! {r['file']}: {r['error']}")
+            elif r.get('cached'):
+                print(f"   ✓ {r['file']}: unchanged, report served from the cache")
+            else:
+                print(f"   ✓ {r['file']}: Total records parsed {r['parsed']} | "
+                      f"Invalid/Filtered removed {r['invalid']} | Valid {r['valid']}")
+        print(f"✓ {len(done)} succeeded, {len(failed)} failed in {time.perf_counter() - start:.2f}s")
+
+        if args.merge and done:
+            print("\n[9/10] Generating merged report...")
+            enrichment = None if args.no_api else {'enriched': 0, 'missing_ids': set()}
+            if aggregates is None:
+                aggregates = new_aggregates(args.approximate)
+                for r in done:
+                    merge_aggregates(aggregates, r['aggregates'])
+                    if enrichment is not None:
+                        enrichment['enriched'] += r['enrichment']['enriched']
+                        enrichment['missing_ids'] |= r['enrichment']['missing_ids']
+            report_path = os.path.join(output_dir, 'sales_report.txt')
+            # A report missing failed files is not cached under the key of every file
+            generate_sales_report(None, enrichment, report_path, aggregates=aggregates,
+                                  cache=None if failed else report_cache, cache_key=merged_key)
+            print(f"✓ Report saved to: {report_path}")
+            if report_cache:
+                print(report_cache_summary(report_cache.stats()))
+        elif args.report_cache and done:
+            print(report_cache_summary(merge_cache_stats(r['report_cache'] for r in done)))
+
+        print("\n" + "=" * 50)
+        print(f"PROCESS {'FAILED' if failed else 'COMPLETED'} AT {datetime.now().strftime('%H:%M:%S')}")
+        print("=" * 50)
+        return 1 if failed else 0
+
+    except Exception as e:
+        print("\n" + "!" * 50)
+        print(f"FATAL ERROR: {str(e)}")
+        print("!" * 50)
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CatalogServer:
+    """
+    Local stand-in for the DummyJSON /products endpoint.
+
+    Serves `count` products with skip/limit paging, caps limit at max_limit
+    like the real API, answers If-None-Match with a 304 and records every
+    request's (path, params, headers). reported_limit, if set, is sent as
+    each page's 'limit' instead of the number of products on it.
+    """
+
+    def __init__(self, count=250, max_limit=100, etag='"v1"', reported_limit=None):
+        self.products = [{'id': i, 'title': f"Product {i}", 'category': 'misc',
+                          'brand': 'Acme', 'rating': 4.5} for i in range(1, count + 1)]
+        self.max_limit = max_limit
+        self.reported_limit = reported_limit
+        self.etag = etag
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                params = dict(urllib.parse.parse_qsl(url.query))
+                server.requests.append((url.path, params, dict(self.headers)))
+                if server.etag and self.headers.get('If-None-Match') == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                limit = min(int(params.get('limit', 30)), server.max_limit)
+                skip = int(params.get('skip', 0))
+                page = server.products[skip:skip + limit]
+                body = json.dumps({'products': page, 'total': len(server.products),
+                                   'skip': skip,
+                                   'limit': server.reported_limit or len(page)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                if server.etag:
+                    self.send_header('ETag', server.etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/products"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def catalog_server():
+    server = CatalogServer()
+    yield server
+    server.close()
@@ -0,0 +1,83 @@
+import json
+import time
+
+from utils.api_handler import load_product_catalog, fetch_catalog_pages
+
+
+def test_fresh_cache_is_served_without_network(tmp_path, catalog_server):
+    cache_file = str(tmp_path / 'catalog.json')
+    products = load_product_catalog(cache_file, base_url=catalog_server.url)
+    assert len(products) == len(catalog_server.products)
+    fetched = len(catalog_server.requests)
+
+    assert load_product_catalog(cache_file, base_url=catalog_server.url) == products
+    assert len(catalog_server.requests) == fetched
+
+
+def test_expired_cache_revalidates_with_etag(tmp_path, catalog_server):
+    cache_file = str(tmp_path / 'catalog.json')
+    products = load_product_catalog(cache_file, base_url=catalog_server.url)
+    with open(cache_file, encoding='utf-8') as f:
+        fetched_at = json.load(f)['fetched_at']
+    catalog_server.requests.clear()
+
+    assert load_product_catalog(cache_file, ttl=0, base_url=catalog_server.url) == products
+    # One conditional request answered with a 304, no pages re-downloaded
+    assert len(catalog_server.requests) == 1
+    assert catalog_server.requests[0][2].get('If-None-Match') == catalog_server.etag
+    with open(cache_file, encoding='utf-8') as f:
+        assert json.load(f)['fetched_at'] > fetched_at
+
+
+def test_offline_uses_any_cache_and_never_fetches(tmp_path, catalog_server):
+    cache_file = str(tmp_path / 'catalog.json')
+    assert load_product_catalog(cache_file, offline=True, base_url=catalog_server.url) == []
+
+    stale = {'fetched_at': time.time() - 10 * 24 * 3600, 'products': [{'id': 1, 'title': 'Old'}]}
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(stale, f)
+    assert load_product_catalog(cache_file, offline=True,
+                                base_url=catalog_server.url) == stale['products']
+    assert catalog_server.requests == []
+
+
+def test_failed_refresh_falls_back_to_stale_cache(tmp_path, catalog_server):
+    cache_file = str(tmp_path / 'catalog.json')
+    stale = {'fetched_at': 0, 'products': [{'id': 1, 'title': 'Old'}]}
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(stale, f)
+    catalog_server.close()
+
+    assert load_product_catalog(cache_file, base_url=catalog_server.url) == stale['products']
+
+
+def test_stale_while_revalidate_returns_cache_then_refreshes(tmp_path, catalog_server):
+    cache_file = str(tmp_path / 'catalog.json')
+    stale = {'fetched_at': 0, 'products': [{'id': 1, 'title': 'Old'}]}
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(stale, f)
+
+    products = load_product_catalog(cache_file, stale_while_revalidate=True,
+                                    base_url=catalog_server.url)
+    assert products == stale['products']
+    for _ in range(100):
+        with open(cache_file, encoding='utf-8') as f:
+            if len(json.load(f)['products']) == len(catalog_server.products):
+                break
+        time.sleep(0.05)
+    else:
+        raise AssertionError("catalog cache was not refreshed in the background")
+
+
+def test_catalog_pages_follow_the_server_page_cap(catalog_server):
+    catalog_server.max_limit = 30
+    _, products = fetch_catalog_pages(catalog_server.url, page_size=100)
+    assert [p['id'] for p in products] == [p['id'] for p in catalog_server.products]
+
+
+def test_catalog_pages_fall_back_to_sequential_paging(catalog_server):
+    # Pages hold 40 products but claim a limit of 100: parallel paging leaves gaps
+    catalog_server.max_limit = 40
+    catalog_server.reported_limit = 100
+    _, products = fetch_catalog_pages(catalog_server.url, page_size=100)
+    assert [p['id'] for p in products] == [p['id'] for p in catalog_server.products]
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from utils.columnar_cache import load_sales_table, read_columnar_cache
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'data', 'sales_data.txt')
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / 'sales.txt')
+    shutil.copy(SAMPLE, path)
+    return path
+
+
+def test_second_load_is_a_hit(source):
+    table, total, hit = load_sales_table(source)
+    assert not hit
+    cached, cached_total, hit = load_sales_table(source)
+    assert hit and cached_total == total
+    assert cached.to_records() == table.to_records()
+
+
+def test_touched_source_is_a_miss(source):
+    load_sales_table(source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert read_columnar_cache(source + '.colcache', source) is None
+
+
+@pytest.mark.parametrize('keep', [0.5, 0.9])
+def test_truncated_cache_is_rebuilt(source, keep):
+    table, _, _ = load_sales_table(source)
+    with open(source + '.colcache', 'rb') as f:
+        data = f.read()
+    with open(source + '.colcache', 'wb') as f:
+        f.write(data[:int(len(data) * keep)])
+
+    rebuilt, _, hit = load_sales_table(source)
+    assert not hit
+    assert rebuilt.to_records() == table.to_records()
+    assert load_sales_table(source)[2]
@@ -0,0 +1,6 @@
+from benchmarks.check_import_time import check
+
+
+def test_main_imports_within_budget():
+    _, total_ms, problems = check('main')
+    assert not problems, f"import main took {total_ms:.1f} ms: {'; '.join(problems)}"
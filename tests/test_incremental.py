@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+
+from utils import incremental
+from utils.data_processor import aggregates_to_json
+from utils.file_handler import segment_hash, segment_hashes
+from utils.incremental import run_incremental, LOG_SUFFIX
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def rows(start, count):
+    return "".join(f"T{i:05d}|2024-12-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|{i % 5 + 1}|"
+                   f"{100 + i}|C{i % 40:03d}|{('North', 'South', 'East')[i % 3]}\n"
+                   for i in range(start, start + count))
+
+
+@pytest.fixture
+def sales(tmp_path):
+    path = tmp_path / 'sales.txt'
+    path.write_text(HEADER + rows(0, 500), encoding='utf-8')
+    return str(path), str(tmp_path / 'checkpoint.json')
+
+
+def full_run(filename, tmp_path):
+    aggregates, _ = run_incremental(filename, str(tmp_path / 'fresh.json'))
+    return aggregates_to_json(aggregates)
+
+
+def test_appends_only_write_the_delta_log(sales, tmp_path):
+    filename, checkpoint = sales
+    _, stats = run_incremental(filename, checkpoint)
+    assert stats['full_rescan']
+    saved = os.path.getmtime(checkpoint), os.path.getsize(checkpoint)
+
+    for start in (500, 510, 530):
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(rows(start, 10 if start < 530 else 1))
+        aggregates, stats = run_incremental(filename, checkpoint)
+        assert not stats['full_rescan']
+
+    assert (os.path.getmtime(checkpoint), os.path.getsize(checkpoint)) == saved
+    with open(checkpoint + LOG_SUFFIX, encoding='utf-8') as f:
+        assert len(f.readlines()) == 3
+    assert aggregates_to_json(aggregates) == full_run(filename, tmp_path)
+    assert stats['total_parsed'] == 521
+
+    # A rerun with nothing new replays the log to the same figures
+    aggregates, stats = run_incremental(filename, checkpoint)
+    assert stats['new_parsed'] == 0
+    assert aggregates_to_json(aggregates) == full_run(filename, tmp_path)
+
+
+def test_log_is_compacted(sales, tmp_path, monkeypatch):
+    filename, checkpoint = sales
+    monkeypatch.setattr(incremental, 'MAX_LOG_ENTRIES', 2)
+    run_incremental(filename, checkpoint)
+    for start in range(500, 530, 10):
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(rows(start, 10))
+        aggregates, _ = run_incremental(filename, checkpoint)
+
+    assert not os.path.exists(checkpoint + LOG_SUFFIX)
+    assert aggregates_to_json(aggregates) == full_run(filename, tmp_path)
+
+
+def test_torn_and_stale_log_lines_are_ignored(sales, tmp_path):
+    filename, checkpoint = sales
+    run_incremental(filename, checkpoint)
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(rows(500, 10))
+    run_incremental(filename, checkpoint)
+    with open(checkpoint + LOG_SUFFIX, 'a', encoding='utf-8') as f:
+        f.write('{"generation": "torn')
+
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(rows(510, 10))
+    aggregates, stats = run_incremental(filename, checkpoint)
+    assert not stats['full_rescan'] and stats['new_parsed'] == 10
+    assert aggregates_to_json(aggregates) == full_run(filename, tmp_path)
+
+    # Lines written before the checkpoint was rewritten never apply to it
+    with open(checkpoint + LOG_SUFFIX, 'rb') as f:
+        old_log = f.read()
+    assert run_incremental(filename, checkpoint, verify=False)[1]['new_parsed'] == 0
+    os.utime(filename)
+    with open(filename, 'r+b') as f:
+        f.write(b'transactionid')
+    assert run_incremental(filename, checkpoint)[1]['full_rescan']
+    with open(checkpoint + LOG_SUFFIX, 'wb') as f:
+        f.write(old_log)
+    aggregates, stats = run_incremental(filename, checkpoint)
+    assert stats['new_parsed'] == 0 and stats['total_parsed'] == 520
+    assert aggregates_to_json(aggregates) == full_run(filename, tmp_path)
+
+
+def test_in_place_edits_force_a_rescan(sales):
+    filename, checkpoint = sales
+    run_incremental(filename, checkpoint)
+    with open(filename, 'r+b') as f:
+        content = f.read()
+        f.seek(content.index(b'North'))
+        f.write(b'South')
+    _, stats = run_incremental(filename, checkpoint)
+    assert stats['full_rescan']
+
+
+def test_verify_rehashes_the_whole_prefix(sales, monkeypatch):
+    filename, checkpoint = sales
+    # Small segments, so the edit below falls outside the first and last one
+    monkeypatch.setattr(incremental, 'SEGMENT_SIZE', 1024)
+    monkeypatch.setattr(incremental, 'segment_hashes',
+                        lambda name, end, known=None: segment_hashes(name, end, known, 1024))
+    monkeypatch.setattr(incremental, 'segment_hash',
+                        lambda name, index, end: segment_hash(name, index, end, 1024))
+    run_incremental(filename, checkpoint)
+    with open(filename, 'r+b') as f:
+        f.seek(os.path.getsize(filename) // 2)
+        f.write(b'Z')
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(rows(500, 1))
+
+    assert not run_incremental(filename, checkpoint)[1]['full_rescan']
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(rows(501, 1))
+    assert run_incremental(filename, checkpoint, verify=True)[1]['full_rescan']
+
@@ -0,0 +1,35 @@
+import pytest
+
+from main import parse_args, selected_mode
+
+
+@pytest.mark.parametrize('argv, mode', [
+    ([], 'interactive'),
+    (['--columnar-cache', '--report-cache'], 'interactive'),
+    (['--input', 'data', '--no-api', '--merge', '--approximate'], 'batch'),
+    (['--async-pipeline', '--region', 'North', '--approximate'], 'async_pipeline'),
+    (['--incremental', '--input', 'f.txt', '--verify', '--report-cache'], 'incremental'),
+    (['--serve', '--no-api', '--port', '0'], 'serve'),
+    (['--rollup-cube', '--input', 'f.txt', '--region', 'North', '--trend-grain', 'week'], 'rollup_cube'),
+])
+def test_supported_combinations(argv, mode):
+    assert selected_mode(parse_args(argv)) == mode
+
+
+@pytest.mark.parametrize('argv', [
+    ['--input', 'f.txt', '--no-api', '--columnar-cache'],
+    ['--merge', '--rollup-cube'],
+    ['--rollup-cube', '--min-amount', '100'],
+    ['--rollup-cube', '--approximate'],
+    ['--trend-grain', 'month'],
+    ['--async-pipeline', '--report-cache'],
+    ['--async-pipeline', '--incremental'],
+    ['--incremental', '--region', 'North'],
+    ['--serve', '--approximate'],
+    ['--verify'],
+    ['--port', '9000'],
+])
+def test_ignored_options_are_rejected(argv, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+    assert 'cannot be combined with' in capsys.readouterr().err
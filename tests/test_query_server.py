@@ -0,0 +1,72 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from utils.query_server import make_server
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def rows(start, count):
+    return "".join(f"T{i:05d}|2024-12-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|{i % 5 + 1}|"
+                   f"{100 + i}|C{i % 40:03d}|{('North', 'South', 'East')[i % 3]}\n"
+                   for i in range(start, start + count))
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = tmp_path / 'sales.txt'
+    path.write_text(HEADER + rows(0, 100), encoding='utf-8')
+    server = make_server(str(path), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def get(query):
+        with urllib.request.urlopen(base + query, timeout=5) as response:
+            return json.load(response)
+
+    yield str(path), server.dataset, get
+    server.shutdown()
+    server.server_close()
+
+
+def test_queries_are_answered_while_a_refresh_reads(served, monkeypatch):
+    path, dataset, get = served
+    started, release = threading.Event(), threading.Event()
+    read = dataset._read
+
+    def slow_read(*args):
+        started.set()
+        assert release.wait(5)
+        return read(*args)
+
+    monkeypatch.setattr(dataset, '_read', slow_read)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(rows(100, 10))
+    refresher = threading.Thread(target=dataset.refresh, kwargs={'force': True})
+    refresher.start()
+    assert started.wait(5)
+
+    # The last good data is served while the appended rows are being read
+    status = get('/status')
+    assert (status['valid'], status['appends']) == (100, 0)
+    assert sum(r['transaction_count'] for r in get('/regions').values()) == 100
+
+    release.set()
+    refresher.join(5)
+    status = get('/status')
+    assert (status['valid'], status['appends']) == (110, 1)
+    assert sum(r['transaction_count'] for r in get('/regions?region=North').values()) == 37
+
+
+def test_rewritten_file_is_reloaded(served):
+    path, dataset, get = served
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + rows(500, 20))
+    assert dataset.refresh(force=True) == 'reloaded'
+    status = get('/status')
+    assert (status['valid'], status['reloads']) == (20, 2)
+    assert dataset.catalog_info('Item 3') is None
+    assert dataset.product_ids['Item 3'] == 'P103'
@@ -0,0 +1,71 @@
+import pytest
+
+import main
+from utils.data_processor import generate_sales_report, write_cached_report, aggregate_transactions
+from utils.report_cache import ReportCache, report_cache_key
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def rows(start, count):
+    return "".join(f"T{i:05d}|2024-12-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|{i % 5 + 1}|"
+                   f"{100 + i}|C{i % 40:03d}|{('North', 'South', 'East')[i % 3]}\n"
+                   for i in range(start, start + count))
+
+
+def records(count):
+    return [{'TransactionID': f"T{i}", 'Date': f"2024-12-{i % 28 + 1:02d}", 'ProductID': f"P{i % 7}",
+             'ProductName': f"Item {i % 7}", 'Quantity': i % 5 + 1, 'UnitPrice': 100.0 + i,
+             'CustomerID': f"C{i % 40}", 'Region': 'North'} for i in range(count)]
+
+
+def body(path):
+    with open(path, encoding='utf-8') as f:
+        return [line for line in f.read().splitlines() if 'Generated:' not in line]
+
+
+def test_cached_report_is_all_or_nothing(tmp_path):
+    cache = ReportCache(cache_dir=str(tmp_path / 'cache'))
+    key = report_cache_key('v1', {'region': None})
+    output = str(tmp_path / 'out' / 'report.txt')
+    assert not write_cached_report(output, cache, key)
+    assert not (tmp_path / 'out').exists()
+
+    generate_sales_report(None, None, output, aggregates=aggregate_transactions(records(50)),
+                          cache=cache, cache_key=key)
+    expected = body(output)
+    fresh = ReportCache(cache_dir=str(tmp_path / 'cache'))
+    assert write_cached_report(output, fresh, key)
+    assert body(output) == expected
+    assert fresh.stats()['disk_hits'] == 7 and fresh.stats()['misses'] == 0
+    # The enrichment section was cached for a run without the API step only
+    assert not write_cached_report(output, fresh, key, enriched=True)
+    assert not write_cached_report(output, fresh, dict(key, dataset='v2'))
+
+
+@pytest.mark.parametrize('options', [[], ['--merge', '--jobs', '2']])
+def test_batch_run_with_every_section_cached_reads_no_file(tmp_path, monkeypatch, options):
+    data = tmp_path / 'data'
+    data.mkdir()
+    for n in range(3):
+        (data / f"s{n}.txt").write_text(HEADER + rows(n * 100, 100), encoding='utf-8')
+    argv = ['--input', str(data), '--no-api', '--report-cache', str(tmp_path / 'cache'),
+            '--output-dir', str(tmp_path / 'out'), *options]
+    assert main.main(argv) == 0
+    reports = sorted((tmp_path / 'out').iterdir())
+    expected = [body(path) for path in reports]
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("file read although every section is cached")
+
+    monkeypatch.setattr(main, 'parse_transactions', fail_parse)
+    monkeypatch.setattr('utils.dataset_loader.parse_transactions', fail_parse)
+    assert main.main(argv) == 0
+    assert [body(path) for path in reports] == expected
+
+    # A changed file is read again
+    with open(data / 's1.txt', 'a', encoding='utf-8') as f:
+        f.write(rows(1000, 5))
+    monkeypatch.undo()
+    assert main.main(argv) == 0
+    assert [body(path) for path in reports] != expected
@@ -0,0 +1,104 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import main
+from utils.data_processor import aggregate_transactions, parse_transactions, _grain_trend
+from utils.file_handler import iter_sales_data
+from utils.query_server import make_server
+from utils.rollup_cube import build_cube, load_cube
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def rows(start, count):
+    return "".join(f"T{i:05d}|2024-{i // 3 % 3 + 10}-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|"
+                   f"{i % 5 + 1}|{100 + i}|C{i % 40:03d}|{('North', 'South', 'East')[i % 3]}\n"
+                   for i in range(start, start + count))
+
+
+@pytest.fixture
+def sales(tmp_path, monkeypatch):
+    # The cube is saved under data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'sales.txt'
+    path.write_text(HEADER + rows(0, 300), encoding='utf-8')
+    return str(path)
+
+
+def run(filename, *options):
+    assert main.main(['--rollup-cube', '--input', filename, '--output-dir', 'out', *options]) == 0
+    with open('out/trend_report.txt', encoding='utf-8') as f:
+        return f.read()
+
+
+def fail_parse(*args, **kwargs):
+    raise AssertionError("rows parsed although the cube is current")
+
+
+def test_current_cube_answers_without_parsing(sales, monkeypatch):
+    exact = run(sales, '--trend-grain', 'week', '--region', 'North')
+    assert '~' not in exact and 'WEEKLY SALES TREND' in exact
+
+    monkeypatch.setattr(main, 'parse_transactions', fail_parse)
+    from_cube = run(sales, '--trend-grain', 'week', '--region', 'North')
+    assert 'Best Selling Week:' in from_cube
+    # Same buckets, revenue and counts; only Unique Cust become estimates
+    strip = lambda report: [line.replace('~', '') for line in report.splitlines()[3:]
+                            if not line.startswith('(~')]
+    assert strip(from_cube) == strip(exact)
+
+
+def test_changed_file_takes_the_exact_path(sales, monkeypatch):
+    run(sales)
+    with open(sales, 'a', encoding='utf-8') as f:
+        f.write(rows(300, 5))
+    parsed = []
+    monkeypatch.setattr(main, 'parse_transactions',
+                        lambda lines: parsed.append(1) or parse_transactions(lines))
+    assert '~' not in run(sales, '--trend-grain', 'month')
+    assert parsed
+
+
+def test_grain_trend_matches_the_cube(sales):
+    valid = [t for t in parse_transactions(iter_sales_data(sales)) if t['Quantity'] > 0]
+    aggregates, cube = aggregate_transactions(valid), build_cube(valid)
+    for grain in ('day', 'week', 'month'):
+        exact, estimated = _grain_trend(aggregates, grain), cube.trend(grain)
+        assert list(exact) == list(estimated)
+        for bucket, stats in exact.items():
+            assert stats['transaction_count'] == estimated[bucket]['transaction_count']
+            assert stats['revenue'] == pytest.approx(estimated[bucket]['revenue'])
+    months = _grain_trend(aggregates, 'month')
+    assert sum(s['transaction_count'] for s in months.values()) == len(valid)
+    assert all(s['unique_customers'] <= 40 for s in months.values())
+
+
+def test_loaded_cube_reads_product_cells_on_demand(sales, tmp_path):
+    cube = build_cube(parse_transactions(iter_sales_data(sales)))
+    cube.save(str(tmp_path / 'cube.json'))
+    loaded = load_cube(str(tmp_path / 'cube.json'))
+    assert loaded.trend('week', region='East') == cube.trend('week', region='East')
+    assert loaded._pending_cells is not None
+    assert loaded.trend('day', product='Item 3') == cube.trend('day', product='Item 3')
+    assert loaded.merge(cube).total()[1] == 2 * cube.total()[1]
+
+
+def test_server_trend_grain(sales):
+    server = make_server(sales, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/daily-trend?grain=month&region=North") as response:
+            assert sorted(json.load(response)) == ['2024-10', '2024-11', '2024-12']
+        with urllib.request.urlopen(f"{base}/peak-day?grain=week") as response:
+            assert '-W' in json.load(response)['date']
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/daily-trend?grain=year")
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
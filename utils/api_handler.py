@@ -4,18 +4,18 @@
 # In[1]:
 
 
-import requests
-
 BASE_URL = "https://dummyjson.com/products"
 
-def get_product_details(product_id):
+def get_product_details(product_id, base_url=BASE_URL):
     """
     Fetches a single product by ID from DummyJSON.
     Returns the JSON response or None if the request fails.
     """
+    import requests
+
     try:
         # Requirement: Get a SINGLE product by ID
-        response = requests.get(f"{BASE_URL}/{product_id}")
+        response = get_session().get(f"{base_url}/{product_id}", timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -25,24 +25,10 @@ def get_product_details(product_id):
         print(f"API Error: {e}")
         return None
 
-def search_products(query):
-    """
-    Search for products by name or category.
-    """
-    try:
-        # Requirement: Search products
-        response = requests.get(f"{BASE_URL}/search?q={query}")
-        return response.json() if response.status_code == 200 else None
-    except Exception as e:
-        print(f"Search Error: {e}")
-        return None
-
 
 # In[2]:
 
 
-import requests
-
 def get_product_metadata(product_id):
     """
     Fetches details for a specific product by ID.
@@ -50,9 +36,11 @@ def get_product_metadata(product_id):
     """
     url = f'https://dummyjson.com/products/{product_id}'
     
+    import requests
+
     try:
         # Requirement: Get a SINGLE product by ID
-        response = requests.get(url)
+        response = get_session().get(url, timeout=10)
         
         if response.status_code == 200:
             # Requirement: Returns single product object
@@ -77,18 +65,16 @@ def get_product_metadata(product_id):
 # In[3]:
 
 
-import requests
-
-BASE_URL = "https://dummyjson.com/products"
-
 def get_limited_products(count=100):
     """
     Fetches a specific number of products from DummyJSON.
     Example: count=100 returns the first 100 product objects.
     """
+    import requests
+
     try:
         # Requirement: Get specific number of products using 'limit'
-        response = requests.get(f"{BASE_URL}?limit={count}")
+        response = get_session().get(BASE_URL, params={'limit': count}, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -106,20 +92,19 @@ def get_limited_products(count=100):
 # In[4]:
 
 
-import requests
-
-def search_products(query):
+def search_products(query, base_url=BASE_URL):
     """
     Searches for products in the DummyJSON database matching the query string.
     
     Returns: A list of product dictionaries.
     """
-    base_url = "https://dummyjson.com/products/search"
     params = {'q': query} # Requirement: Use 'q' parameter for searching
     
+    import requests
+
     try:
         # Requirement: GET request to the search endpoint
-        response = requests.get(base_url, params=params)
+        response = get_session().get(f"{base_url}/search", params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -137,37 +122,37 @@ def search_products(query):
 # In[6]:
 
 
-import requests
+from utils.instrumentation import instrumented
 
-def fetch_all_products():
+@instrumented()
+def fetch_all_products(base_url=BASE_URL):
     """
-    Fetches all products from DummyJSON API using a limit of 100.
+    Fetches all products from DummyJSON API in pages of 100.
+
+    The first page reports the catalog 'total'; the remaining pages are
+    fetched concurrently, so catalogs larger than one page are not truncated.
     
     Returns: list of product dictionaries
     """
-    url = "https://dummyjson.com/products?limit=100"
-    
+    import requests
+
     try:
         # Requirement: Fetch all available products (use limit=100)
-        response = requests.get(url, timeout=10)
+        response, products = fetch_catalog_pages(base_url)
         
         # Check if the request was successful
         if response.status_code == 200:
             # Requirement: Print status message (success)
             print("Successfully fetched products from API.")
-            
-            # Extract data from the JSON response
-            data = response.json()
-            
-            # The API returns an object with a 'products' key containing the list
-            return data.get('products', [])
+            return products
         else:
             # Requirement: Print status message (failure)
             print(f"Failed to fetch products. Status Code: {response.status_code}")
             return []
             
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         # Requirement: Handle connection errors with try-except
+        # (ValueError: a page that is not valid JSON)
         print(f"Error: Connection to API failed. {e}")
         # Requirement: Return empty list if API fails
         return []
@@ -205,135 +190,408 @@ def create_product_mapping(api_products):
 # In[9]:
 
 
+import gzip
+import io
 import os
-
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+from itertools import islice
+
+# Requirement: Define all original + new fields for the header
+ENRICHED_HEADERS = [
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region',
+    'API_Category', 'API_Brand', 'API_Rating', 'API_Match'
+]
+WRITE_BATCH_SIZE = 10000
+WRITE_BUFFER_SIZE = 1024 * 1024
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+@instrumented()
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt',
+                       compression=None, batch_size=WRITE_BATCH_SIZE, atomic=True):
     """
     Saves enriched transactions back to file with all original and API fields.
+
+    enriched_transactions may be any iterable (e.g. iter_enriched_sales_data),
+    so records can be streamed to disk without holding them all in memory.
+    Rows are formatted batch_size at a time and written in one call per
+    batch through a large buffer.
+
+    compression: None, 'gzip' or 'zstd' (needs the zstandard package);
+    by default inferred from a .gz / .zst file name
+    atomic: write to a temporary file and rename it over filename only once
+    complete, so readers never see a partial file
+
+    Returns: number of records written, or None on error
     """
+    if compression is None:
+        compression = COMPRESSION_SUFFIXES.get(os.path.splitext(filename)[1])
+
     # Requirement: Create output directory if it doesn't exist
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
-    # Requirement: Define all original + new fields for the header
-    headers = [
-        'TransactionID', 'Date', 'ProductID', 'ProductName', 
-        'Quantity', 'UnitPrice', 'CustomerID', 'Region',
-        'API_Category', 'API_Brand', 'API_Rating', 'API_Match'
-    ]
-    
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    target = f"{filename}.tmp{os.getpid()}" if atomic else filename
+
+    count = 0
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
+        with _open_enriched_output(target, compression) as f:
             # Requirement: Write header with pipe delimiter
-            f.write("|".join(headers) + "\n")
-            
-            for t in enriched_transactions:
-                row_values = []
-                for field in headers:
-                    # Requirement: Handle None values appropriately
-                    # Convert None to an empty string or "N/A" as per your preference
-                    value = t.get(field)
-                    if value is None:
-                        row_values.append("")
-                    else:
-                        row_values.append(str(value))
-                
-                # Requirement: Use pipe delimiter for data rows
-                f.write("|".join(row_values) + "\n")
-                
-        print(f"Successfully saved {len(enriched_transactions)} records to {filename}")
-        
-    except IOError as e:
+            f.write("|".join(ENRICHED_HEADERS) + "\n")
+
+            records = iter(enriched_transactions)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                f.write(_format_enriched_rows(batch))
+                count += len(batch)
+
+        if atomic:
+            os.replace(target, filename)
+        print(f"Successfully saved {count} records to {filename}")
+        return count
+
+    except (IOError, ImportError) as e:
         print(f"Error writing to file {filename}: {e}")
+        return None
+    finally:
+        # Never leave a partial temporary file behind
+        if atomic and os.path.exists(target):
+            os.remove(target)
+
+def _format_enriched_rows(batch):
+    """Formats a batch of records as pipe-delimited lines in a single string."""
+    lines = []
+    for t in batch:
+        row_values = []
+        for field in ENRICHED_HEADERS:
+            # Requirement: Handle None values appropriately (written as empty)
+            value = t.get(field)
+            if value is None:
+                row_values.append("")
+            else:
+                row_values.append(str(value))
+        # Requirement: Use pipe delimiter for data rows
+        lines.append("|".join(row_values))
+    lines.append("")
+    return "\n".join(lines)
+
+def _open_enriched_output(filename, compression):
+    """Opens filename for buffered text writing, optionally compressed."""
+    if compression is None:
+        return open(filename, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+    if compression == 'gzip':
+        raw = gzip.open(filename, 'wb', compresslevel=6)
+    elif compression == 'zstd':
+        # Optional dependency, only needed for .zst output
+        import zstandard
+        raw = zstandard.ZstdCompressor().stream_writer(open(filename, 'wb'), closefd=True)
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    return io.TextIOWrapper(io.BufferedWriter(raw, WRITE_BUFFER_SIZE), encoding='utf-8')
 
 
 # In[10]:
 
 
-import os
-from datetime import datetime
+import json
+import threading
+import time
+
+CATALOG_CACHE_FILE = 'data/product_catalog.json'
+CATALOG_TTL = 24 * 60 * 60  # seconds
+
+@instrumented()
+def load_product_catalog(cache_file=CATALOG_CACHE_FILE, ttl=CATALOG_TTL,
+                         stale_while_revalidate=False, offline=False, base_url=BASE_URL):
+    """
+    Returns the product catalog from a local JSON cache, hitting the API
+    only when the cache is older than ttl seconds.
+
+    - stale_while_revalidate: return an expired cache immediately and
+      refresh it in a background thread
+    - offline: never touch the network; use whatever cache exists
+    - if a refresh fails, the stale cache is used as a fallback
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+    Returns: list of product dictionaries (same shape as fetch_all_products)
     """
-    Generates a comprehensive formatted text report as per the final project requirements.
+    cache = _read_catalog_cache(cache_file)
+
+    if cache is not None:
+        age = time.time() - cache.get('fetched_at', 0)
+        if offline or age < ttl:
+            return cache['products']
+        if stale_while_revalidate:
+            threading.Thread(
+                target=refresh_product_catalog, args=(cache_file, base_url, cache), daemon=True
+            ).start()
+            return cache['products']
+    elif offline:
+        print(f"Offline mode: no product catalog cache at {cache_file}")
+        return []
+
+    return refresh_product_catalog(cache_file, base_url, cache)
+
+def refresh_product_catalog(cache_file=CATALOG_CACHE_FILE, base_url=BASE_URL, cache=None):
     """
-    # Create output directory if it doesn't exist
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    # Pre-calculate data for the report
-    total_rev = sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
-    total_txns = len(transactions)
-    avg_order = total_rev / total_txns if total_txns > 0 else 0
-    dates = [t['Date'] for t in transactions]
-    
-    # 1. & 2. HEADER AND OVERALL SUMMARY
-    report_lines = [
-        "=" * 60,
-        "           SALES ANALYTICS REPORT",
-        f"        Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"        Records Processed: {total_txns}",
-        "=" * 60,
-        "\nOVERALL SUMMARY",
-        "-" * 60,
-        f"Total Revenue:       ₹{total_rev:,.2f}",
-        f"Total Transactions:  {total_txns}",
-        f"Average Order Value: ₹{avg_order:,.2f}",
-        f"Date Range:          {min(dates)} to {max(dates)}",
-    ]
-
-    # 3. REGION-WISE PERFORMANCE
-    # Note: Requires region_wise_sales function from previous modules
-    region_stats = region_wise_sales(transactions) # Assuming function from Task 2.1b
-    report_lines.extend(["\nREGION-WISE PERFORMANCE", "-" * 60])
-    report_lines.append(f"{'Region':<12} {'Sales':<15} {'% Total':<12} {'Transactions'}")
-    for reg, data in region_stats.items():
-        report_lines.append(f"{reg:<12} ₹{data['total_sales']:<14,.0f} {data['percentage']:<12}% {data['transaction_count']}")
-
-    # 4. TOP 5 PRODUCTS
-    top_products = top_selling_products(transactions, n=5) # Assuming Task 2.1c
-    report_lines.extend(["\nTOP 5 PRODUCTS", "-" * 60])
-    report_lines.append(f"{'Rank':<6} {'Product Name':<20} {'Qty':<10} {'Revenue'}")
-    for i, (name, qty, rev) in enumerate(top_products, 1):
-        report_lines.append(f"{i:<6} {name:<20} {qty:<10} ₹{rev:,.2f}")
-
-    # 5. TOP 5 CUSTOMERS
-    customer_stats = customer_analysis(transactions) # Assuming Task 2.1d
-    report_lines.extend(["\nTOP 5 CUSTOMERS", "-" * 60])
-    report_lines.append(f"{'Rank':<6} {'Customer ID':<15} {'Spent':<15} {'Orders'}")
-    top_customers = list(customer_stats.items())[:5]
-    for i, (cid, data) in enumerate(top_customers, 1):
-        report_lines.append(f"{i:<6} {cid:<15} ₹{data['total_spent']:<14,.2f} {data['purchase_count']}")
-
-    # 6. DAILY SALES TREND
-    trends = daily_sales_trend(transactions) # Assuming Task 2.2a
-    report_lines.extend(["\nDAILY SALES TREND", "-" * 60])
-    report_lines.append(f"{'Date':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust'}")
-    for date, data in trends.items():
-        report_lines.append(f"{date:<15} ₹{data['revenue']:<14,.2f} {data['transaction_count']:<10} {data['unique_customers']}")
-
-    # 7. PRODUCT PERFORMANCE ANALYSIS
-    peak_date, peak_rev, peak_txns = find_peak_sales_day(transactions) # Assuming Task 2.2b
-    low_performers = low_performing_products(transactions) # Assuming Task 2.3a
-    report_lines.extend(["\nPRODUCT PERFORMANCE ANALYSIS", "-" * 60])
-    report_lines.append(f"Best Selling Day: {peak_date} (₹{peak_rev:,.2f} with {peak_txns} txns)")
-    report_lines.append(f"Low Performing Products: {len(low_performers)} items found below threshold")
-
-    # 8. API ENRICHMENT SUMMARY
-    enriched_count = sum(1 for et in enriched_transactions if et.get('API_Match'))
-    success_rate = (enriched_count / total_txns * 100) if total_txns > 0 else 0
-    missing_ids = sorted(list(set(et['ProductID'] for et in enriched_transactions if not et.get('API_Match'))))
-    
-    report_lines.extend(["\nAPI ENRICHMENT SUMMARY", "-" * 60])
-    report_lines.append(f"Total Products Enriched: {enriched_count}")
-    report_lines.append(f"Success Rate:            {success_rate:.2f}%")
-    report_lines.append(f"Not Enriched:            {', '.join(missing_ids) if missing_ids else 'None'}")
+    Re-fetches the catalog and rewrites the cache.
+
+    Sends If-None-Match / If-Modified-Since from the previous response, so an
+    unchanged catalog costs a 304 instead of a full download.
+    """
+    headers = {}
+    if cache:
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+
+    import requests
+
+    try:
+        response, products = fetch_catalog_pages(base_url, headers=headers)
+
+        if response.status_code == 304 and cache:
+            # Unchanged upstream: only the cache timestamp moves forward
+            cache['fetched_at'] = time.time()
+            _write_catalog_cache(cache_file, cache)
+            return cache['products']
+
+        if response.status_code == 200:
+            print("Successfully fetched products from API.")
+            cache = {
+                'fetched_at': time.time(),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'products': products,
+            }
+            _write_catalog_cache(cache_file, cache)
+            return cache['products']
+
+        print(f"Failed to fetch products. Status Code: {response.status_code}")
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error: Connection to API failed. {e}")
+
+    if cache:
+        print(f"Using cached product catalog from {cache_file}")
+        return cache['products']
+    return []
 
-    # Write to file
+def _read_catalog_cache(cache_file):
+    """Loads the cache file, or returns None if it is missing or unreadable."""
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("\n".join(report_lines))
-        print(f"Comprehensive report generated successfully at: {output_file}")
-    except IOError as e:
-        print(f"Error writing report to {output_file}: {e}")
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache.get('products'), list) else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _write_catalog_cache(cache_file, cache):
+    """Writes the cache atomically so readers never see a half-written file."""
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{cache_file}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Error writing catalog cache {cache_file}: {e}")
+
+
+# In[11]:
+
+
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 100
+MAX_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+_product_cache = {}
+
+def get_session(pool_size=MAX_WORKERS, retries=3, backoff_factor=0.5):
+    """
+    Returns the shared keep-alive requests.Session.
+
+    Connections are pooled (pool_size per host) and GETs are retried with
+    exponential backoff on 429 and 5xx responses, honouring Retry-After.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Imported on the first network call: runs that only read the
+            # catalog cache, or never enrich, do not pay for loading requests
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def fetch_catalog_pages(base_url=BASE_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, headers=None):
+    """
+    Fetches the whole catalog with skip/limit pagination.
+
+    The first page is requested with the given (conditional) headers and
+    tells us 'total' and the page size the server actually allows (APIs cap
+    'limit'); the remaining pages are fetched in parallel on the shared
+    session. If they do not add up to 'total', the pages are walked one
+    after another instead.
+
+    Returns: (first page response, list of products or None if the first
+    page was not a 200)
+    Raises: requests.exceptions.RequestException if a later page fails
+    """
+    session = get_session()
+    first = session.get(base_url, params={'limit': page_size, 'skip': 0}, headers=headers, timeout=10)
+    if first.status_code != 200:
+        return first, None
+
+    data = first.json()
+    first_page = list(data.get('products', []))
+    total = data.get('total', len(first_page))
+    # Step by the page size the server granted, not the one requested
+    step = data.get('limit') or len(first_page)
+
+    def fetch_page(skip):
+        response = session.get(base_url, params={'limit': step, 'skip': skip}, timeout=10)
+        response.raise_for_status()
+        return response.json().get('products', [])
+
+    products = list(first_page)
+    skips = range(len(products), total, step) if products else []
+    if skips:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map() keeps page order
+            for page in executor.map(fetch_page, skips):
+                products.extend(page)
+
+    if len(products) != total:
+        # Pages shorter than announced: continue from wherever the last one ended
+        products = first_page
+        while len(products) < total:
+            page = fetch_page(len(products))
+            if not page:
+                break
+            products.extend(page)
+
+    return first, products
+
+def get_products(ids, max_workers=MAX_WORKERS, base_url=BASE_URL):
+    """
+    Fetches several products by ID, requesting only the IDs not already
+    cached in this process, concurrently over the shared session.
+
+    Returns: dictionary mapping each ID to its product (None if not found
+    or the request failed)
+
+    Found products and 404s are cached; timeouts, connection errors and
+    other failures are not, so the next call asks again.
+    """
+    ids = list(dict.fromkeys(ids))
+    missing = [product_id for product_id in ids if product_id not in _product_cache]
+
+    import requests
+
+    def fetch_one(product_id):
+        """(product or None, whether the answer may be cached)"""
+        try:
+            response = get_session().get(f"{base_url}/{product_id}", timeout=10)
+            if response.status_code == 200:
+                return response.json(), True
+            if response.status_code != 404:
+                print(f"API Error for product {product_id}: status {response.status_code}")
+            return None, response.status_code == 404
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"API Error for product {product_id}: {e}")
+            return None, False
+
+    found = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for product_id, (product, cacheable) in zip(missing, executor.map(fetch_one, missing)):
+                found[product_id] = product
+                if cacheable:
+                    _product_cache[product_id] = product
+
+    return {product_id: found.get(product_id, _product_cache.get(product_id)) for product_id in ids}
+
+
+# In[12]:
+
+
+def api_product_id(product_id):
+    """
+    Converts a sales ProductID such as 'P101' to the numeric DummyJSON id.
+
+    Returns: int id, or None if the ID carries no number
+    """
+    digits = product_id[1:] if product_id[:1] in ('P', 'p') else product_id
+    return int(digits) if digits.isdigit() else None
+
+def enrich_transaction(transaction, product_info):
+    """
+    Returns a copy of one transaction with the API fields added.
+    product_info is an entry of create_product_mapping() or None.
+    """
+    record = dict(transaction)
+    if product_info:
+        record['API_Category'] = product_info.get('category')
+        record['API_Brand'] = product_info.get('brand')
+        record['API_Rating'] = product_info.get('rating')
+        record['API_Match'] = True
+    else:
+        record['API_Category'] = None
+        record['API_Brand'] = None
+        record['API_Rating'] = None
+        record['API_Match'] = False
+    return record
+
+@instrumented()
+def enrich_sales_data(transactions, product_map):
+    """
+    Enriches transactions with API product info.
+
+    Parameters: transactions from validate_and_filter(), product_map from
+    create_product_mapping() or a ProductIndex from build_product_index()
+
+    Returns: list of enriched transaction dictionaries
+    """
+    return list(iter_enriched_sales_data(transactions, product_map))
+
+def iter_enriched_sales_data(transactions, product_map):
+    """
+    Generator form of enrich_sales_data: yields one enriched record at a
+    time, e.g. to stream straight into save_enriched_data.
+    """
+    from utils.product_index import ProductIndex
+
+    if isinstance(product_map, ProductIndex):
+        # ID, exact-name and fuzzy-name tiers, memoized per (ID, name)
+        match = product_map.match
+        for t in transactions:
+            yield enrich_transaction(t, match(t['ProductID'], t['ProductName']))
+        return
+
+    # Requirement: Match ProductID 'P101' to the numeric API id 101
+    for t in transactions:
+        yield enrich_transaction(t, product_map.get(api_product_id(t['ProductID'])))
 
 
 # In[ ]:
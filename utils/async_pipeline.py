@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import asyncio
+from itertools import islice
+
+from utils.api_handler import (
+    BASE_URL, load_product_catalog, create_product_mapping, get_product_details,
+    search_products, api_product_id, enrich_transaction
+)
+from utils.data_processor import (
+    parse_transactions, aggregate_transactions, iter_valid_transactions, new_aggregates
+)
+from utils.product_index import build_product_index
+
+CHUNK_SIZE = 5000
+CONCURRENCY = 8
+
+async def run_async_pipeline(raw_lines, region=None, min_amount=None, max_amount=None,
+                             concurrency=CONCURRENCY, chunk_size=CHUNK_SIZE,
+                             catalog_loader=load_product_catalog, base_url=BASE_URL,
+                             search_fallback=False, approximate=None):
+    """
+    Parses, validates and enriches sales lines with API lookups overlapped.
+
+    The catalog fetch starts first as a background task and is turned into
+    a ProductIndex. Lines are parsed and validated chunk by chunk while it
+    runs. Each new (ProductID, ProductName) gets its own lookup task: it
+    waits for the index and matches the row exactly as the synchronous flow
+    does (ID, exact name, fuzzy name). Only rows the index cannot match
+    fall back to get_product_details (and optionally search_products) under
+    a semaphore of `concurrency`. Records are enriched as soon as their
+    product's lookup finishes, so network latency is hidden behind parsing.
+    approximate is passed to new_aggregates (see approximate_settings).
+
+    Returns: (valid_records, invalid_count, aggregates, enriched_records)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    catalog_task = asyncio.create_task(_load_catalog(catalog_loader))
+    lookups = {}
+    pending = []
+    enriched = []
+    valid_records = []
+    aggregates = new_aggregates(approximate)
+    total_parsed = 0
+    symbols = {}
+
+    lines = iter(raw_lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+
+        # CPU work for this chunk: parse, validate, aggregate
+        parsed = parse_transactions(chunk, symbols=symbols)
+        total_parsed += len(parsed)
+        start = len(valid_records)
+        aggregates = aggregate_transactions(
+            iter_valid_transactions(parsed, region, min_amount, max_amount, valid_records), aggregates
+        )
+
+        for t in valid_records[start:]:
+            key = (t['ProductID'], t['ProductName'])
+            task = lookups.get(key)
+            if task is None:
+                task = asyncio.create_task(
+                    _lookup_product(*key, catalog_task, semaphore, base_url, search_fallback)
+                )
+                lookups[key] = task
+            pending.append((t, task))
+
+        # Let finished lookups run their callbacks, then emit ready records
+        await asyncio.sleep(0)
+        pending = _emit_ready(pending, enriched)
+
+    # Drain: whatever is still waiting on the network
+    for t, task in pending:
+        enriched.append(enrich_transaction(t, await task))
+
+    product_index = await catalog_task
+    product_index.save()
+    return valid_records, total_parsed - len(valid_records), aggregates, enriched
+
+def run_pipeline(raw_lines, **kwargs):
+    """Synchronous entry point for run_async_pipeline."""
+    return asyncio.run(run_async_pipeline(raw_lines, **kwargs))
+
+def _emit_ready(pending, enriched):
+    """
+    Enriches the leading records whose lookups are done. Input order is
+    preserved, so a record never overtakes an earlier one.
+    """
+    for i, (t, task) in enumerate(pending):
+        if not task.done():
+            return pending[i:]
+        enriched.append(enrich_transaction(t, task.result()))
+    return []
+
+async def _load_catalog(catalog_loader):
+    products = await asyncio.to_thread(catalog_loader)
+    return await asyncio.to_thread(build_product_index, products or [])
+
+async def _lookup_product(product_id, product_name, catalog_task, semaphore, base_url,
+                          search_fallback):
+    """
+    Resolves one sales product: through the ProductIndex first, then the
+    per-product endpoints.
+    """
+    product_index = await catalog_task
+    info = product_index.match(product_id, product_name)
+    if info is not None:
+        return info
+
+    numeric_id = api_product_id(product_id)
+    async with semaphore:
+        product = None
+        if numeric_id is not None:
+            product = await asyncio.to_thread(get_product_details, numeric_id, base_url)
+        if product is None and search_fallback and product_name:
+            results = await asyncio.to_thread(search_products, product_name, base_url)
+            product = results[0] if results else None
+
+    if product is None:
+        return None
+    return create_product_mapping([product]).get(product.get('id'))
+
+
+# In[ ]:
+
+
+
+
@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import os
+
+from utils.file_handler import detect_encoding, data_offset, decode_line
+from utils.transaction_table import (
+    np, FIELDS, CATEGORICAL_FIELDS, TransactionTable, parse_transactions_table
+)
+
+BLOCK_SIZE = 2 * 1024 * 1024
+# A field longer than this sends its block to the line-by-line parser
+MAX_FIELD_BYTES = 64
+NEWLINE, PIPE = ord('\n'), ord('|')
+# Bytes removed by str.strip() that can appear at the edge of an ASCII field
+STRIP_BYTES = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+# Up to this many distinct keys per block are factorized with a lookup table
+SMALL_CARDINALITY = 256
+
+if np is not None:
+    # MASKS[n] keeps the low n bytes of a little-endian 64-bit word
+    MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64)
+    MIX = np.uint64(0x9E3779B97F4A7C15)
+    # Candidate odd multipliers for the small lookup tables in _factorize
+    MULTIPLIERS = [np.uint64((0x9E3779B97F4A7C15 * (2 * i + 1)) % 2 ** 64) for i in range(16)]
+
+def parse_sales_file(filename, block_size=BLOCK_SIZE):
+    """
+    Bulk-parses a whole sales file into a TransactionTable.
+
+    Same result as parse_transactions_table(iter_sales_data(filename)),
+    row for row, but the file is tokenized in blocks of bytes with NumPy
+    instead of one split/strip/int/float per line. See parse_byte_range.
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return TransactionTable.empty()
+    return parse_byte_range(filename, data_offset(filename), os.path.getsize(filename),
+                            detect_encoding(filename), block_size)
+
+def parse_byte_range(filename, start, end, encoding, block_size=BLOCK_SIZE):
+    """
+    Bulk-parses the lines in bytes [start, end) of filename.
+
+    Every block of whole lines is tokenized on '|' and newline in NumPy.
+    Lines without exactly 8 fields are dropped, and each field is reduced to
+    a 64-bit key so it can be factorized without creating a Python object
+    per value. The parsing rules (decode, strip, comma removal, int/float)
+    then run once per distinct raw value, so rows are kept or rejected
+    exactly as in parse_transactions.
+
+    A block that does not decode cleanly, contains NUL bytes or has a field
+    longer than MAX_FIELD_BYTES is handed to parse_transactions_table.
+
+    Returns: TransactionTable
+    """
+    tables = []
+    run = _BlockRun(encoding)
+    for block in _iter_blocks(filename, start, end, block_size):
+        tokens = _tokenize(block, encoding)
+        if tokens is None:
+            # Slow path for this block only; rows stay in file order
+            tables.append(run.finish())
+            run = _BlockRun(encoding)
+            tables.append(parse_transactions_table(_block_lines(block, encoding)))
+        else:
+            run.add(block, *tokens)
+    tables.append(run.finish())
+
+    tables = [t for t in tables if len(t)]
+    if len(tables) == 1:
+        return tables[0]
+    return TransactionTable.concat(tables) if tables else TransactionTable.empty()
+
+def _iter_blocks(filename, start, end, block_size):
+    """Yields blocks of whole, newline-terminated lines from bytes [start, end)."""
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0:
+            chunk = file.read(min(block_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            block = tail + chunk
+            cut = block.rfind(b'\n') + 1
+            if remaining > 0 and cut:
+                block, tail = block[:cut], block[cut:]
+            elif remaining > 0:
+                tail = block
+                continue
+            else:
+                tail = b''
+                if not block.endswith(b'\n'):
+                    block += b'\n'
+            yield block
+        if tail:
+            yield tail + b'\n'
+
+def _block_lines(block, encoding):
+    """The lines of a block exactly as iter_sales_data would yield them."""
+    for raw_line in block.split(b'\n'):
+        line = decode_line(raw_line, encoding).strip()
+        if line:
+            yield line
+
+def _tokenize(block, encoding):
+    """
+    Finds the field boundaries of every well-formed line in a block.
+
+    Returns: (starts, lengths), each an (8, n_rows) array of byte offsets
+    and field lengths, or None when the block needs the line-by-line parser
+    """
+    if not block.isascii():
+        try:
+            block.decode(encoding)
+        except UnicodeDecodeError:
+            return None
+    if b'\0' in block:
+        return None  # NUL bytes would be lost in fixed-width byte strings
+
+    data = np.frombuffer(block, dtype=np.uint8)
+    delimiters = np.flatnonzero((data == NEWLINE) | (data == PIPE))
+    line_ends = np.flatnonzero(data[delimiters] == NEWLINE)
+
+    # Requirement: Skip rows with incorrect number of fields
+    pipe_counts = np.diff(line_ends, prepend=-1) - 1
+    line_ends = line_ends[pipe_counts == len(FIELDS) - 1]
+    if not len(line_ends):
+        empty = np.zeros((len(FIELDS), 0), dtype=np.intp)
+        return empty, empty
+
+    # The 8 fields of a good line lie between its last 9 delimiters; -1
+    # stands in for the delimiter before the first line of the block
+    bounds = np.concatenate(([-1], delimiters))
+    if len(line_ends) * len(FIELDS) == len(delimiters):
+        # Every line is well formed: simply 8 delimiters per row
+        ends = delimiters.reshape(-1, len(FIELDS)).T
+        starts = bounds[:-1].reshape(-1, len(FIELDS)).T + 1
+    else:
+        windows = np.lib.stride_tricks.sliding_window_view(bounds, len(FIELDS) + 1)
+        rows = windows[line_ends + 1 - len(FIELDS)].T
+        ends = rows[1:]
+        starts = rows[:-1] + 1
+    starts = np.ascontiguousarray(starts)
+    lengths = ends - starts
+    if lengths.size and lengths.max() > MAX_FIELD_BYTES:
+        return None
+    return starts, lengths
+
+class _BlockRun:
+    """
+    Accumulates consecutive fast-path blocks and merges their per-block
+    factorizations into one TransactionTable.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.keys = {f: [] for f in CATEGORICAL_FIELDS}
+        self.raw = {f: [] for f in CATEGORICAL_FIELDS}
+        self.raw_lengths = {f: [] for f in CATEGORICAL_FIELDS}
+        self.codes = {f: [] for f in CATEGORICAL_FIELDS}
+        self.quantity = []
+        self.unit_price = []
+        # Converted numeric values per raw string, shared by all blocks
+        self.numbers = {'Quantity': {}, 'UnitPrice': {}}
+
+    def add(self, block, starts, lengths):
+        # Short fields near the end are still read for as many words as the
+        # longest field in their column, so pad by a full field plus a word
+        buffer = block + bytes(MAX_FIELD_BYTES + 8)
+        # Every byte offset viewed as the start of an unaligned 64-bit word
+        words = np.ndarray((len(block) + MAX_FIELD_BYTES + 1,), dtype='<u8', buffer=buffer,
+                           strides=(1,))
+
+        fields = {}
+        for i, field in enumerate(FIELDS):
+            fields[field] = _factorize_field(words, starts[i], lengths[i])
+
+        # Requirement: Handle commas within ProductName and numeric fields
+        _, qty_codes, qty_raw, _ = fields['Quantity']
+        _, price_codes, price_raw, _ = fields['UnitPrice']
+        quantity, qty_ok = self._convert('Quantity', qty_raw, _to_int)
+        unit_price, price_ok = self._convert('UnitPrice', price_raw, float)
+        keep = qty_ok[qty_codes] & price_ok[price_codes]
+
+        self.quantity.append(quantity[qty_codes][keep])
+        self.unit_price.append(unit_price[price_codes][keep])
+        for field in CATEGORICAL_FIELDS:
+            keys, inverse, raw, raw_lengths = fields[field]
+            self.keys[field].append(keys)
+            self.raw[field].append(raw)
+            self.raw_lengths[field].append(raw_lengths)
+            self.codes[field].append(inverse[keep])
+
+    def _convert(self, field, raw, convert):
+        """Parses each distinct raw value once. Returns (values, valid mask)."""
+        cache = self.numbers[field]
+        values = np.zeros(len(raw), dtype=np.int64 if convert is _to_int else np.float64)
+        valid = np.zeros(len(raw), dtype=bool)
+        for i, value in enumerate(raw.tolist()):
+            if value not in cache:
+                try:
+                    cache[value] = convert(value.decode(self.encoding).strip().replace(',', ''))
+                except (ValueError, OverflowError):
+                    cache[value] = None
+            if cache[value] is not None:
+                values[i] = cache[value]
+                valid[i] = True
+        return values, valid
+
+    def finish(self):
+        """Merges the blocks added so far into one TransactionTable."""
+        if not sum(len(q) for q in self.quantity):
+            return TransactionTable.empty()
+        codes, categories = {}, {}
+        for field in CATEGORICAL_FIELDS:
+            codes[field], categories[field] = self._merge_field(field)
+        return TransactionTable(codes, categories, np.concatenate(self.quantity),
+                                np.concatenate(self.unit_price))
+
+    def _merge_field(self, field):
+        keys = np.concatenate(self.keys[field])
+        raw = np.concatenate(self.raw[field])
+        raw_lengths = np.concatenate(self.raw_lengths[field])
+
+        # Equal raw values hash to equal keys in every block; the byte
+        # comparison below catches the (astronomically rare) collision
+        merged, position, first = _factorize(keys)
+        if len(merged) < len(keys) and not (raw == raw[first][position]).all():
+            raw_unique, first, position = np.unique(raw, return_index=True, return_inverse=True)
+        else:
+            raw_unique = raw[first]
+        unique_lengths = raw_lengths[first]
+
+        parts, offset = [], 0
+        for block_keys, block_codes in zip(self.keys[field], self.codes[field]):
+            parts.append(position[offset:offset + len(block_keys)][block_codes])
+            offset += len(block_keys)
+        codes = np.concatenate(parts).astype(np.int32)
+
+        # Drop values that only occurred on rejected rows
+        used = np.zeros(len(raw_unique), dtype=bool)
+        used[codes] = True
+        if not used.all():
+            codes = (np.cumsum(used) - 1).astype(np.int32)[codes]
+            raw_unique, unique_lengths = raw_unique[used], unique_lengths[used]
+
+        values, remap = _clean_values(raw_unique, unique_lengths, self.encoding,
+                                      field == 'ProductName')
+        if remap is not None:
+            codes = remap[codes]
+        return codes, values
+
+def _to_int(text):
+    value = int(text)
+    if not -2 ** 63 <= value < 2 ** 63:
+        raise OverflowError(text)
+    return value
+
+def _factorize_field(words, starts, lengths):
+    """
+    Factorizes one column of raw fields given by byte offsets.
+
+    Each field is read as little-endian 64-bit words with the bytes past
+    its end masked off. Fields of up to 8 bytes are their own (exact) key;
+    longer fields are hashed word by word and checked word for word against
+    the chosen representative afterwards.
+
+    Returns: (keys of the distinct values, row codes, raw distinct values
+    as a byte string array, their lengths)
+    """
+    n_words = max(1, -(-int(lengths.max(initial=0)) // 8))
+    columns = []
+    for w in range(n_words):
+        column = words[starts + 8 * w]
+        remaining = lengths - 8 * w
+        if remaining.min(initial=8) < 8:
+            column &= MASKS[np.clip(remaining, 0, 8)]
+        columns.append(column)
+
+    if n_words == 1:
+        keys, inverse, first = _factorize(columns[0])
+    else:
+        key = lengths.astype(np.uint64)
+        for column in columns:
+            key = (key ^ column) * MIX
+            key ^= key >> np.uint64(29)
+        keys, inverse, first = _factorize(key)
+        # Only rows sharing a key can be a collision
+        rows = first[inverse] if len(keys) < len(key) else None
+        if rows is not None and not all((column == column[rows]).all() for column in columns):
+            # Hash collision: exact factorization of the raw bytes
+            raw, first, inverse = np.unique(_as_bytes(columns), return_index=True,
+                                            return_inverse=True)
+            return (np.arange(len(raw), dtype=np.uint64), inverse.astype(np.int32), raw,
+                    lengths[first])
+
+    # The masked little-endian words hold the field bytes in order
+    return keys, inverse, _as_bytes([column[first] for column in columns]), lengths[first]
+
+def _as_bytes(columns):
+    """Stacks word columns into a fixed-width byte string array."""
+    matrix = np.ascontiguousarray(np.column_stack(columns).astype('<u8', copy=False))
+    return matrix.view(f'S{8 * len(columns)}').ravel()
+
+def _factorize(keys):
+    """
+    Returns: (distinct keys, code of every entry, index of one entry per key)
+    """
+    if not len(keys):
+        return keys, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.intp)
+    # A sample with many distinct keys means the lookup table cannot apply:
+    # go straight to the argsort
+    many = len(np.unique(keys[::64])) > SMALL_CARDINALITY
+    order = np.argsort(keys) if many else None
+    distinct = keys[order] if many else np.sort(keys)
+    flag = np.empty(len(distinct), dtype=bool)
+    flag[0] = True
+    np.not_equal(distinct[1:], distinct[:-1], out=flag[1:])
+    distinct = distinct[flag]
+
+    if len(distinct) <= SMALL_CARDINALITY:
+        # Few distinct keys: a collision-free multiplicative hash into a
+        # lookup table of about 2 * k**2 slots beats sorting every row
+        bits = 64 - (2 * len(distinct).bit_length() + 1)
+        shift = np.uint64(bits)
+        for multiplier in MULTIPLIERS:
+            slots = (distinct * multiplier) >> shift
+            if len(np.unique(slots)) == len(distinct):
+                table = np.zeros(1 << (64 - bits), dtype=np.int32)
+                table[slots] = np.arange(len(distinct), dtype=np.int32)
+                inverse = table[(keys * multiplier) >> shift]
+                first = np.zeros(len(distinct), dtype=np.intp)
+                first[inverse] = np.arange(len(keys))
+                return distinct, inverse, first
+
+    if order is None:
+        order = np.argsort(keys)
+    ids = np.cumsum(flag) - 1
+    inverse = np.empty(len(keys), dtype=np.int32)
+    inverse[order] = ids
+    return distinct, inverse, order[flag]
+
+def _clean_values(raw, lengths, encoding, drop_commas):
+    """
+    Applies the parse_transactions rules (decode, strip, and for
+    ProductName comma removal) to each distinct raw value.
+
+    Returns: (values, remap) where remap re-codes raw values that became
+    equal after cleaning, or is None when no two did
+    """
+    width = max(1, int(lengths.max(initial=0)))
+    matrix = raw.view(np.uint8).reshape(len(raw), -1)[:, :width]
+    filled = lengths > 0
+    edges = np.concatenate((matrix[filled, 0], matrix[filled, lengths[filled] - 1]))
+    plain = (matrix < 0x80).all() and not np.isin(edges, list(STRIP_BYTES)).any()
+    if plain and drop_commas:
+        plain = not (matrix == ord(',')).any()
+    if plain:
+        # Pure ASCII with nothing to strip: the raw bytes are the UTF-8 values
+        return np.ascontiguousarray(matrix).view(f'S{width}').ravel(), None
+
+    cleaned = {}
+    remap = []
+    for value in raw.tolist():
+        text = value.decode(encoding).strip()
+        if drop_commas:
+            text = text.replace(',', '')
+        remap.append(cleaned.setdefault(text, len(cleaned)))
+    if len(cleaned) == len(raw):
+        return list(cleaned), None
+    return list(cleaned), np.array(remap, dtype=np.int32)
+
+
+# In[ ]:
+
+
+
+
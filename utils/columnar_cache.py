@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import json
+import mmap
+import os
+import struct
+
+from utils.transaction_table import np, TransactionTable, CATEGORICAL_FIELDS, validate_table
+from utils.bulk_parser import parse_sales_file
+
+CACHE_SUFFIX = '.colcache'
+CACHE_MAGIC = b'SALESCOL2\n'
+ALIGNMENT = 64
+
+def cache_path(filename):
+    """The columnar cache lives next to its source: sales_data.txt.colcache"""
+    return filename + CACHE_SUFFIX
+
+def load_sales_table(filename, cache_file=None, rebuild=False):
+    """
+    Returns the cleaned, validated transactions of `filename` as a
+    TransactionTable, served from a memory-mapped columnar cache file.
+
+    The cache is keyed by the source's size and mtime: any change to either
+    is a miss, since a content sample could not vouch for the rest. On a hit
+    no text is decoded or parsed: every column is a zero-copy view of the
+    mapped file. On a miss (or an unreadable cache) the source is parsed,
+    validated and the cache is (re)written.
+
+    Returns: (TransactionTable, total records parsed, cache hit True/False)
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return TransactionTable.empty(), 0, False
+
+    cache_file = cache_file or cache_path(filename)
+    if not rebuild:
+        cached = read_columnar_cache(cache_file, filename)
+        if cached is not None:
+            table, total_parsed = cached
+            return table, total_parsed, True
+
+    parsed = parse_sales_file(filename)
+    table, _ = validate_table(parsed)
+    write_columnar_cache(cache_file, filename, table, len(parsed))
+    return table, len(parsed), False
+
+def _source_key(filename):
+    stat = os.stat(filename)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+def write_columnar_cache(cache_file, filename, table, total_parsed):
+    """
+    Writes table as: magic, header length, JSON header, then each column as
+    a raw 64-byte aligned array block. Written to a temp file and renamed.
+    """
+    arrays = [('Quantity', 'values', table.quantity), ('UnitPrice', 'values', table.unit_price),
+              ('TransactionID', 'numbers', table.transaction_numbers)]
+    for field in CATEGORICAL_FIELDS:
+        arrays.append((field, 'codes', table.codes[field]))
+        categories = table.categories[field]
+        if categories.dtype.itemsize == 0:
+            categories = categories.astype('S1')
+        arrays.append((field, 'categories', categories))
+
+    columns = []
+    offset = 0
+    for name, kind, array in arrays:
+        offset = _align(offset)
+        columns.append({'name': name, 'kind': kind, 'dtype': array.dtype.str,
+                        'length': len(array), 'offset': offset})
+        offset += array.nbytes
+
+    header = dict(_source_key(filename), total_parsed=total_parsed, rows=len(table),
+                  columns=columns)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(CACHE_MAGIC) + 8 + len(header_bytes))
+
+    tmp_file = f"{cache_file}.tmp{os.getpid()}"
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for column, (_, _, array) in zip(columns, arrays):
+                f.write(b'\0' * (data_start + column['offset'] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Error writing columnar cache {cache_file}: {e}")
+
+def read_columnar_cache(cache_file, filename):
+    """
+    Memory-maps the cache if it matches the current source file.
+
+    Returns: (TransactionTable, total_parsed) or None when missing, stale,
+    truncated or corrupt
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            (header_len,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_len))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    key = _source_key(filename)
+    table = None
+    if isinstance(header, dict) and (key['source_size'], key['source_mtime_ns']) == \
+            (header.get('source_size'), header.get('source_mtime_ns')):
+        table = _mapped_table(mapped, header, _align(len(CACHE_MAGIC) + 8 + header_len))
+    if table is None:
+        # Nothing refers to the mapping any more
+        mapped.close()
+        return None
+    return table, header['total_parsed']
+
+def _mapped_table(mapped, header, data_start):
+    """The TransactionTable viewing the mapped columns, or None if they do not fit."""
+    try:
+        views = {}
+        for column in header['columns']:
+            dtype = np.dtype(column['dtype'])
+            views[(column['name'], column['kind'])] = np.frombuffer(
+                mapped, dtype=dtype, count=column['length'], offset=data_start + column['offset']
+            )
+        if any(len(views[(f, 'codes')]) != header['rows'] for f in CATEGORICAL_FIELDS):
+            return None
+        return TransactionTable(
+            {f: views[(f, 'codes')] for f in CATEGORICAL_FIELDS},
+            {f: views[(f, 'categories')] for f in CATEGORICAL_FIELDS},
+            views[('Quantity', 'values')],
+            views[('UnitPrice', 'values')],
+            views[('TransactionID', 'numbers')],
+        )
+    except (ValueError, TypeError, KeyError):
+        return None
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# In[ ]:
+
+
+
+
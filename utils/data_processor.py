@@ -1,494 +1,1074 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-# In[1]:
+# In[6]:
+
 
+import sys
 
-def parse_transactions(raw_lines):
+from utils.instrumentation import instrumented
+from utils.sales_index import SalesIndex
+
+def _is_table(transactions):
     """
-    Parses raw lines into a list of dictionaries.
-    Handles comma removal and type conversion.
+    isinstance(transactions, TransactionTable) without importing numpy: the
+    columnar module is loaded on first use, and no table exists before that.
     """
+    module = sys.modules.get('utils.transaction_table')
+    return module is not None and isinstance(transactions, module.TransactionTable)
+
+@instrumented()
+def parse_transactions(raw_lines, as_table=False, symbols=None):
+    """
+    Parses raw lines into clean dictionaries as per Task 1.2.
+
+    With as_table=True the lines are parsed straight into a columnar
+    TransactionTable instead of a list of dictionaries.
+
+    symbols: dict used to share one str object per repeated categorical
+    value. A new one is used per call unless given; callers that parse a
+    file in chunks pass the same dict to every chunk.
+    """
+    if as_table:
+        from utils.transaction_table import parse_transactions_table
+        return parse_transactions_table(raw_lines)
+
     keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
             'Quantity', 'UnitPrice', 'CustomerID', 'Region']
     parsed_records = []
+    if symbols is None:
+        symbols = {}
+    symbol = symbols.setdefault
     
     for line in raw_lines:
-        # Requirement: Split by pipe delimiter '|'
+        # Requirement: Split by pipe delimiter '|' and strip whitespace
         values = [v.strip() for v in line.split('|')]
         
-        # Requirement: Skip rows with incorrect number of fields
         if len(values) == len(keys):
             try:
-                # Requirement: Handle commas within ProductName (remove commas)
-                product_name = values[3].replace(',', '')
-                
-                # Requirement: Remove commas from numeric fields before conversion
-                qty_str = values[4].replace(',', '')
-                price_str = values[5].replace(',', '')
+                # Requirement: Handle commas within ProductName and numeric fields
+                qty_clean = values[4].replace(',', '')
+                price_clean = values[5].replace(',', '')
                 
-                # Requirement: Convert to proper types
-                record = {
-                    'TransactionID': values[0],
-                    'Date': values[1],
-                    'ProductID': values[2],
-                    'ProductName': product_name,
-                    'Quantity': int(qty_str),   # int type
-                    'UnitPrice': float(price_str), # float type
-                    'CustomerID': values[6],
-                    'Region': values[7]
-                }
+                # Compact record; repeated categorical values share one str object
+                product_name = values[3].replace(',', '')
+                record = Transaction(
+                    values[0],
+                    symbol(values[1], values[1]),
+                    symbol(values[2], values[2]),
+                    symbol(product_name, product_name),
+                    int(qty_clean),
+                    float(price_clean),
+                    symbol(values[6], values[6]),
+                    symbol(values[7], values[7])
+                )
                 parsed_records.append(record)
             except ValueError:
-                continue # Skip rows that fail numeric conversion
+                continue
     return parsed_records
 
+@instrumented()
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
     """
-    Validates and applies filters.
-    Prints the required 80/10/70 validation summary.
+    Validates records against strict rules to reach the 80/10/70 count.
+
+    A TransactionTable is validated with vectorized masks and a filtered
+    TransactionTable is returned. A SalesIndex holds validated rows already,
+    so only the filters apply, answered from its indexes.
     """
     total_parsed = len(transactions)
-    valid_records = []
+    if _is_table(transactions):
+        from utils.transaction_table import validate_table
+        valid_records, _ = validate_table(transactions, region, min_amount, max_amount)
+    elif isinstance(transactions, SalesIndex):
+        valid_records = transactions.filter(region=region, min_amount=min_amount,
+                                            max_amount=max_amount)
+    else:
+        valid_records = _validate_records(transactions, region, min_amount, max_amount)
+
+    # Required Validation Output for the Manager
+    invalid_count = total_parsed - len(valid_records)
+    print(f"Total records parsed: {total_parsed}")
+    print(f"Invalid records removed: {invalid_count}")
+    print(f"Valid records after cleaning: {len(valid_records)}")
     
-    # Requirement: Filter Display - Print available info to user
-    regions = sorted(list(set(t['Region'] for t in transactions)))
-    print(f"Available regions: {regions}")
+    return valid_records
+
+def _validate_records(transactions, region=None, min_amount=None, max_amount=None):
+    """Row-by-row validation for a list of transaction dictionaries."""
+    valid_records = []
     
+    # Validation Rules from Task 1.3:
+    # - Quantity/UnitPrice > 0
+    # - TransactionID starts with 'T', ProductID with 'P', CustomerID with 'C'
     for t in transactions:
-        # Validation Rules:
-        # - Quantity and UnitPrice must be > 0
-        # - All required fields must be present
-        # - TransactionID must start with 'T'
-        # - ProductID must start with 'P'
-        # - CustomerID must start with 'C'
-        
         is_valid = (
-            t['Quantity'] > 0 and 
-            t['UnitPrice'] > 0 and
+            t['Quantity'] > 0 and t['UnitPrice'] > 0 and
             t['TransactionID'].startswith('T') and
             t['ProductID'].startswith('P') and
-            t['CustomerID'].startswith('C') and
-            all(t.values()) # Ensure no fields are empty
+            t['CustomerID'].startswith('C')
         )
         
         if not is_valid:
             continue
 
-        # Optional Filters
+        # Optional Filter Logic
+        total_price = t['Quantity'] * t['UnitPrice']
+        if region and t['Region'] != region: continue
+        if min_amount and total_price < min_amount: continue
+        if max_amount and total_price > max_amount: continue
+            
+        valid_records.append(t)
 
+    return valid_records
 
-# In[2]:
 
+# In[7]:
 
-def parse_transactions(raw_lines):
-    """
-    Parses raw lines into a list of dictionaries as per Task 1.2.
-    """
-    keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-            'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    parsed_records = []
-    
-    for line in raw_lines:
-        # Requirement: Split by pipe delimiter '|'
-        values = [v.strip() for v in line.split('|')]
-        
-        # Requirement: Skip rows with incorrect number of fields
-        if len(values) == len(keys):
-            try:
-                # Requirement: Handle commas within ProductName
-                product_name = values[3].replace(',', '')
-                
-                # Requirement: Remove commas from numeric fields for conversion
-                qty_val = values[4].replace(',', '')
-                price_val = values[5].replace(',', '')
-                
-                record = {
-                    'TransactionID': values[0],
-                    'Date': values[1],
-                    'ProductID': values[2],
-                    'ProductName': product_name,
-                    'Quantity': int(qty_val),      # Convert to int type
-                    'UnitPrice': float(price_val),  # Convert to float type
-                    'CustomerID': values[6],
-                    'Region': values[7]
-                }
-                parsed_records.append(record)
-            except ValueError:
-                # Skips records where numeric conversion fails
-                continue
-    return parsed_records
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def low_performing_products(transactions, threshold=10):
     """
-    Validates records and applies optional filters as per Task 1.3.
+    Identifies products with low sales based on a quantity threshold.
     """
-    total_input = len(transactions)
-    valid_transactions = []
-    
-    # Requirement: Display available info before filtering
-    available_regions = sorted(list(set(t['Region'] for t in transactions)))
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions]
-    print(f"Available Regions: {available_regions}")
-    print(f"Transaction Range: Min ${min(amounts):.2f}, Max ${max(amounts):.2f}")
+    if _is_table(transactions):
+        from utils.transaction_table import low_performing_products_table
+        return low_performing_products_table(transactions, threshold)
+
+    # Dictionary to store aggregates: {ProductName: [TotalQuantity, TotalRevenue]}
+    product_stats = {}
 
     for t in transactions:
-        # Requirement: Apply strict Validation Rules
-        is_valid = (
-            t['Quantity'] > 0 and                       # Quantity must be > 0
-            t['UnitPrice'] > 0 and                      # UnitPrice must be > 0
-            all(t.values()) and                         # All fields must be present
-            t['TransactionID'].startswith('T') and      # ID must start with 'T'
-            t['ProductID'].startswith('P') and          # Product must start with 'P'
-            t['CustomerID'].startswith('C')             # Customer must start with 'C'
-        )
+        name = t['ProductName']
+        qty = t['Quantity']
+        rev = t['Quantity'] * t['UnitPrice']
         
-        if not is_valid:
-            continue
+        # Requirement: Aggregate by ProductName
+        if name not in product_stats:
+            product_stats[name] = [0, 0.0]
+        
+        product_stats[name][0] += qty
+        product_stats[name][1] += rev
 
-        # Optional Filtering Logic
-        total_price = t['Quantity'] * t['UnitPrice']
-        if region and t['Region'] != region:
-            continue
-        if min_amount and total_price < min_amount:
-            continue
-        if max_amount and total_price > max_amount:
-            continue
-            
-        valid_transactions.append(t)
+    # Requirement: Find products with total quantity < threshold
+    low_performers = []
+    for name, stats in product_stats.items():
+        total_qty = stats[0]
+        total_rev = stats[1]
+        
+        if total_qty < threshold:
+            # Requirement: Include total quantity and revenue in tuple
+            low_performers.append((name, total_qty, total_rev))
 
-    # Requirement: Validation Output Required
-    invalid_count = total_input - len(valid_transactions)
-    print(f"\nTotal records parsed: {total_input}")
-    print(f"Invalid records removed: {invalid_count}")
-    print(f"Valid records after cleaning: {len(valid_transactions)}")
-    
-    return valid_transactions
+    # Requirement: Sort by TotalQuantity ascending
+    low_performers.sort(key=lambda x: x[1])
+
+    return low_performers
 
 
-# In[3]:
+# In[8]:
 
 
-def parse_transactions(raw_lines):
+import heapq
+from utils.rollup_cube import RollupCube, date_buckets
+from utils.sketches import HyperLogLog, CountMinSketch, SpaceSaving, hash64, hll_precision
+
+def filter_options(transactions):
     """
-    Parses raw pipe-delimited strings into a structured list of dictionaries.
-    Handles comma removal and data type conversion as required.
+    Collects the filter choices shown to the user in a single pass.
+
+    Returns: (sorted list of regions, min amount, max amount)
     """
-    keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-            'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    parsed_records = []
-    
-    for line in raw_lines:
-        # Split by pipe delimiter and strip hidden whitespace
-        values = [v.strip() for v in line.split('|')]
-        
-        # Requirement: Skip rows with incorrect number of fields
-        if len(values) == len(keys):
-            try:
-                # CLEAN: Remove commas within ProductName (e.g., Mouse,Wireless)
-                product_name = values[3].replace(',', '')
-                
-                # CLEAN: Remove commas from numeric fields before conversion
-                qty_str = values[4].replace(',', '')
-                price_str = values[5].replace(',', '')
-                
-                # REQUIREMENT: Convert to int and float types
-                record = {
-                    'TransactionID': values[0],
-                    'Date': values[1],
-                    'ProductID': values[2],
-                    'ProductName': product_name,
-                    'Quantity': int(qty_str),
-                    'UnitPrice': float(price_str),
-                    'CustomerID': values[6],
-                    'Region': values[7]
-                }
-                parsed_records.append(record)
-            except ValueError:
-                # Skip rows that fail numeric conversion
-                continue
-                
-    return parsed_records
+    if _is_table(transactions):
+        from utils.transaction_table import sorted_unique
+        if not len(transactions):
+            return [], 0.0, 0.0
+        revenue = transactions.revenue()
+        present = sorted_unique(transactions.codes['Region'])
+        regions = transactions.labels('Region', present).tolist()
+        return sorted(regions), float(revenue.min()), float(revenue.max())
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    regions = set()
+    min_amount = max_amount = None
+    for t in transactions:
+        regions.add(t['Region'])
+        amount = t['Quantity'] * t['UnitPrice']
+        if min_amount is None or amount < min_amount:
+            min_amount = amount
+        if max_amount is None or amount > max_amount:
+            max_amount = amount
+    return sorted(regions), min_amount or 0.0, max_amount or 0.0
+
+def approximate_settings(distinct_error=0.02, top_error=0.001, confidence=0.99):
     """
-    Validates records against strict business rules and applies optional filters.
+    Error bounds for approximate aggregates (see new_aggregates).
+
+    distinct_error: relative standard error of the unique-customer counts
+    top_error:      top-customer spend and order counts overcount by at most
+                    this fraction of total revenue / transactions (orders
+                    with probability `confidence`)
     """
-    total_parsed = len(transactions)
-    valid_transactions = []
-    
-    # Requirement: Filter Display - Print regions and range before filtering
-    regions = sorted(list(set(t['Region'] for t in transactions)))
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions]
-    print(f"Available regions: {regions}")
-    print(f"Transaction Range: Min ${min(amounts):.2f}, Max ${max(amounts):.2f}")
-    
-    for t in transactions:
-        # VALIDATION RULES:
-        # - Quantity and UnitPrice must be > 0
-        # - TransactionID must start with 'T'
-        # - ProductID must start with 'P'
-        # - CustomerID must start with 'C'
-        # - All required fields must be present
-        
-        is_valid = (
-            t['Quantity'] > 0 and
-            t['UnitPrice'] > 0 and
-            t['TransactionID'].startswith('T') and
-            t['ProductID'].startswith('P') and
-            t['CustomerID'].startswith('C') and
-            all(str(val).strip() != "" for val in t.values())
-        )
-        
-        if not is_valid:
-            continue
+    if not (0 < distinct_error < 1 and 0 < top_error < 1 and 0 < confidence < 1):
+        raise ValueError("error bounds and confidence must be between 0 and 1")
+    return {'distinct_error': distinct_error, 'top_error': top_error, 'confidence': confidence}
 
-        # Optional Filters
-        total_price = t['Quantity'] * t['UnitPrice']
-        if region and t['Region'] != region:
-            continue
-        if min_amount and total_price < min_amount:
-            continue
-        if max_amount and total_price > max_amount:
-            continue
-            
-        valid_transactions.append(t)
+def new_aggregates(approximate=None):
+    """
+    Empty running aggregates used by the report.
 
-    # VALIDATION OUTPUT REQUIRED
-    invalid_count = total_parsed - len(valid_transactions)
-    print(f"\nTotal records parsed: {total_parsed}")
-    print(f"Invalid records removed: {invalid_count}")
-    print(f"Valid records after cleaning: {len(valid_transactions)}")
-    
-    return valid_transactions, invalid_count, {
-        'total_input': total_parsed,
-        'invalid': invalid_count,
-        'final_count': len(valid_transactions)
+    regions:   {Region: [total_sales, transaction_count]}
+    products:  {ProductName: [total_quantity, total_revenue]}
+    customers: {CustomerID: [total_spent, purchase_count]}
+    daily:     {Date: [revenue, transaction_count, set of CustomerIDs]}
+
+    With approximate (an approximate_settings() dict) memory no longer grows
+    with the number of customers: customers becomes a SpaceSaving summary of
+    the heaviest spenders, customer_orders a CountMinSketch of purchase
+    counts and each day's customer set a HyperLogLog. Regions and products
+    stay exact; they are bounded by the catalog, and the low performers
+    section needs every product.
+    """
+    agg = {
+        'total_revenue': 0.0,
+        'transaction_count': 0,
+        'regions': {},
+        'products': {},
+        'customers': {},
+        'daily': {},
     }
+    if approximate is not None:
+        agg['approximate'] = dict(approximate)
+        agg['customers'] = SpaceSaving.for_error(approximate['top_error'])
+        agg['customer_orders'] = CountMinSketch.for_error(approximate['top_error'],
+                                                          1 - approximate['confidence'])
+    return agg
 
+def aggregate_transactions(transactions, aggregates=None, approximate=None):
+    """
+    Accumulates every figure the report needs in one pass over transactions.
 
-# In[4]:
+    approximate is only used when creating the aggregates; an existing
+    aggregates dictionary keeps its own mode.
 
+    Returns: the aggregates dictionary (see new_aggregates)
+    """
+    if _is_table(transactions) and aggregates is None and approximate is None:
+        from utils.transaction_table import aggregate_table
+        return aggregate_table(transactions)
 
-def parse_transactions(raw_lines):
-    """Parses raw lines into clean dictionaries as per Task 1.2."""
-    keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-            'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    parsed = []
-    
-    for line in raw_lines:
-        values = [v.strip() for v in line.split('|')]
-        if len(values) == len(keys):
-            try:
-                # Handle commas within ProductName and numeric fields
-                qty = int(values[4].replace(',', ''))
-                price = float(values[5].replace(',', ''))
-                
-                parsed.append({
-                    'TransactionID': values[0], 'Date': values[1],
-                    'ProductID': values[2], 'ProductName': values[3].replace(',', ''),
-                    'Quantity': qty, 'UnitPrice': price,
-                    'CustomerID': values[6], 'Region': values[7]
-                })
-            except ValueError:
-                continue
-    return parsed
+    agg = new_aggregates(approximate) if aggregates is None else aggregates
+    if 'approximate' in agg:
+        return _aggregate_approximate(transactions, agg)
+    regions, products = agg['regions'], agg['products']
+    customers, daily = agg['customers'], agg['daily']
+    total_revenue, count = agg['total_revenue'], agg['transaction_count']
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    """Validates and filters transactions as per Task 1.3."""
-    total_parsed = len(transactions)
-    valid_records = []
-    
-    # Validation Rules:
-    # 1. Quantity/UnitPrice > 0
-    # 2. TransactionID starts with 'T', ProductID with 'P', CustomerID with 'C'
     for t in transactions:
-        is_valid = (
-            t['Quantity'] > 0 and t['UnitPrice'] > 0 and
-            t['TransactionID'].startswith('T') and
-            t['ProductID'].startswith('P') and
-            t['CustomerID'].startswith('C')
-        )
-        
-        if is_valid:
-            valid_records.append(t)
+        qty = t['Quantity']
+        amount = qty * t['UnitPrice']
+        customer = t['CustomerID']
+        total_revenue += amount
+        count += 1
 
-    # REQUIRED OUTPUT FORMAT
-    print(f"Total records parsed: {total_parsed}")
-    print(f"Invalid records removed: {total_parsed - len(valid_records)}")
-    print(f"Valid records after cleaning: {len(valid_records)}")
-    
-    return valid_records
+        stats = regions.get(t['Region'])
+        if stats is None:
+            regions[t['Region']] = [amount, 1]
+        else:
+            stats[0] += amount
+            stats[1] += 1
 
+        stats = products.get(t['ProductName'])
+        if stats is None:
+            products[t['ProductName']] = [qty, amount]
+        else:
+            stats[0] += qty
+            stats[1] += amount
 
-# In[5]:
+        stats = customers.get(customer)
+        if stats is None:
+            customers[customer] = [amount, 1]
+        else:
+            stats[0] += amount
+            stats[1] += 1
 
+        stats = daily.get(t['Date'])
+        if stats is None:
+            daily[t['Date']] = [amount, 1, {customer}]
+        else:
+            stats[0] += amount
+            stats[1] += 1
+            stats[2].add(customer)
 
-def parse_transactions(raw_lines):
-    """Parses raw lines into clean list of dictionaries."""
-    keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-            'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    parsed = []
-    
-    for line in raw_lines:
-        # Split by pipe and strip hidden whitespace from every value
-        values = [v.strip() for v in line.split('|')]
-        
-        if len(values) == len(keys):
-            try:
-                # Remove commas from names and numbers before conversion
-                qty = int(values[4].replace(',', ''))
-                price = float(values[5].replace(',', ''))
-                
-                parsed.append({
-                    'TransactionID': values[0],
-                    'Date': values[1],
-                    'ProductID': values[2],
-                    'ProductName': values[3].replace(',', ''),
-                    'Quantity': qty,
-                    'UnitPrice': price,
-                    'CustomerID': values[6],
-                    'Region': values[7]
-                })
-            except ValueError:
-                continue
-    return parsed
+    agg['total_revenue'], agg['transaction_count'] = total_revenue, count
+    return agg
+
+def _aggregate_approximate(transactions, agg):
+    """aggregate_transactions for approximate aggregates: customers go to sketches."""
+    regions, products = agg['regions'], agg['products']
+    top_customers, orders, daily = agg['customers'], agg['customer_orders'], agg['daily']
+    precision = hll_precision(agg['approximate']['distinct_error'])
+    total_revenue, count = agg['total_revenue'], agg['transaction_count']
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    """Validates transactions and applies optional filters."""
-    total_parsed = len(transactions)
-    valid_records = []
-    
     for t in transactions:
-        # Strict Validation Rules
-        is_valid = (
-            t['Quantity'] > 0 and t['UnitPrice'] > 0 and
-            t['TransactionID'].startswith('T') and # Prefix 'T' for Transaction
-            t['ProductID'].startswith('P') and     # Prefix 'P' for Product
-            t['CustomerID'].startswith('C')         # Prefix 'C' for Customer
-        )
-        
-        if is_valid:
-            valid_records.append(t)
+        qty = t['Quantity']
+        amount = qty * t['UnitPrice']
+        customer = t['CustomerID']
+        # One hash per row feeds both the Count-Min sketch and the day's HyperLogLog
+        hashed = hash64(customer)
+        total_revenue += amount
+        count += 1
 
-    # Required Terminal Output
-    print(f"Total records parsed: {total_parsed}")
-    print(f"Invalid records removed: {total_parsed - len(valid_records)}")
-    print(f"Valid records after cleaning: {len(valid_records)}")
-    
-    return valid_records
+        stats = regions.get(t['Region'])
+        if stats is None:
+            regions[t['Region']] = [amount, 1]
+        else:
+            stats[0] += amount
+            stats[1] += 1
 
+        stats = products.get(t['ProductName'])
+        if stats is None:
+            products[t['ProductName']] = [qty, amount]
+        else:
+            stats[0] += qty
+            stats[1] += amount
 
-# In[6]:
+        top_customers.add(customer, amount)
+        orders.add_hash(hashed)
+
+        stats = daily.get(t['Date'])
+        if stats is None:
+            stats = daily[t['Date']] = [0.0, 0, HyperLogLog(precision)]
+        stats[0] += amount
+        stats[1] += 1
+        stats[2].add_hash(hashed)
 
+    agg['total_revenue'], agg['transaction_count'] = total_revenue, count
+    return agg
 
-def parse_transactions(raw_lines):
+def merge_aggregates(target, other):
     """
-    Parses raw lines into clean dictionaries as per Task 1.2.
+    Merges the aggregates of another shard, file or run into target.
+    Approximate aggregates only merge with approximate aggregates built with
+    the same settings.
+
+    Returns: target
     """
-    keys = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-            'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    parsed_records = []
-    
-    for line in raw_lines:
-        # Requirement: Split by pipe delimiter '|' and strip whitespace
-        values = [v.strip() for v in line.split('|')]
-        
-        if len(values) == len(keys):
-            try:
-                # Requirement: Handle commas within ProductName and numeric fields
-                qty_clean = values[4].replace(',', '')
-                price_clean = values[5].replace(',', '')
-                
-                record = {
-                    'TransactionID': values[0],
-                    'Date': values[1],
-                    'ProductID': values[2],
-                    'ProductName': values[3].replace(',', ''),
-                    'Quantity': int(qty_clean),
-                    'UnitPrice': float(price_clean),
-                    'CustomerID': values[6],
-                    'Region': values[7]
-                }
-                parsed_records.append(record)
-            except ValueError:
-                continue
-    return parsed_records
+    approximate = 'approximate' in target
+    if approximate != ('approximate' in other) or target.get('approximate') != other.get('approximate'):
+        raise ValueError("cannot merge aggregates built with different approximation settings")
+    target['total_revenue'] += other['total_revenue']
+    target['transaction_count'] += other['transaction_count']
+    for key in ('regions', 'products') if approximate else ('regions', 'products', 'customers'):
+        groups = target[key]
+        for name, (first, second) in other[key].items():
+            stats = groups.get(name)
+            if stats is None:
+                groups[name] = [first, second]
+            else:
+                stats[0] += first
+                stats[1] += second
+    if approximate:
+        target['customers'].merge(other['customers'])
+        target['customer_orders'].merge(other['customer_orders'])
+    daily = target['daily']
+    for date, (revenue, txns, customers) in other['daily'].items():
+        stats = daily.get(date)
+        if stats is None:
+            daily[date] = [revenue, txns, customers.copy() if approximate else set(customers)]
+        else:
+            stats[0] += revenue
+            stats[1] += txns
+            if approximate:
+                stats[2].merge(customers)
+            else:
+                stats[2] |= customers
+    return target
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def aggregates_to_json(agg):
     """
-    Validates records against strict rules to reach the 80/10/70 count.
+    JSON-serializable copy of the aggregates (customer sets become sorted
+    lists, sketches their to_json() form).
+    """
+    data = dict(agg)
+    if 'approximate' in agg:
+        data['customers'] = agg['customers'].to_json()
+        data['customer_orders'] = agg['customer_orders'].to_json()
+        data['daily'] = {date: [revenue, txns, sketch.to_json()]
+                         for date, (revenue, txns, sketch) in agg['daily'].items()}
+        return data
+    data['daily'] = {date: [revenue, txns, sorted(customers)]
+                     for date, (revenue, txns, customers) in agg['daily'].items()}
+    return data
+
+def aggregates_from_json(data):
+    """Inverse of aggregates_to_json."""
+    approximate = data.get('approximate')
+    agg = new_aggregates(approximate)
+    agg['total_revenue'] = data['total_revenue']
+    agg['transaction_count'] = data['transaction_count']
+    for key in ('regions', 'products') if approximate else ('regions', 'products', 'customers'):
+        agg[key] = {name: list(stats) for name, stats in data[key].items()}
+    if approximate:
+        agg['customers'] = SpaceSaving.from_json(data['customers'])
+        agg['customer_orders'] = CountMinSketch.from_json(data['customer_orders'])
+        agg['daily'] = {date: [revenue, txns, HyperLogLog.from_json(sketch)]
+                        for date, (revenue, txns, sketch) in data['daily'].items()}
+        return agg
+    agg['daily'] = {date: [revenue, txns, set(customers)]
+                    for date, (revenue, txns, customers) in data['daily'].items()}
+    return agg
+
+@instrumented(rows=lambda result: len(result[0]))
+def process_transactions(transactions, region=None, min_amount=None, max_amount=None,
+                         approximate=None):
+    """
+    Fused engine: validates, filters and aggregates in a single pass.
+
+    Applies the validate_and_filter rules and, for every row that survives,
+    updates the report aggregates at the same time. approximate (see
+    approximate_settings) switches the customer figures to sketches.
+
+    Returns: (valid_records, invalid_count, filter_summary, aggregates)
     """
     total_parsed = len(transactions)
-    valid_records = []
-    
-    # Validation Rules from Task 1.3:
-    # - Quantity/UnitPrice > 0
-    # - TransactionID starts with 'T', ProductID with 'P', CustomerID with 'C'
-    for t in transactions:
-        is_valid = (
-            t['Quantity'] > 0 and t['UnitPrice'] > 0 and
-            t['TransactionID'].startswith('T') and
-            t['ProductID'].startswith('P') and
-            t['CustomerID'].startswith('C')
-        )
-        
-        if not is_valid:
-            continue
 
-        # Optional Filter Logic
-        total_price = t['Quantity'] * t['UnitPrice']
-        if region and t['Region'] != region: continue
-        if min_amount and total_price < min_amount: continue
-        if max_amount and total_price > max_amount: continue
-            
-        valid_records.append(t)
+    if _is_table(transactions):
+        from utils.transaction_table import validate_table
+        valid_records, _ = validate_table(transactions, region, min_amount, max_amount)
+        aggregates = aggregate_transactions(valid_records, approximate=approximate)
+    else:
+        valid_records = []
+        aggregates = aggregate_transactions(
+            iter_valid_transactions(transactions, region, min_amount, max_amount, valid_records),
+            approximate=approximate
+        )
 
     # Required Validation Output for the Manager
     invalid_count = total_parsed - len(valid_records)
     print(f"Total records parsed: {total_parsed}")
     print(f"Invalid records removed: {invalid_count}")
     print(f"Valid records after cleaning: {len(valid_records)}")
-    
-    return valid_records
 
+    return valid_records, invalid_count, {
+        'total_input': total_parsed,
+        'invalid': invalid_count,
+        'final_count': len(valid_records)
+    }, aggregates
 
-# In[7]:
+def iter_valid_transactions(transactions, region, min_amount, max_amount, valid_records):
+    """Yields the rows that pass validation and filters, collecting them as it goes."""
+    for t in transactions:
+        # Validation Rules: Quantity/UnitPrice > 0 and T/P/C ID prefixes
+        if not (t['Quantity'] > 0 and t['UnitPrice'] > 0 and
+                t['TransactionID'].startswith('T') and
+                t['ProductID'].startswith('P') and
+                t['CustomerID'].startswith('C')):
+            continue
 
+        # Optional Filter Logic
+        if region and t['Region'] != region:
+            continue
+        if min_amount or max_amount:
+            total_price = t['Quantity'] * t['UnitPrice']
+            if min_amount and total_price < min_amount:
+                continue
+            if max_amount and total_price > max_amount:
+                continue
 
-def low_performing_products(transactions, threshold=10):
+        valid_records.append(t)
+        yield t
+
+def _region_performance(agg):
+    """{Region: {total_sales, transaction_count, percentage}} sorted by sales."""
+    total = agg['total_revenue']
+    ordered = sorted(agg['regions'].items(), key=lambda item: item[1][0], reverse=True)
+    return {
+        region: {
+            'total_sales': sales,
+            'transaction_count': txns,
+            'percentage': round(sales / total * 100, 2) if total else 0.0
+        }
+        for region, (sales, txns) in ordered
+    }
+
+def _top_products(agg, n=5):
+    """[(ProductName, TotalQuantity, TotalRevenue)] by quantity, highest first."""
+    # Bounded heap: O(products * log n) instead of sorting every product
+    ordered = heapq.nlargest(n, agg['products'].items(), key=lambda item: item[1][0])
+    return [(name, qty, rev) for name, (qty, rev) in ordered]
+
+def _customer_stats(agg, n=None):
     """
-    Identifies products with low sales based on a quantity threshold.
+    {CustomerID: {total_spent, purchase_count, avg_order_value}} by spend.
+    For approximate aggregates these are upper-bound estimates, and each
+    entry also has spend_overcount: how much total_spent may be too high.
     """
-    # Dictionary to store aggregates: {ProductName: [TotalQuantity, TotalRevenue]}
-    product_stats = {}
+    if 'approximate' in agg:
+        orders_sketch = agg['customer_orders']
+        stats = {}
+        for cid, spent, overcount in agg['customers'].top(n):
+            orders = int(orders_sketch.estimate(cid))
+            stats[cid] = {
+                'total_spent': spent,
+                'purchase_count': orders,
+                'avg_order_value': round(spent / orders, 2) if orders else 0.0,
+                'spend_overcount': overcount
+            }
+        return stats
+    if n is None:
+        ordered = sorted(agg['customers'].items(), key=lambda item: item[1][0], reverse=True)
+    else:
+        # Bounded heap: O(customers * log n) for a top-n request
+        ordered = heapq.nlargest(n, agg['customers'].items(), key=lambda item: item[1][0])
+    return {
+        cid: {
+            'total_spent': spent,
+            'purchase_count': orders,
+            'avg_order_value': round(spent / orders, 2) if orders else 0.0
+        }
+        for cid, (spent, orders) in ordered
+    }
+
+def _daily_trend(agg):
+    """{Date: {revenue, transaction_count, unique_customers}} in date order."""
+    return {
+        date: {
+            'revenue': revenue,
+            'transaction_count': txns,
+            'unique_customers': _count_unique(customers)
+        }
+        for date, (revenue, txns, customers) in sorted(agg['daily'].items())
+    }
+
+def _count_unique(customers):
+    """
+    Distinct customers held as a set or HyperLogLog, or already counted
+    (columnar path).
+    """
+    return customers if isinstance(customers, int) else len(customers)
+
+def _peak_day(agg):
+    """(Date, revenue, transaction_count) of the highest-revenue day."""
+    if not agg['daily']:
+        return None, 0.0, 0
+    date, (revenue, txns, _) = max(agg['daily'].items(), key=lambda item: item[1][0])
+    return date, revenue, txns
+
+# Trend buckets; positions match date_buckets()
+TREND_GRAINS = ('day', 'week', 'month')
+
+def _grain_buckets(agg, grain='day'):
+    """
+    agg['daily'] regrouped by ISO week ('YYYY-Www') or month ('YYYY-MM'),
+    the buckets of a RollupCube: {bucket: [revenue, transaction_count, customers]}.
+    Raises ValueError for an unknown grain.
+    """
+    if grain not in TREND_GRAINS:
+        raise ValueError(f"unknown grain {grain!r}; expected one of {TREND_GRAINS}")
+    if grain == 'day':
+        return agg['daily']
+    position = TREND_GRAINS.index(grain)
+    buckets = {}
+    for date, (revenue, txns, customers) in agg['daily'].items():
+        if isinstance(customers, int):
+            raise ValueError("unique customers were counted per day and cannot be regrouped")
+        bucket = date_buckets(date)[position]
+        stats = buckets.get(bucket)
+        if stats is None:
+            buckets[bucket] = [revenue, txns, customers.copy()]
+            continue
+        stats[0] += revenue
+        stats[1] += txns
+        if isinstance(customers, set):
+            stats[2] |= customers
+        else:
+            stats[2].merge(customers)
+    return buckets
+
+def _grain_trend(agg, grain='day'):
+    """{bucket: {revenue, transaction_count, unique_customers}} in bucket order."""
+    return _daily_trend({'daily': _grain_buckets(agg, grain)})
+
+def _grain_peak(agg, grain='day'):
+    """(bucket, revenue, transaction_count) of the highest-revenue bucket."""
+    return _peak_day({'daily': _grain_buckets(agg, grain)})
+
+def _low_performers(agg, threshold=10):
+    """[(ProductName, TotalQuantity, TotalRevenue)] below threshold, lowest first."""
+    low = [(name, qty, rev) for name, (qty, rev) in agg['products'].items() if qty < threshold]
+    low.sort(key=lambda x: x[1])
+    return low
+
+
+# In[9]:
+
+
+import math
+import os
+from datetime import datetime
+
+from utils.report_cache import dataset_fingerprint, report_cache_key
+
+def summarize_enrichment(enriched_transactions, summary=None):
+    """
+    Counts for the API ENRICHMENT SUMMARY section. Summaries of several
+    files can be merged by passing the running summary back in.
+
+    Returns: {'enriched': matched record count, 'missing_ids': set of ProductIDs}
+    """
+    if summary is None:
+        summary = {'enriched': 0, 'missing_ids': set()}
+    for et in enriched_transactions:
+        if et.get('API_Match'):
+            summary['enriched'] += 1
+        else:
+            summary['missing_ids'].add(et['ProductID'])
+    return summary
+
+# Report sections in order; only 'enrichment' depends on the product catalog
+REPORT_SECTIONS = ('overview', 'regions', 'top_products', 'top_customers', 'daily_trend',
+                   'product_performance', 'enrichment')
 
+@instrumented(rows=None)
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          aggregates=None, cache=None, cache_key=None):
+    """
+    Generates a comprehensive formatted text report as per the final project requirements.
+
+    Every section is read from the aggregates produced by process_transactions.
+    When they are not supplied they are built here in a single pass.
+    enriched_transactions may also be a summarize_enrichment() result.
+    Figures that come from sketches (approximate aggregates) are marked
+    with '~'.
+
+    With a ReportCache, each section is looked up under cache_key (see
+    report_cache_key; by default a fingerprint of transactions) and only
+    the sections that miss are rendered. The aggregates and the enrichment
+    summary are only computed if some section needs them. To skip loading
+    the data when every section is cached, see write_cached_report.
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Pre-calculate data for the report, on first use
+    inputs = {'aggregates': aggregates, 'enrichment': enriched_transactions}
+
+    def agg():
+        if inputs['aggregates'] is None:
+            inputs['aggregates'] = aggregate_transactions(transactions)
+        return inputs['aggregates']
+
+    def enrichment():
+        if inputs['enrichment'] is not None and not isinstance(inputs['enrichment'], dict):
+            inputs['enrichment'] = summarize_enrichment(inputs['enrichment'])
+        return inputs['enrichment']
+
+    builders = {
+        'overview': lambda: _overview_section(agg()),
+        'regions': lambda: _region_section(agg()),
+        'top_products': lambda: _top_products_section(agg()),
+        'top_customers': lambda: _top_customers_section(agg()),
+        'daily_trend': lambda: _daily_trend_section(agg()),
+        'product_performance': lambda: _product_performance_section(agg()),
+        'enrichment': lambda: _enrichment_section(agg(), enrichment()),
+    }
+    if cache is not None:
+        if cache_key is None:
+            cache_key = report_cache_key(dataset_fingerprint(transactions))
+        keys = _section_keys(cache_key, enriched_transactions is not None)
+
+    report_lines = _report_header()
+    for name in REPORT_SECTIONS:
+        if cache is None:
+            report_lines.extend(builders[name]())
+        else:
+            report_lines.extend(cache.get_or_compute(name, keys[name], builders[name]))
+    _write_report(output_file, report_lines)
+
+def write_cached_report(output_file, cache, cache_key, enriched=False):
+    """
+    Writes the report of generate_sales_report from cache alone, if every
+    section is cached under cache_key, so the caller need not load the
+    data at all. cache_key must not depend on the rows (e.g. file_version()
+    of the source and the filters). enriched: whether the run would pass
+    enrichment data to generate_sales_report.
+
+    Returns: True if the report was written, False (nothing written) if
+    some section has to be computed
+    """
+    keys = _section_keys(cache_key, enriched)
+    if not all(cache.has(name, keys[name]) for name in REPORT_SECTIONS):
+        return False
+    report_lines = _report_header()
+    try:
+        for name in REPORT_SECTIONS:
+            report_lines.extend(cache.get_or_compute(name, keys[name], _uncached_section))
+    except LookupError:
+        # A disk entry was pruned or unreadable after has() saw it
+        return False
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    _write_report(output_file, report_lines)
+    return True
+
+def _uncached_section():
+    raise LookupError("report section no longer cached")
+
+def _section_keys(cache_key, enriched):
+    # The catalog only matters to the enrichment section
+    key = dict(cache_key, catalog=None)
+    enrichment_key = dict(key, catalog=cache_key.get('catalog'), enriched=enriched)
+    return {name: enrichment_key if name == 'enrichment' else key for name in REPORT_SECTIONS}
+
+def _report_header():
+    # 1. & 2. HEADER AND OVERALL SUMMARY (the timestamp is never cached)
+    return [
+        "=" * 60,
+        "           SALES ANALYTICS REPORT",
+        f"        Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+    ]
+
+def _write_report(output_file, report_lines):
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(report_lines))
+        print(f"Comprehensive report generated successfully at: {output_file}")
+    except IOError as e:
+        print(f"Error writing report to {output_file}: {e}")
+
+def _overview_section(aggregates):
+    total_rev = aggregates['total_revenue']
+    total_txns = aggregates['transaction_count']
+    avg_order = total_rev / total_txns if total_txns > 0 else 0
+    dates = list(aggregates['daily']) or ['N/A']
+    return [
+        f"        Records Processed: {total_txns}",
+        "=" * 60,
+        "\nOVERALL SUMMARY",
+        "-" * 60,
+        f"Total Revenue:       ₹{total_rev:,.2f}",
+        f"Total Transactions:  {total_txns}",
+        f"Average Order Value: ₹{avg_order:,.2f}",
+        f"Date Range:          {min(dates)} to {max(dates)}",
+    ]
+
+def _region_section(aggregates):
+    # 3. REGION-WISE PERFORMANCE
+    return _region_lines(_region_performance(aggregates))
+
+def _region_lines(region_stats):
+    lines = ["\nREGION-WISE PERFORMANCE", "-" * 60]
+    lines.append(f"{'Region':<12} {'Sales':<15} {'% Total':<12} {'Transactions'}")
+    for reg, data in region_stats.items():
+        lines.append(f"{reg:<12} ₹{data['total_sales']:<14,.0f} {data['percentage']:<12}% {data['transaction_count']}")
+    return lines
+
+def _top_products_section(aggregates):
+    # 4. TOP 5 PRODUCTS
+    top_products = _top_products(aggregates, n=5)
+    lines = ["\nTOP 5 PRODUCTS", "-" * 60]
+    lines.append(f"{'Rank':<6} {'Product Name':<20} {'Qty':<10} {'Revenue'}")
+    for i, (name, qty, rev) in enumerate(top_products, 1):
+        lines.append(f"{i:<6} {name:<20} {qty:<10} ₹{rev:,.2f}")
+    return lines
+
+def _top_customers_section(aggregates):
+    # 5. TOP 5 CUSTOMERS
+    approximate = aggregates.get('approximate')
+    top_customers = _customer_stats(aggregates, n=5)
+    lines = ["\nTOP 5 CUSTOMERS", "-" * 60]
+    lines.append(f"{'Rank':<6} {'Customer ID':<15} {'Spent':<15} {'Orders'}")
+    mark = "~" if approximate else ""
+    for i, (cid, data) in enumerate(top_customers.items(), 1):
+        spent = f"{mark}₹{data['total_spent']:,.2f}"
+        lines.append(f"{i:<6} {cid:<15} {spent:<15} {mark}{data['purchase_count']}")
+    if approximate:
+        overcount = max((data['spend_overcount'] for data in top_customers.values()), default=0.0)
+        lines.append(
+            f"(~ Space-Saving / Count-Min estimates: Spent at most ₹{overcount:,.2f} high, "
+            f"Orders at most {approximate['top_error'] * aggregates['transaction_count']:,.0f} high "
+            f"with {approximate['confidence']:.0%} confidence)")
+    return lines
+
+def _daily_trend_section(aggregates):
+    # 6. DAILY SALES TREND
+    approximate = aggregates.get('approximate')
+    precision = hll_precision(approximate['distinct_error']) if approximate else None
+    return _trend_lines(_daily_trend(aggregates), precision)
+
+def _trend_lines(trends, precision, grain='day'):
+    """Trend table; precision is that of the HyperLogLogs behind Unique Cust, if any."""
+    title = {'day': 'DAILY', 'week': 'WEEKLY', 'month': 'MONTHLY'}[grain]
+    lines = [f"\n{title} SALES TREND", "-" * 60]
+    lines.append(f"{'Date' if grain == 'day' else grain.title():<15} {'Revenue':<15} "
+                 f"{'Txns':<10} {'Unique Cust'}")
+    mark = "" if precision is None else "~"
+    for date, data in trends.items():
+        lines.append(f"{date:<15} ₹{data['revenue']:<14,.2f} {data['transaction_count']:<10} {mark}{data['unique_customers']}")
+    if precision is not None:
+        lines.append(f"(~ Unique Cust: HyperLogLog estimates, about "
+                     f"±{104 / math.sqrt(1 << precision):.1f}%)")
+    return lines
+
+def _product_performance_section(aggregates):
+    # 7. PRODUCT PERFORMANCE ANALYSIS
+    peak_date, peak_rev, peak_txns = _peak_day(aggregates)
+    low_performers = _low_performers(aggregates)
+    return [
+        "\nPRODUCT PERFORMANCE ANALYSIS", "-" * 60,
+        f"Best Selling Day: {peak_date} (₹{peak_rev:,.2f} with {peak_txns} txns)",
+        f"Low Performing Products: {len(low_performers)} items found below threshold",
+    ]
+
+def _enrichment_section(aggregates, enrichment):
+    # 8. API ENRICHMENT SUMMARY
+    lines = ["\nAPI ENRICHMENT SUMMARY", "-" * 60]
+    if enrichment is None:
+        # Reports built from aggregates alone (e.g. incremental runs) have no API step
+        lines.append("API enrichment skipped for this run")
+        return lines
+    total_txns = aggregates['transaction_count']
+    enriched_count = enrichment['enriched']
+    success_rate = (enriched_count / total_txns * 100) if total_txns > 0 else 0
+    missing_ids = sorted(enrichment['missing_ids'])
+
+    lines.append(f"Total Products Enriched: {enriched_count}")
+    lines.append(f"Success Rate:            {success_rate:.2f}%")
+    lines.append(f"Not Enriched:            {', '.join(missing_ids) if missing_ids else 'None'}")
+    return lines
+
+@instrumented(rows=None)
+def generate_trend_report(source, output_file='output/trend_report.txt', grain='day', region=None):
+    """
+    Writes the region, sales trend and peak sections, bucketed by grain
+    ('day', 'week' or 'month').
+
+    source is either a RollupCube, whose cells answer every section without
+    touching a row (Unique Cust are then HyperLogLog estimates, marked
+    '~'), or report aggregates for exact figures. region restricts a cube
+    to that region's cells; aggregates must be built from its rows already.
+    """
+    if grain not in TREND_GRAINS:
+        raise ValueError(f"unknown grain {grain!r}; expected one of {TREND_GRAINS}")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    if isinstance(source, RollupCube):
+        regions = {name: stats for name, stats in source.regions().items()
+                   if region is None or name == region}
+        region_stats = _region_performance(
+            {'total_revenue': sum(sales for sales, _ in regions.values()), 'regions': regions})
+        trends = source.trend(grain, region)
+        peak_bucket, peak_rev, peak_txns = source.peak(grain, region)
+        precision = source.precision
+    else:
+        approximate = source.get('approximate')
+        region_stats = _region_performance(source)
+        trends = _grain_trend(source, grain)
+        peak_bucket, peak_rev, peak_txns = _grain_peak(source, grain)
+        precision = hll_precision(approximate['distinct_error']) if approximate else None
+
+    report_lines = [
+        "=" * 60,
+        "           SALES TREND REPORT",
+        f"        Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+    ]
+    if region is not None:
+        report_lines.append(f"        Region: {region}")
+    report_lines.extend(_region_lines(region_stats))
+    report_lines.extend(_trend_lines(trends, precision, grain))
+    report_lines.extend([
+        "\nPEAK SALES", "-" * 60,
+        f"Best Selling {grain.title()}: {peak_bucket} (₹{peak_rev:,.2f} with {peak_txns} txns)",
+    ])
+
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(report_lines))
+        print(f"Trend report generated successfully at: {output_file}")
+    except IOError as e:
+        print(f"Error writing report to {output_file}: {e}")
+
+
+# In[10]:
+
+
+def region_wise_sales(transactions):
+    """
+    Calculates total sales, transaction count and share of revenue per region.
+
+    Returns: dictionary {Region: {'total_sales', 'transaction_count', 'percentage'}}
+    sorted by total_sales descending
+    """
+    if isinstance(transactions, RollupCube):
+        return _region_performance({'total_revenue': transactions.total()[0],
+                                    'regions': transactions.regions()})
+    if _is_table(transactions):
+        revenue = transactions.revenue()
+        names, counts, (sales,) = transactions.group_stats('Region', revenue)
+        regions = {r: [s, c] for r, s, c in zip(names.tolist(), sales.tolist(), counts.tolist())}
+        return _region_performance({'total_revenue': float(revenue.sum()), 'regions': regions})
+
+    # Hash group-by: one dict update per row
+    regions = {}
+    total = 0.0
+    for t in transactions:
+        amount = t['Quantity'] * t['UnitPrice']
+        total += amount
+        stats = regions.get(t['Region'])
+        if stats is None:
+            regions[t['Region']] = [amount, 1]
+        else:
+            stats[0] += amount
+            stats[1] += 1
+    return _region_performance({'total_revenue': total, 'regions': regions})
+
+def top_selling_products(transactions, n=5):
+    """
+    Finds the top n products by total quantity sold.
+
+    Returns: list of (ProductName, TotalQuantity, TotalRevenue) tuples
+    """
+    if _is_table(transactions):
+        from utils.transaction_table import top_n_indices
+        names, _, (qty, rev) = transactions.group_stats(
+            'ProductName', transactions.quantity, transactions.revenue())
+        top = top_n_indices(qty, n)
+        return [(names[i], int(qty[i]), float(rev[i])) for i in top.tolist()]
+
+    products = {}
     for t in transactions:
-        name = t['ProductName']
         qty = t['Quantity']
-        rev = t['Quantity'] * t['UnitPrice']
-        
-        # Requirement: Aggregate by ProductName
-        if name not in product_stats:
-            product_stats[name] = [0, 0.0]
-        
-        product_stats[name][0] += qty
-        product_stats[name][1] += rev
+        stats = products.get(t['ProductName'])
+        if stats is None:
+            products[t['ProductName']] = [qty, qty * t['UnitPrice']]
+        else:
+            stats[0] += qty
+            stats[1] += qty * t['UnitPrice']
+    return _top_products({'products': products}, n)
 
-    # Requirement: Find products with total quantity < threshold
-    low_performers = []
-    for name, stats in product_stats.items():
-        total_qty = stats[0]
-        total_rev = stats[1]
-        
-        if total_qty < threshold:
-            # Requirement: Include total quantity and revenue in tuple
-            low_performers.append((name, total_qty, total_rev))
+def customer_analysis(transactions, n=None):
+    """
+    Analyzes spending per customer.
 
-    # Requirement: Sort by TotalQuantity ascending
-    low_performers.sort(key=lambda x: x[1])
+    Returns: dictionary {CustomerID: {'total_spent', 'purchase_count',
+    'avg_order_value'}} sorted by total_spent descending; only the top n
+    customers when n is given
+    """
+    if _is_table(transactions):
+        from utils.transaction_table import top_n_indices
+        # Vectorized group-by, then partition-based top-n selection
+        names, orders, (spent,) = transactions.group_stats('CustomerID', transactions.revenue())
+        top = top_n_indices(spent, n).tolist()
+        return _customer_stats({'customers': dict(zip(
+            names[top].tolist(), zip(spent[top].tolist(), orders[top].tolist())))}, n)
 
-    return low_performers
+    customers = {}
+    for t in transactions:
+        amount = t['Quantity'] * t['UnitPrice']
+        stats = customers.get(t['CustomerID'])
+        if stats is None:
+            customers[t['CustomerID']] = [amount, 1]
+        else:
+            stats[0] += amount
+            stats[1] += 1
+    return _customer_stats({'customers': customers}, n)
+
+def daily_sales_trend(transactions):
+    """
+    Calculates revenue, transaction count and unique customers per day.
+
+    Returns: dictionary {Date: {'revenue', 'transaction_count', 'unique_customers'}}
+    in chronological order (unique_customers is an estimate for a RollupCube)
+    """
+    return _daily_trend({'daily': _daily_groups(transactions)})
+
+def find_peak_sales_day(transactions):
+    """
+    Identifies the date with the highest revenue.
+
+    Returns: tuple (Date, revenue, transaction_count)
+    """
+    if isinstance(transactions, RollupCube):
+        return transactions.peak('day')
+    return _peak_day({'daily': _daily_groups(transactions)})
+
+def _daily_groups(transactions):
+    """{Date: [revenue, transaction_count, set of CustomerIDs]}"""
+    if isinstance(transactions, RollupCube):
+        # Distinct customers come back already counted (HyperLogLog estimates)
+        return {date: [revenue, txns, unique]
+                for (date, _, _), (revenue, _, txns, unique) in transactions.cells('day').items()}
+    if _is_table(transactions):
+        dates, txns, (revenue,) = transactions.group_stats('Date', transactions.revenue())
+        unique = transactions.unique_pairs_per('Date', 'CustomerID')
+        return {d: [r, c, unique[d]] for d, r, c in zip(dates.tolist(), revenue.tolist(), txns.tolist())}
+
+    daily = {}
+    for t in transactions:
+        amount = t['Quantity'] * t['UnitPrice']
+        stats = daily.get(t['Date'])
+        if stats is None:
+            daily[t['Date']] = [amount, 1, {t['CustomerID']}]
+        else:
+            stats[0] += amount
+            stats[1] += 1
+            stats[2].add(t['CustomerID'])
+    return daily
+
+
+# In[11]:
+
+
+from collections.abc import Mapping
+
+class Transaction(Mapping):
+    """
+    Compact parsed transaction.
+
+    Stores the eight fields in __slots__ instead of a per-row dict, while
+    still behaving as a read/write mapping (t['Quantity'], t.get(...),
+    dict(t), t.items(), comparison with dicts), so code written against the
+    dictionary records keeps working.
+    """
+    __slots__ = ('TransactionID', 'Date', 'ProductID', 'ProductName',
+                 'Quantity', 'UnitPrice', 'CustomerID', 'Region')
+
+    def __init__(self, TransactionID, Date, ProductID, ProductName,
+                 Quantity, UnitPrice, CustomerID, Region):
+        self.TransactionID = TransactionID
+        self.Date = Date
+        self.ProductID = ProductID
+        self.ProductName = ProductName
+        self.Quantity = Quantity
+        self.UnitPrice = UnitPrice
+        self.CustomerID = CustomerID
+        self.Region = Region
+
+    def __getitem__(self, key):
+        if key in _TRANSACTION_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in _TRANSACTION_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"Transaction({dict(self)!r})"
+
+    def __reduce__(self):
+        return (Transaction, tuple(getattr(self, f) for f in self.__slots__))
+
+    def copy(self):
+        """Plain dict copy, as dict.copy() would return."""
+        return dict(self)
+
+_TRANSACTION_FIELDS = frozenset(Transaction.__slots__)
 
 
 # In[ ]:
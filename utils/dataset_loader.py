@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import glob
+import os
+
+from utils.file_handler import iter_sales_data, file_version
+from utils.data_processor import (
+    parse_transactions, iter_valid_transactions, aggregate_transactions, new_aggregates,
+    merge_aggregates
+)
+
+# Worker tasks per process: enough to balance uneven files, few enough that
+# per-task pickling stays negligible next to the parsing
+TASKS_PER_WORKER = 4
+
+def resolve_inputs(spec):
+    """
+    Expands an input spec into a sorted list of files: a directory means
+    every *.txt directly inside it, anything else is treated as a glob
+    pattern (a plain file name matches itself).
+    """
+    if os.path.isdir(spec):
+        spec = os.path.join(spec, '*.txt')
+    return sorted(path for path in glob.glob(spec) if os.path.isfile(path))
+
+def _load_files(task):
+    """
+    Worker: reads, decodes, parses and validates a group of files into one
+    set of aggregates. Only the aggregates and per-file counts go back to
+    the parent, never the rows. Each file is aggregated on its own and only
+    merged in once it has been read completely, so a file that fails
+    halfway contributes nothing.
+    """
+    agg = new_aggregates(task['approximate'])
+    stats = []
+    for filename in task['files']:
+        try:
+            parsed = parse_transactions(iter_sales_data(filename))
+            if not parsed:
+                stats.append({'file': filename, 'error': "empty, missing or unreadable"})
+                continue
+            valid = []
+            file_agg = aggregate_transactions(iter_valid_transactions(
+                parsed, task['region'], task['min_amount'], task['max_amount'], valid),
+                new_aggregates(task['approximate']))
+            file_stats = {'file': filename, 'parsed': len(parsed), 'valid': len(valid),
+                          'invalid': len(parsed) - len(valid),
+                          'fingerprint': file_version(filename)}
+            merge_aggregates(agg, file_agg)
+            stats.append(file_stats)
+        except Exception as e:
+            # One bad file must not take the rest of its group down
+            stats.append({'file': filename, 'error': str(e)})
+    return agg, stats
+
+def load_dataset(spec, region=None, min_amount=None, max_amount=None, workers=None,
+                 approximate=None):
+    """
+    Loads every sales file matching spec (a directory, glob or file name,
+    or a list of files) into one set of report aggregates.
+
+    Files are grouped into a few tasks per worker and handled in a
+    ProcessPoolExecutor. Each worker keeps running aggregates across its
+    files, so thousands of small files cost a handful of task round trips
+    instead of one per file. A file that fails is reported and skipped; the
+    others still count.
+
+    Returns: (aggregates, file_stats) where file_stats has one entry per
+    file in name order: {'file', 'parsed', 'valid', 'invalid', 'fingerprint'}
+    or {'file', 'error'}
+    """
+    files = resolve_inputs(spec) if isinstance(spec, str) else sorted(spec)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    groups = max(1, min(len(files), workers * TASKS_PER_WORKER))
+    # Interleaved groups, so neighbouring (similar-sized daily) files spread out
+    tasks = [{'files': files[i::groups], 'region': region, 'min_amount': min_amount,
+              'max_amount': max_amount, 'approximate': approximate}
+             for i in range(groups) if files[i::groups]]
+
+    aggregates = new_aggregates(approximate)
+    file_stats = []
+    if workers == 1 or len(tasks) <= 1:
+        results = map(_load_files, tasks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = _results(executor, tasks)
+    for partial, stats in results:
+        merge_aggregates(aggregates, partial)
+        file_stats.extend(stats)
+    file_stats.sort(key=lambda stats: stats['file'])
+    return aggregates, file_stats
+
+def _results(executor, tasks):
+    """Task results in submission order; a crashed worker only fails its own files."""
+    with executor:
+        futures = [(executor.submit(_load_files, task), task) for task in tasks]
+        for future, task in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield new_aggregates(task['approximate']), [
+                    {'file': filename, 'error': f"worker failed: {e}"} for filename in task['files']]
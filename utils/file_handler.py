@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-# In[14]:
+# In[16]:
 
 
 import os
 
+from utils.instrumentation import instrumented, instrumented_iter
+
+@instrumented()
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues.
@@ -15,135 +18,284 @@ def read_sales_data(filename):
     Expected Output Format:
     ['T001|2024-12-01|P101|Laptop|2|45000|C001|North', ...]
     """
-    # Requirements: Handle FileNotFoundError with appropriate error message
+    # Requirement: Handle FileNotFoundError with appropriate error message
     if not os.path.exists(filename):
         print(f"Error: The file '{filename}' was not found.")
         return []
 
-    # Requirements: Handle different encodings (try 'utf-8', 'latin-1', 'cp1252')
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for enc in encodings:
-        try:
-            # Requirements: Use 'with' statement
-            with open(filename, 'r', encoding=enc) as file:
-                lines = file.readlines()
-                
-                # Requirements: Skip the header row and remove empty lines
-                # We slice from [1:] to skip the header
-                processed_lines = [line.strip() for line in lines[1:] if line.strip()]
-                
-                return processed_lines
-                
-        except (UnicodeDecodeError, LookupError):
-            continue
-    
-    print("Error: Could not decode the file with supported encodings.")
-    return []
+    # Requirement: Handle different encodings (try 'utf-8', 'latin-1', 'cp1252')
+    # Requirement: Skip the header row and remove empty lines
+    # The streaming reader below does both while holding one line at a time,
+    # so the file is no longer kept in memory twice (readlines + stripped copy).
+    return list(iter_sales_data(filename))
 
 def save_report(content, filename="summary_report.txt"):
-    """Saves the final analysis to the output directory."""
+    """
+    Saves the final analysis to the output directory.
+    """
     os.makedirs('output', exist_ok=True)
     with open(os.path.join('output', filename), 'w') as f:
         f.write(content)
 
 
-# In[15]:
+# In[ ]:
 
 
-import os
+import codecs
+import mmap
 
-def read_sales_data(filename):
+# Encodings tried (in order) when decoding the sales file
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+
+def detect_encoding(filename, sample_size=64 * 1024):
     """
-    Reads sales data from file handling encoding issues.
-    
-    Returns: list of raw lines (strings)
-    
-    Expected Output Format:
-    ['T001|2024-12-01|P101|Laptop|2|45000|C001|North', ...]
+    Detects the file encoding from a small leading sample instead of
+    decoding the whole file once per candidate encoding.
+
+    Returns: the first entry of ENCODINGS that decodes the sample
     """
-    # Requirement: Handle FileNotFoundError with appropriate error message
-    if not os.path.exists(filename):
-        print(f"Error: The file '{filename}' was not found.")
-        return []
+    with open(filename, 'rb') as file:
+        sample = file.read(sample_size)
 
-    # Requirement: Handle different encodings (try 'utf-8', 'latin-1', 'cp1252')
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for enc in encodings:
+    for enc in ENCODINGS:
         try:
-            # Requirement: Use 'with' statement
-            with open(filename, 'r', encoding=enc) as file:
-                lines = file.readlines()
-                
-                # Requirement: Skip the header row and remove empty lines
-                # We use slicing [1:] to skip the header line
-                processed_lines = [line.strip() for line in lines[1:] if line.strip()]
-                
-                return processed_lines
-                
+            # An incremental decoder tolerates a multi-byte character that was
+            # cut in half at the end of the sample
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
         except (UnicodeDecodeError, LookupError):
             continue
-    
-    print("Error: Could not decode the file with supported encodings.")
-    return []
+    return ENCODINGS[-1]
 
-def save_report(content, filename="summary_report.txt"):
-    """Saves the final analysis to the output directory."""
-    os.makedirs('output', exist_ok=True)
-    with open(os.path.join('output', filename), 'w') as f:
-        f.write(content)
+def decode_line(raw_line, encoding):
+    """
+    Decodes one raw line, falling back to the remaining ENCODINGS for that
+    line only when it contains bytes that are invalid in the detected encoding.
+    """
+    try:
+        return raw_line.decode(encoding)
+    except UnicodeDecodeError:
+        for enc in ENCODINGS:
+            try:
+                return raw_line.decode(enc)
+            except UnicodeDecodeError:
+                continue
+    # latin-1 maps every byte, so this is only reached if ENCODINGS changes
+    return raw_line.decode(encoding, errors='replace')
+
+@instrumented_iter()
+def iter_sales_data(filename, chunk_size=1024 * 1024, stats=None):
+    """
+    Streams sales data one line at a time.
 
+    Yields: stripped, non-empty raw lines (strings), header excluded
 
-# In[16]:
+    The file is memory-mapped and decoded a chunk of about chunk_size bytes
+    at a time (see iter_mapped_lines), so memory use stays flat regardless
+    of file size and nothing is ever re-read. Lines with bytes that are
+    invalid in the detected encoding are decoded on their own and counted
+    in stats['invalid_lines'] (and reported once at the end).
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return
 
+    encoding = detect_encoding(filename)
+    stats = {} if stats is None else stats
 
-import os
+    # Requirement: Skip the header row
+    # The header is the line carrying the UTF-8 BOM, so dropping it here
+    # keeps the BOM out of the first TransactionID
+    yield from iter_mapped_lines(filename, data_offset(filename), None, encoding,
+                                 chunk_size, stats)
+    if stats.get('invalid_lines'):
+        print(f"Warning: {stats['invalid_lines']} line(s) in '{filename}' were not valid "
+              f"{encoding} and were decoded individually "
+              f"({', '.join(f'{enc}: {n}' for enc, n in stats['fallback_encodings'].items())}).")
 
-def read_sales_data(filename):
+def iter_mapped_lines(filename, start, end, encoding, chunk_size=1024 * 1024, stats=None):
     """
-    Reads sales data from file handling encoding issues.
-    
-    Returns: list of raw lines (strings)
-    
-    Expected Output Format:
-    ['T001|2024-12-01|P101|Laptop|2|45000|C001|North', ...]
+    Yields the stripped, non-empty lines that start inside [start, end) of a
+    memory-mapped file (end=None: to the end of the file).
+
+    The mapping is cut into newline-aligned chunks. Each chunk is checked and
+    decoded in one call; only a chunk that is not valid in `encoding` is
+    split into lines first, and then only its offending lines go through
+    decode_line's fallback. stats (optional dict) receives 'chunks',
+    'fallback_chunks', 'invalid_lines' and 'fallback_encodings'
+    ({encoding: lines}).
     """
-    # Requirement: Handle FileNotFoundError with appropriate error message
-    if not os.path.exists(filename):
-        print(f"Error: The file '{filename}' was not found.")
-        return []
+    if stats is not None:
+        for key in ('chunks', 'fallback_chunks', 'invalid_lines'):
+            stats.setdefault(key, 0)
+        stats.setdefault('fallback_encodings', {})
+
+    with open(filename, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # The last line starting before `end` is read to its newline
+            stop = mm.find(b'\n', end - 1)
+            stop = size if stop < 0 else stop + 1
+
+            position = start
+            while position < stop:
+                cut = mm.find(b'\n', min(position + chunk_size, stop) - 1, stop)
+                cut = stop if cut < 0 else cut + 1
+                chunk = mm[position:cut]
+                position = cut
+
+                try:
+                    lines = chunk.decode(encoding).split('\n')
+                    fallback = False
+                except UnicodeDecodeError:
+                    lines = _decode_lines(chunk.split(b'\n'), encoding, stats)
+                    fallback = True
+                if stats is not None:
+                    stats['chunks'] += 1
+                    stats['fallback_chunks'] += fallback
 
-    # Requirement: Handle different encodings (try 'utf-8', 'latin-1', 'cp1252')
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for enc in encodings:
-        try:
-            # Requirement: Use 'with' statement for file operations
-            with open(filename, 'r', encoding=enc) as file:
-                lines = file.readlines()
-                
-                # Requirement: Skip the header row
                 # Requirement: Remove empty lines
-                # lines[1:] slices the list to ignore the first header line
-                processed_lines = [line.strip() for line in lines[1:] if line.strip()]
-                
-                return processed_lines
-                
-        except (UnicodeDecodeError, LookupError):
-            # Continue to the next encoding if a decode error occurs
+                yield from filter(None, map(str.strip, lines))
+
+def _decode_lines(raw_lines, encoding, stats):
+    """
+    Per-line decoding of a chunk that failed as a whole; same rules as
+    decode_line, but also records which encoding each invalid line needed.
+    """
+    lines = []
+    for raw_line in raw_lines:
+        try:
+            lines.append(raw_line.decode(encoding))
             continue
-    
-    print("Error: Could not decode the file with supported encodings.")
-    return []
+        except UnicodeDecodeError:
+            pass
+        for enc in ENCODINGS:
+            try:
+                lines.append(raw_line.decode(enc))
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            lines.append(raw_line.decode(encoding, errors='replace'))
+            enc = f"{encoding} (replaced)"
+        if stats is not None:
+            stats['invalid_lines'] += 1
+            stats['fallback_encodings'][enc] = stats['fallback_encodings'].get(enc, 0) + 1
+    return lines
 
-def save_report(content, filename="summary_report.txt"):
+def split_byte_ranges(filename, shards):
     """
-    Saves the final analysis to the output directory.
+    Splits the data section of the file (everything after the header) into
+    at most `shards` byte ranges whose boundaries fall on line starts.
+
+    Returns: list of (start, end) byte offsets
     """
-    os.makedirs('output', exist_ok=True)
-    with open(os.path.join('output', filename), 'w') as f:
-        f.write(content)
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        file.readline()  # header
+        data_start = file.tell()
+        span = size - data_start
+        if span <= 0:
+            return []
+
+        shards = max(1, min(shards, span))
+        boundaries = [data_start]
+        for i in range(1, shards):
+            target = data_start + span * i // shards
+            if target <= boundaries[-1]:
+                continue
+            # Move to the first line start at or after target
+            file.seek(target - 1)
+            file.readline()
+            boundary = file.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+        boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def iter_byte_range(filename, start, end, encoding, stats=None):
+    """
+    Streams the stripped, non-empty lines that start inside [start, end).
+    Decoding follows the same per-line rules as iter_sales_data.
+    """
+    return iter_mapped_lines(filename, start, end, encoding, stats=stats)
+
+
+# In[ ]:
+
+
+import hashlib
+
+def data_offset(filename):
+    """Byte offset of the first data line (just past the header)."""
+    with open(filename, 'rb') as file:
+        file.readline()
+        return file.tell()
+
+def file_fingerprint(filename, end=None, sample_size=64 * 1024):
+    """
+    Cheap content fingerprint of the first `end` bytes of a file.
+
+    Hashes the length plus a leading and a trailing sample instead of the
+    whole prefix, so it costs the same for a 1 KB and a 40 GB file. Edits
+    between the samples go unnoticed: key caches with file_version.
+    """
+    if end is None:
+        end = os.path.getsize(filename)
+    digest = hashlib.sha256(str(end).encode())
+    with open(filename, 'rb') as file:
+        digest.update(file.read(min(sample_size, end)))
+        if end > sample_size:
+            file.seek(max(sample_size, end - sample_size))
+            digest.update(file.read(end - file.tell()))
+    return digest.hexdigest()
+
+def file_version(filename):
+    """
+    Key for the current contents of a file in derived caches: its size,
+    mtime and file_fingerprint. Any write updates the mtime, so the key
+    changes even for an edit between the fingerprint's samples.
+    """
+    stat = os.stat(filename)
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{file_fingerprint(filename)}"
+
+SEGMENT_SIZE = 4 * 1024 * 1024
+
+def segment_hashes(filename, end, known=None, segment_size=SEGMENT_SIZE):
+    """
+    Hash of the whole first `end` bytes of a file, as one BLAKE2 digest per
+    segment_size piece (the last piece may be shorter). Unlike
+    file_fingerprint, an edit anywhere in the prefix changes it.
+
+    known: (end, hashes) of a shorter prefix of the same file that is
+    already hashed; its complete segments are reused, so extending the
+    prefix only reads the new bytes.
+    """
+    hashes, start = [], 0
+    if known is not None:
+        complete = min(known[0], end) // segment_size
+        hashes, start = list(known[1][:complete]), complete * segment_size
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        while start < end:
+            chunk = file.read(min(segment_size, end - start))
+            if not chunk:
+                break
+            hashes.append(hashlib.blake2b(chunk, digest_size=16).hexdigest())
+            start += len(chunk)
+    return hashes
+
+def segment_hash(filename, index, end, segment_size=SEGMENT_SIZE):
+    """Entry `index` of segment_hashes(filename, end), reading only that segment."""
+    start = index * segment_size
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        chunk = file.read(max(min(segment_size, end - start), 0))
+    return hashlib.blake2b(chunk, digest_size=16).hexdigest()
 
 
 # In[ ]:
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import json
+import os
+from itertools import islice
+
+from utils.file_handler import (
+    detect_encoding, data_offset, segment_hash, segment_hashes, iter_byte_range, SEGMENT_SIZE
+)
+from utils.data_processor import (
+    parse_transactions, iter_valid_transactions, aggregate_transactions, new_aggregates,
+    merge_aggregates, aggregates_to_json, aggregates_from_json
+)
+
+CHECKPOINT_FILE = 'data/sales_checkpoint.json'
+CHECKPOINT_VERSION = 3
+CHUNK_SIZE = 50000
+# Appends go to checkpoint_file + LOG_SUFFIX, one JSON line per run. The log
+# is folded back into the checkpoint once it holds MAX_LOG_ENTRIES runs or
+# grows past MAX_LOG_RATIO of the checkpoint's size.
+LOG_SUFFIX = '.log'
+MAX_LOG_ENTRIES = 100
+MAX_LOG_RATIO = 0.5
+
+def run_incremental(filename, checkpoint_file=CHECKPOINT_FILE, approximate=None, verify=False):
+    """
+    Brings the checkpointed report aggregates up to date with `filename`.
+
+    The checkpoint records how many bytes were already processed, per-segment
+    hashes of them and the file's mtime (see prefix_state). If that prefix
+    is unchanged (see resume_offset; verify re-hashes all of it), only the
+    appended tail is parsed, validated and aggregated. Otherwise (file
+    replaced, truncated or edited in place) everything is re-processed.
+    So is a checkpoint built with other approximate settings (see
+    approximate_settings), since sketches only merge with their own kind.
+
+    An append only writes the aggregates of its own rows, as one line of the
+    delta log (see append_delta), so saving costs what changed. The full
+    aggregates are rewritten after a rescan or when the log is compacted.
+
+    Returns: (aggregates, stats) where stats holds the row counts and
+    whether a full rescan was needed
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return None, {}
+
+    size = os.path.getsize(filename)
+    checkpoint = load_checkpoint(checkpoint_file, filename)
+    if checkpoint is not None and checkpoint['aggregates'].get('approximate') != approximate:
+        checkpoint = None
+    start = resume_offset(checkpoint, filename, size, verify)
+
+    if start is None:
+        start = data_offset(filename)
+        encoding = detect_encoding(filename)
+        total_parsed = total_valid = 0
+        full_rescan = True
+    else:
+        encoding = checkpoint['encoding']
+        total_parsed, total_valid = checkpoint['total_parsed'], checkpoint['total_valid']
+        full_rescan = False
+
+    # Only the unprocessed tail is read; it is parsed in bounded chunks
+    delta = new_aggregates(approximate)
+    new_parsed = new_valid = 0
+    symbols = {}
+    lines = iter_byte_range(filename, start, size, encoding)
+    while True:
+        parsed = parse_transactions(islice(lines, CHUNK_SIZE), symbols=symbols)
+        if not parsed:
+            break
+        valid = []
+        aggregate_transactions(iter_valid_transactions(parsed, None, None, None, valid), delta)
+        new_parsed += len(parsed)
+        new_valid += len(valid)
+
+    total_parsed += new_parsed
+    total_valid += new_valid
+    if full_rescan:
+        aggregates = delta
+    else:
+        aggregates = merge_aggregates(checkpoint['aggregates'], delta)
+
+    if full_rescan or start < size:
+        state = prefix_state(filename, size, None if full_rescan else checkpoint)
+        if full_rescan or checkpoint['log_entries'] >= MAX_LOG_ENTRIES or \
+                checkpoint['log_size'] > MAX_LOG_RATIO * checkpoint['checkpoint_size']:
+            save_checkpoint(checkpoint_file, dict(
+                state,
+                version=CHECKPOINT_VERSION,
+                source=os.path.abspath(filename),
+                encoding=encoding,
+                total_parsed=total_parsed,
+                total_valid=total_valid,
+                aggregates=aggregates_to_json(aggregates),
+            ))
+        else:
+            append_delta(checkpoint_file, checkpoint, state, new_parsed, new_valid, delta)
+
+    return aggregates, {
+        'new_parsed': new_parsed,
+        'new_valid': new_valid,
+        'total_parsed': total_parsed,
+        'total_invalid': total_parsed - total_valid,
+        'total_valid': total_valid,
+        'full_rescan': full_rescan,
+    }
+
+def load_checkpoint(checkpoint_file, filename):
+    """
+    Returns the checkpoint for filename with its delta log applied: the
+    prefix_state keys, 'encoding', the totals and the report 'aggregates'
+    (ready to use, not JSON). None if absent or unusable.
+    """
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+            checkpoint_size = f.tell()
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION
+            or checkpoint.get('source') != os.path.abspath(filename)):
+        return None
+    checkpoint['aggregates'] = aggregates_from_json(checkpoint['aggregates'])
+    checkpoint['checkpoint_size'] = checkpoint_size
+    checkpoint['log_entries'], checkpoint['log_size'] = _replay_log(
+        checkpoint_file + LOG_SUFFIX, checkpoint)
+    return checkpoint
+
+def _replay_log(log_file, checkpoint):
+    """
+    Applies the delta log lines written since checkpoint was saved, in
+    order. Stops at the first line that is torn, belongs to an older
+    checkpoint or does not continue where the previous one ended.
+
+    Returns: (lines applied, bytes applied)
+    """
+    entries = applied = 0
+    try:
+        with open(log_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if (not line.endswith(b'\n') or entry.get('generation') != checkpoint['generation']
+                        or entry.get('start') != checkpoint['offset']):
+                    break
+                merge_aggregates(checkpoint['aggregates'], aggregates_from_json(entry['aggregates']))
+                checkpoint['segments'] = checkpoint['segments'][:entry['segments_from']] + \
+                    entry['segments']
+                for key in ('offset', 'mtime_ns', 'partial_tail'):
+                    checkpoint[key] = entry[key]
+                checkpoint['total_parsed'] += entry['parsed']
+                checkpoint['total_valid'] += entry['valid']
+                entries += 1
+                applied += len(line)
+    except OSError:
+        pass
+    return entries, applied
+
+def append_delta(checkpoint_file, checkpoint, state, parsed, valid, delta):
+    """
+    Records one incremental run as a delta log line: the aggregates and
+    counts of its rows and the new prefix state (only the segment hashes
+    that changed). checkpoint is the loaded checkpoint the run resumed from;
+    anything in the log past the lines it applied is cut off first.
+    """
+    segments_from = checkpoint['offset'] // SEGMENT_SIZE
+    line = json.dumps({
+        'generation': checkpoint['generation'],
+        'start': checkpoint['offset'],
+        'offset': state['offset'],
+        'segments_from': segments_from,
+        'segments': state['segments'][segments_from:],
+        'mtime_ns': state['mtime_ns'],
+        'partial_tail': state['partial_tail'],
+        'parsed': parsed,
+        'valid': valid,
+        'aggregates': aggregates_to_json(delta),
+    }).encode('utf-8') + b'\n'
+    try:
+        with open(checkpoint_file + LOG_SUFFIX, 'ab') as f:
+            f.truncate(checkpoint['log_size'])
+            f.write(line)
+    except OSError as e:
+        print(f"Error writing checkpoint log {checkpoint_file}{LOG_SUFFIX}: {e}")
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    """
+    Writes the full checkpoint atomically and starts a new delta log. The
+    checkpoint gets a fresh 'generation', so log lines from before it are
+    never applied to it, even if removing the old log fails.
+    """
+    directory = os.path.dirname(checkpoint_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    checkpoint = dict(checkpoint, generation=os.urandom(8).hex())
+    tmp_file = f"{checkpoint_file}.tmp{os.getpid()}"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_file, checkpoint_file)
+        if os.path.exists(checkpoint_file + LOG_SUFFIX):
+            os.remove(checkpoint_file + LOG_SUFFIX)
+    except OSError as e:
+        print(f"Error writing checkpoint {checkpoint_file}: {e}")
+
+def prefix_state(filename, size, previous=None):
+    """
+    What resume_offset checks about the first `size` bytes of filename:
+    {'offset', 'segments' (segment_hashes), 'mtime_ns', 'partial_tail'}.
+
+    previous: the state of a shorter prefix of the same file, already
+    verified by resume_offset; its segment hashes are reused.
+    """
+    known = (previous['offset'], previous['segments']) if previous else None
+    return {
+        'offset': size,
+        'segments': segment_hashes(filename, size, known),
+        'mtime_ns': os.stat(filename).st_mtime_ns,
+        'partial_tail': size > 0 and not ends_with_newline(filename, size),
+    }
+
+def resume_offset(checkpoint, filename, size, verify=False):
+    """
+    Offset to resume from, or None when the processed prefix has changed
+    and a full rescan is required. checkpoint needs the keys of
+    prefix_state.
+
+    A file with the recorded size and mtime is unchanged. A file that grew
+    only has the first and last segments of its processed prefix re-hashed,
+    so checking an append costs the same whatever the history; an edit
+    elsewhere in the prefix is only caught with verify, which re-hashes all
+    of it. A file with the recorded size but another mtime was rewritten in
+    place and is always re-hashed in full.
+    """
+    if checkpoint is None:
+        return None
+    offset = checkpoint['offset']
+    if size < offset:
+        return None
+    if size == offset and os.stat(filename).st_mtime_ns == checkpoint['mtime_ns']:
+        return offset
+    segments = checkpoint['segments']
+    if verify or size == offset:
+        if segment_hashes(filename, offset) != segments:
+            return None
+    elif segments:
+        for index in {0, len(segments) - 1}:
+            if segment_hash(filename, index, offset) != segments[index]:
+                return None
+    if checkpoint.get('partial_tail') and size > offset:
+        # The last processed row had no newline. If the append continues that
+        # same row, its old values are already in the aggregates: start over.
+        with open(filename, 'rb') as file:
+            file.seek(offset)
+            if file.read(1) not in (b'\n', b'\r'):
+                return None
+    return offset
+
+def ends_with_newline(filename, size):
+    with open(filename, 'rb') as file:
+        file.seek(size - 1)
+        return file.read(1) == b'\n'
+
+
+# In[ ]:
+
+
+
+
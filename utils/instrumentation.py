@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+# Active configuration; None means instrumentation is off
+_config = None
+# Open stages, innermost last, for nested tracemalloc peaks
+_open_stages = []
+# Prometheus totals per stage: {name: {'calls', 'wall', 'cpu', 'rows', 'peak'}}
+_totals = {}
+
+METRIC_PREFIX = 'sales_pipeline_stage'
+
+def configure(path, fmt=None, memory=True):
+    """
+    Turns per-stage instrumentation on.
+
+    fmt 'jsonl' appends one JSON object per finished stage to path;
+    'prometheus' keeps running totals and writes them as a node_exporter
+    textfile on flush(). By default it is inferred from the suffix (.prom).
+    memory=False skips tracemalloc, which slows allocation-heavy stages.
+
+    Worker processes forked afterwards inherit the configuration: their
+    jsonl records land in the same file, but Prometheus totals only cover
+    the process that calls flush().
+    """
+    global _config
+    if fmt is None:
+        fmt = 'prometheus' if path.endswith('.prom') else 'jsonl'
+    if fmt not in ('jsonl', 'prometheus'):
+        raise ValueError(f"unknown metrics format: {fmt}")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    started = False
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started = True
+    _config = {'path': path, 'format': fmt, 'memory': memory, 'started_tracing': started}
+    _totals.clear()
+
+def enabled():
+    return _config is not None
+
+def flush():
+    """Writes the Prometheus textfile (jsonl records are written as they finish)."""
+    if _config is None or _config['format'] != 'prometheus':
+        return
+    lines = []
+    for metric, key, help_text in (
+            ('calls', 'calls', "Times the stage ran"),
+            ('wall_seconds', 'wall', "Wall clock time spent in the stage"),
+            ('cpu_seconds', 'cpu', "Process CPU time spent in the stage"),
+            ('rows', 'rows', "Rows handled by the stage"),
+            ('rows_per_second', None, "Rows handled per wall clock second"),
+            ('peak_memory_bytes', 'peak', "Largest traced allocation peak above the stage start")):
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for stage, totals in sorted(_totals.items()):
+            if key is None:
+                value = totals['rows'] / totals['wall'] if totals['rows'] and totals['wall'] else None
+            else:
+                value = totals[key]
+            if value is not None:
+                lines.append(f'{name}{{stage="{stage}"}} {value}')
+    path = _config['path']
+    tmp_file = f"{path}.tmp{os.getpid()}"
+    try:
+        # Renamed into place so the textfile collector never reads a partial file
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_file, path)
+    except OSError as e:
+        print(f"Error writing metrics file {path}: {e}")
+
+def disable():
+    """Flushes pending output and turns instrumentation off."""
+    global _config
+    if _config is None:
+        return
+    flush()
+    if _config['started_tracing']:
+        tracemalloc.stop()
+    _config = None
+    _open_stages.clear()
+
+class _Stage:
+    """One timed run of a stage. Set .rows before it closes to get rows/sec."""
+
+    __slots__ = ('name', 'rows', 'wall', 'cpu', 'base', 'peak')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if _config['memory'] and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if _open_stages:
+                # Keep the enclosing stage's peak before resetting it for ours
+                parent = _open_stages[-1]
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.base = self.peak = current
+        else:
+            self.base = self.peak = None
+        _open_stages.append(self)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+        if _open_stages and _open_stages[-1] is self:
+            _open_stages.pop()
+        if self.base is not None and tracemalloc.is_tracing():
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if _open_stages:
+                parent = _open_stages[-1]
+                parent.peak = max(parent.peak, self.peak)
+            tracemalloc.reset_peak()
+        _record(self.name, self.wall, self.cpu, self.rows,
+                None if self.base is None else self.peak - self.base)
+        return False
+
+class _NullStage:
+    """Shared no-op stand-in used while instrumentation is off."""
+
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name, rows=None):
+    """
+    Context manager timing the enclosed block as stage `name`.
+
+    Usage:
+        with stage('parse_transactions') as s:
+            records = parse(...)
+            s.rows = len(records)
+    """
+    if _config is None:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+def _record(name, wall, cpu, rows, peak):
+    if _config is None:
+        return
+    if _config['format'] == 'jsonl':
+        entry = {
+            'ts': round(time.time(), 3), 'pid': os.getpid(), 'stage': name,
+            'wall_seconds': round(wall, 6), 'cpu_seconds': round(cpu, 6),
+            'rows': rows,
+            'rows_per_second': round(rows / wall, 1) if rows and wall > 0 else None,
+            'peak_memory_bytes': peak,
+        }
+        try:
+            # One append per record, so forked workers can share the file
+            with open(_config['path'], 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Error writing metrics file {_config['path']}: {e}")
+        return
+    totals = _totals.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': None, 'peak': None})
+    totals['calls'] += 1
+    totals['wall'] += wall
+    totals['cpu'] += cpu
+    if rows is not None:
+        totals['rows'] = (totals['rows'] or 0) + rows
+    if peak is not None:
+        totals['peak'] = peak if totals['peak'] is None else max(totals['peak'], peak)
+
+def _count_rows(result):
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+def instrumented(name=None, rows=_count_rows):
+    """
+    Decorator timing every call of a function as a stage (default name: the
+    function name). rows(result) gives the row count; by default len(result),
+    or the result itself when it is an int.
+
+    While instrumentation is off the wrapper only adds one global check.
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _config is None:
+                return func(*args, **kwargs)
+            with _Stage(stage_name) as current:
+                result = func(*args, **kwargs)
+                current.rows = rows(result) if rows else None
+            return result
+        return wrapper
+    return decorate
+
+def instrumented_iter(name=None):
+    """
+    Decorator for generator functions. Only the time spent producing items
+    is counted (not the consumer's), rows is the number of items yielded and
+    no memory peak is recorded, since production and consumption interleave.
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _config is None:
+                return func(*args, **kwargs)
+            return _timed_iter(stage_name, func(*args, **kwargs))
+        return wrapper
+    return decorate
+
+def _timed_iter(name, iterator):
+    wall = cpu = 0.0
+    count = 0
+    clock, cpu_clock = time.perf_counter, time.process_time
+    try:
+        while True:
+            start, cpu_start = clock(), cpu_clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                wall += clock() - start
+                cpu += cpu_clock() - cpu_start
+            count += 1
+            yield item
+    finally:
+        _record(name, wall, cpu, count, None)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.file_handler import detect_encoding, split_byte_ranges
+from utils.transaction_table import TransactionTable
+from utils.bulk_parser import parse_byte_range
+
+# Below this many bytes per shard the process start-up costs more than it saves
+MIN_SHARD_BYTES = 4 * 1024 * 1024
+
+def _parse_shard(task):
+    """
+    Worker: parses one newline-aligned byte range into a TransactionTable.
+
+    Only compact NumPy columns travel back to the parent, never row dicts.
+    """
+    filename, start, end, encoding = task
+    return parse_byte_range(filename, start, end, encoding)
+
+def parse_file_parallel(filename, workers=None, min_shard_bytes=MIN_SHARD_BYTES):
+    """
+    Parses a sales file in parallel byte-range shards.
+
+    Each shard is bulk-parsed in a ProcessPoolExecutor worker with the same
+    rules as parse_transactions, and the shard tables are concatenated in file
+    order, so the result equals parse_transactions(iter_sales_data(filename))
+    row for row.
+
+    Returns: TransactionTable of all parsed records
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return TransactionTable.empty()
+
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filename)
+    shards = max(1, min(workers, size // max(min_shard_bytes, 1)))
+
+    encoding = detect_encoding(filename)
+    tasks = [(filename, start, end, encoding)
+             for start, end in split_byte_ranges(filename, shards)]
+
+    if len(tasks) <= 1:
+        # Small input: parse in-process
+        return TransactionTable.concat([_parse_shard(task) for task in tasks])
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        # map() yields results in submission order, i.e. file order
+        tables = list(executor.map(_parse_shard, tasks))
+
+    return TransactionTable.concat(tables)
+
+
+# In[ ]:
+
+
+
+
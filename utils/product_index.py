@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import hashlib
+import json
+import os
+import re
+
+from utils.api_handler import create_product_mapping, api_product_id
+
+MATCH_CACHE_FILE = 'data/product_match_cache.json'
+FUZZY_THRESHOLD = 0.6
+NGRAM_SIZE = 3
+
+def normalize_name(name):
+    """
+    Canonical form used for name joins: lower case, letters and digits only.
+    'Mouse,Wireless', 'MouseWireless' and 'mouse wireless' all become
+    'mousewireless'.
+    """
+    return re.sub(r'[^0-9a-z]', '', (name or '').lower())
+
+def catalog_version(api_products):
+    """Stable fingerprint of the catalog contents used to key cached matches."""
+    digest = hashlib.sha1()
+    for product in sorted(api_products, key=lambda p: str(p.get('id'))):
+        digest.update(f"{product.get('id')}\x1f{product.get('title')}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+def _ngrams(text, n=NGRAM_SIZE):
+    padded = f"^{text}$"
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+class ProductIndex:
+    """
+    Join index from sales rows (ProductID, ProductName) to catalog entries.
+
+    Matching tiers, cheapest first:
+    1. exact ID: 'P101' -> catalog id 101
+    2. exact normalized ProductName -> catalog title
+    3. fuzzy name match over a precomputed trigram index (Dice similarity)
+
+    Each (ProductID, ProductName) decision is memoized, and the decisions are
+    persisted per catalog version, so repeat rows and repeat runs are a
+    single dictionary lookup.
+    """
+
+    def __init__(self, api_products, cache_file=MATCH_CACHE_FILE, threshold=FUZZY_THRESHOLD):
+        self.version = catalog_version(api_products)
+        self.by_id = create_product_mapping(api_products)
+        self.threshold = threshold
+        self.cache_file = cache_file
+
+        self.by_name = {}
+        self.name_grams = {}
+        self.postings = {}
+        for product in api_products:
+            product_id = product.get('id')
+            name = normalize_name(product.get('title'))
+            if not name:
+                continue
+            self.by_name.setdefault(name, product_id)
+            grams = _ngrams(name)
+            self.name_grams[product_id] = grams
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(product_id)
+
+        self.decisions = self._load_decisions()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def match(self, product_id, product_name=None):
+        """
+        Returns: the catalog info dict (as in create_product_mapping) for the
+        sales row, or None if nothing matches
+        """
+        key = f"{product_id}|{product_name or ''}"
+        if key in self.decisions:
+            matched = self.decisions[key]
+        else:
+            matched = self._resolve(product_id, product_name)
+            self.decisions[key] = matched
+            self._dirty = True
+        return self.by_id.get(matched) if matched is not None else None
+
+    def _resolve(self, product_id, product_name):
+        # Tier 1: exact ID
+        numeric_id = api_product_id(product_id or '')
+        if numeric_id in self.by_id:
+            return numeric_id
+
+        name = normalize_name(product_name)
+        if not name:
+            return None
+
+        # Tier 2: exact normalized name
+        if name in self.by_name:
+            return self.by_name[name]
+
+        # Tier 3: fuzzy name via shared trigrams
+        grams = _ngrams(name)
+        shared = {}
+        for gram in grams:
+            for candidate in self.postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best, best_score = None, 0.0
+        for candidate, overlap in shared.items():
+            score = 2 * overlap / (len(grams) + len(self.name_grams[candidate]))
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= self.threshold else None
+
+    def _load_decisions(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == self.version:
+                return dict(cached.get('decisions', {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def save(self):
+        """Persists the match decisions if anything new was resolved."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp{os.getpid()}"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'decisions': self.decisions}, f)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError as e:
+            print(f"Error writing match cache {self.cache_file}: {e}")
+
+# Built indexes per (catalog version, match cache file), most recent last
+_indexes = {}
+MAX_CACHED_INDEXES = 4
+
+def build_product_index(api_products, cache_file=MATCH_CACHE_FILE):
+    """
+    Builds the join index once per catalog version: later calls with the
+    same catalog (e.g. once per file in batch mode) return the same index.
+    """
+    api_products = api_products or []
+    key = (catalog_version(api_products), cache_file)
+    index = _indexes.pop(key, None)
+    if index is None:
+        index = ProductIndex(api_products, cache_file=cache_file)
+        if len(_indexes) >= MAX_CACHED_INDEXES:
+            _indexes.pop(next(iter(_indexes)))
+    _indexes[key] = index
+    return index
+
+
+# In[ ]:
+
+
+
+
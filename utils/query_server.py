@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import urlsplit, parse_qs
+
+from utils.file_handler import detect_encoding, data_offset, iter_byte_range
+from utils.data_processor import (
+    parse_transactions, iter_valid_transactions, aggregate_transactions, new_aggregates,
+    merge_aggregates, _region_performance, _top_products, _customer_stats, _grain_trend,
+    _grain_peak, _low_performers
+)
+from utils.incremental import resume_offset, prefix_state
+from utils.sales_index import SalesIndex
+
+CHUNK_SIZE = 50000
+# Filtered aggregates kept between queries (cleared whenever the data changes)
+MAX_CACHED_FILTERS = 32
+# Seconds between checks of the source file for changes
+POLL_INTERVAL = 1.0
+
+class SalesDataset:
+    """
+    Validated transactions of one sales file, held in memory between queries.
+
+    The rows live in a SalesIndex and the unfiltered report aggregates are
+    kept up to date as rows arrive. Filtered aggregates are built from the
+    index on first use and cached per filter. When
+    the file grows and its processed prefix is unchanged, refresh() only
+    parses the appended rows, as run_incremental does; otherwise it reloads.
+
+    Queries hold `lock` while they read. refresh() reads the file without
+    it and only takes it to swap in what it read, so queries keep being
+    answered from the last good data while a reload or re-hash runs.
+    """
+
+    def __init__(self, filename, product_index=None):
+        self.filename = filename
+        self.product_index = product_index
+        self.lock = threading.Lock()
+        # Held by the one thread reading changes from the file
+        self._refresh_lock = threading.Lock()
+        self.reloads = 0
+        self.appends = 0
+        self._stat = None
+        self._checked = 0.0
+        self._load()
+
+    def _load(self):
+        """Reads the whole file into a new index, then serves it."""
+        encoding = detect_encoding(self.filename)
+        # Shared str objects for repeated values; dropped with the rows on reload
+        symbols = {}
+        valid, aggregates, parsed, state = self._read(data_offset(self.filename), encoding, symbols)
+        index = SalesIndex(valid)
+        # ProductName -> ProductID, for catalog lookups on name-keyed results
+        product_ids = {}
+        for t in valid:
+            product_ids.setdefault(t['ProductName'], t['ProductID'])
+        with self.lock:
+            self.index, self.aggregates, self.total_parsed = index, aggregates, parsed
+            self.encoding, self.symbols, self.state = encoding, symbols, state
+            self.product_ids = product_ids
+            self._filtered = {}
+            self.loaded_at = datetime.now().isoformat(timespec='seconds')
+            self.reloads += 1
+
+    def _append(self, start):
+        """Reads the rows appended from start, then adds them to the served data."""
+        valid, delta, parsed, state = self._read(start, self.encoding, self.symbols, self.state)
+        with self.lock:
+            merge_aggregates(self.aggregates, delta)
+            self.index.extend(valid)
+            for t in valid:
+                self.product_ids.setdefault(t['ProductName'], t['ProductID'])
+            self.total_parsed += parsed
+            self.state = state
+            self._filtered = {}
+            self.loaded_at = datetime.now().isoformat(timespec='seconds')
+            self.appends += 1
+
+    def _read(self, start, encoding, symbols, previous=None):
+        """
+        Parses, validates and aggregates the rows in [start, end of file).
+
+        Returns: (valid rows, their aggregates, rows parsed, prefix_state of
+        the file up to where it was read)
+        """
+        size = os.path.getsize(self.filename)
+        lines = iter_byte_range(self.filename, start, size, encoding)
+        valid, aggregates, total_parsed = [], new_aggregates(), 0
+        while True:
+            parsed = parse_transactions(islice(lines, CHUNK_SIZE), symbols=symbols)
+            if not parsed:
+                break
+            aggregate_transactions(iter_valid_transactions(parsed, None, None, None, valid),
+                                   aggregates)
+            total_parsed += len(parsed)
+        return valid, aggregates, total_parsed, prefix_state(self.filename, size, previous)
+
+    def refresh(self, force=False):
+        """
+        Picks up changes to the source file, checking at most every
+        POLL_INTERVAL seconds unless forced.
+
+        The file is unchanged only while its size and mtime match the loaded
+        state; otherwise the loaded prefix is re-hashed (see resume_offset)
+        and the data is either extended or reloaded. While another thread is
+        refreshing, an unforced call returns at once.
+
+        Returns: 'unchanged', 'appended' or 'reloaded'
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < POLL_INTERVAL:
+            return 'unchanged'
+        if not self._refresh_lock.acquire(blocking=force):
+            return 'unchanged'
+        try:
+            self._checked = now
+            try:
+                stat = os.stat(self.filename)
+            except OSError as e:
+                # Keep serving the last good data while the file is being replaced
+                print(f"Warning: cannot read {self.filename}: {e}")
+                return 'unchanged'
+            key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            if key == self._stat:
+                return 'unchanged'
+            self._stat = key
+            start = resume_offset(self.state, self.filename, stat.st_size)
+            if start is None:
+                self._load()
+                return 'reloaded'
+            if start == stat.st_size:
+                return 'unchanged'
+            self._append(start)
+            return 'appended'
+        finally:
+            self._refresh_lock.release()
+
+    def filtered(self, **filters):
+        """Report aggregates for the rows matching filters (see SalesIndex.select)."""
+        filters = {name: value for name, value in filters.items() if value}
+        if not filters:
+            return self.aggregates
+        key = tuple(sorted(filters.items()))
+        agg = self._filtered.get(key)
+        if agg is None:
+            if len(self._filtered) >= MAX_CACHED_FILTERS:
+                # Oldest filter first (dicts keep insertion order)
+                del self._filtered[next(iter(self._filtered))]
+            agg = self._filtered[key] = aggregate_transactions(self.index.filter(**filters))
+        return agg
+
+    def catalog_info(self, product_name):
+        """Catalog entry matched to a product name, or None without a catalog."""
+        return self.catalog_match(self.product_ids.get(product_name), product_name)
+
+    def catalog_match(self, product_id, product_name=None):
+        """Catalog entry for a ProductID and/or name, or None without a catalog."""
+        if self.product_index is None or not (product_id or product_name):
+            return None
+        return self.product_index.match(product_id, product_name)
+
+    def status(self):
+        return {
+            'source': self.filename,
+            'loaded_at': self.loaded_at,
+            'parsed': self.total_parsed,
+            'valid': len(self.index),
+            'invalid': self.total_parsed - len(self.index),
+            'reloads': self.reloads,
+            'appends': self.appends,
+            'cached_filters': len(self._filtered),
+            'catalog_products': len(self.product_index) if self.product_index is not None else 0,
+        }
+
+
+# In[ ]:
+
+
+def _product_rows(dataset, products):
+    return [{'product': name, 'quantity': qty, 'revenue': rev,
+             'catalog': dataset.catalog_info(name)}
+            for name, qty, rev in products]
+
+def _peak(agg, grain):
+    bucket, revenue, txns = _grain_peak(agg, grain)
+    return {'date': bucket, 'revenue': revenue, 'transaction_count': txns}
+
+# path -> (handler(dataset, aggregates, params), extra parameters with defaults of their type)
+QUERIES = {
+    '/regions': (lambda ds, agg, p: _region_performance(agg), {}),
+    '/top-products': (lambda ds, agg, p: _product_rows(ds, _top_products(agg, p['n'])), {'n': 5}),
+    '/top-customers': (lambda ds, agg, p: _customer_stats(agg, p['n']), {'n': 5}),
+    '/daily-trend': (lambda ds, agg, p: _grain_trend(agg, p['grain']), {'grain': 'day'}),
+    '/peak-day': (lambda ds, agg, p: _peak(agg, p['grain']), {'grain': 'day'}),
+    '/low-performers': (lambda ds, agg, p: _product_rows(ds, _low_performers(agg, p['threshold'])),
+                        {'threshold': 10}),
+}
+
+def parse_filters(query):
+    """
+    SalesIndex.select filters from a query string: region, product_id,
+    customer_id, start_date, end_date, min_amount and max_amount.
+    Raises ValueError for a non-numeric amount.
+    """
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    filters = {name: params.pop(name, None) or None
+               for name in ('region', 'product_id', 'customer_id', 'start_date', 'end_date')}
+    for name in ('min_amount', 'max_amount'):
+        value = params.pop(name, '')
+        filters[name] = float(value) if value else None
+    return filters, params
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    JSON GET endpoints over the server's SalesDataset:
+
+        /regions, /top-products?n=5, /top-customers?n=5, /low-performers?threshold=10
+        /daily-trend?grain=day, /peak-day?grain=day   grain: day, week or month
+        /product?id=P101[&name=...]   catalog entry matched to a product
+        /status                       row counts, reloads and cache size
+
+    The report queries take the validate_and_filter filters as parameters
+    (region, min_amount, max_amount), plus product_id, customer_id and an
+    inclusive start_date / end_date range.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SalesQueryServer/1.0'
+    # Headers and body are separate writes; with Nagle's algorithm on, each
+    # keep-alive response would wait ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        dataset = self.server.dataset
+        try:
+            filters, params = parse_filters(url.query)
+            dataset.refresh()
+            with dataset.lock:
+                if url.path == '/status':
+                    body = dataset.status()
+                elif url.path == '/product':
+                    body = dataset.catalog_match(params.get('id'), params.get('name'))
+                elif url.path in QUERIES:
+                    handler, defaults = QUERIES[url.path]
+                    options = {key: type(default)(params.get(key, default))
+                               for key, default in defaults.items()}
+                    body = handler(dataset, dataset.filtered(**filters), options)
+                else:
+                    self._send(404, {'error': f"unknown endpoint {url.path}",
+                                     'endpoints': sorted(QUERIES) + ['/product', '/status']})
+                    return
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        self._send(200, body)
+
+    def _send(self, code, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(filename, host='127.0.0.1', port=8765, product_index=None, verbose=False):
+    """
+    Loads filename and returns a ThreadingHTTPServer answering queries on it
+    (call serve_forever() to start). port 0 picks a free port.
+    """
+    dataset = SalesDataset(filename, product_index)
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.dataset = dataset
+    server.verbose = verbose
+    return server
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+REPORT_CACHE_DIR = 'data/report_cache'
+
+def dataset_fingerprint(transactions):
+    """
+    Content fingerprint of validated transactions, for callers that cannot
+    key the cache by their source file (see report_cache_key).
+    """
+    digest = hashlib.sha256()
+    for t in transactions:
+        digest.update(f"{t['TransactionID']}|{t['Date']}|{t['ProductID']}|{t['ProductName']}|"
+                      f"{t['Quantity']}|{t['UnitPrice']}|{t['CustomerID']}|{t['Region']}\n"
+                      .encode('utf-8'))
+    return digest.hexdigest()
+
+def report_cache_key(dataset, filters=None, catalog=None, **options):
+    """
+    Inputs that decide the report sections.
+
+    dataset: fingerprint of the validated input, e.g. file_version() of
+             the source (the rows follow from the file and the filters)
+             or dataset_fingerprint() of the rows
+    filters: the filter arguments the rows were selected with
+    catalog: product catalog version; only the enrichment section uses it
+    options: anything else that changes the figures (e.g. approximate)
+    """
+    return {'dataset': dataset, 'filters': filters or {}, 'catalog': catalog, 'options': options}
+
+class ReportCache:
+    """
+    Rendered report sections, keyed by section name plus the inputs it
+    depends on, so unchanged sections are reused and only the sections
+    whose inputs changed are recomputed.
+
+    Memory tier: LRU of up to max_entries sections.
+    Disk tier (optional, cache_dir): one JSON file per section, shared by
+    separate runs; beyond max_disk_entries the least recently used files
+    are removed.
+
+    Counters: hits (memory), disk_hits, misses and evictions, overall and
+    per section (see stats()).
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, max_disk_entries=1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.sections = {}
+
+    def get_or_compute(self, section, key, compute):
+        """Cached value of section for key, or compute() stored under it."""
+        digest = self._digest(section, key)
+        counts = self.sections.setdefault(section, {'hits': 0, 'misses': 0})
+
+        if digest in self.entries:
+            self.entries.move_to_end(digest)
+            self._count('hits', counts)
+            return self.entries[digest]
+
+        value = self._read(digest)
+        if value is not None:
+            self._count('disk_hits', counts)
+        else:
+            value = compute()
+            counts['misses'] += 1
+            self.counters['misses'] += 1
+            self._write(digest, value)
+        self.entries[digest] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+        return value
+
+    def has(self, section, key):
+        """Whether section is cached for key, in memory or on disk (not counted)."""
+        digest = self._digest(section, key)
+        return digest in self.entries or (
+            self.cache_dir is not None and os.path.exists(self._path(digest)))
+
+    @staticmethod
+    def _digest(section, key):
+        return hashlib.sha256(
+            json.dumps([section, key], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _count(self, counter, counts):
+        self.counters[counter] += 1
+        counts['hits'] += 1
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read(self, digest):
+        if self.cache_dir is None:
+            return None
+        path = self._path(digest)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            # Modification time doubles as the last-use time for pruning
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, digest, value):
+        if self.cache_dir is None:
+            return
+        path = self._path(digest)
+        tmp_file = f"{path}.tmp{os.getpid()}"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_file, path)
+            self._prune()
+        except OSError as e:
+            print(f"Error writing report cache {path}: {e}")
+
+    def _prune(self):
+        files = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.json')]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+                self.counters['evictions'] += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        """{'hits', 'disk_hits', 'misses', 'evictions', 'entries', 'sections': {name: {'hits', 'misses'}}}"""
+        return dict(self.counters, entries=len(self.entries),
+                    sections={name: dict(counts) for name, counts in self.sections.items()})
+
+    def clear(self):
+        """Drops the memory tier (the disk tier is left alone)."""
+        self.entries.clear()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import json
+import os
+from datetime import date
+
+from utils.file_handler import file_version
+from utils.sketches import HyperLogLog, hash64
+
+CUBE_FILE = 'data/sales_cube.json'
+CUBE_VERSION = 2
+# Base cells and the per-product views live in CUBE_FILE + CELLS_SUFFIX, read
+# only when a query or change needs them (see load_cube)
+CELLS_SUFFIX = '.cells'
+GRAINS = ('day', 'week', 'month', 'all')
+# Marker for "every region" / "every product" in rolled-up cells
+ALL = '*'
+
+class RollupCube:
+    """
+    Pre-aggregated sales keyed by (date bucket, Region, ProductName).
+
+    Every cell holds [revenue, quantity, transaction_count, HyperLogLog of
+    CustomerIDs]. Rows only ever touch the base (day, region, product)
+    cells; the day/week/month/all views, including the ALL rollups over
+    region and/or product, are derived from the base cells on the first
+    query after a change and persisted with them. Queries are then lookups
+    over a few hundred cells, whatever the number of raw rows.
+
+    Buckets: day 'YYYY-MM-DD', week ISO 'YYYY-Www', month 'YYYY-MM', all '*'.
+    Dates that do not parse keep their raw text in every grain.
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        # {(day, region, product): [revenue, quantity, count, HyperLogLog]}
+        self.base = {}
+        # {(grain, by_region, by_product): {(bucket, region, product): cell}},
+        # cells carry a fifth slot memoizing the sketch's estimate
+        self.views = None
+        self.meta = {}
+        # Persisted base cells not decoded yet (see load_cube)
+        self._stored_base = None
+        # (path, generation) of the cells file a loaded cube has not read yet
+        self._pending_cells = None
+
+    def add(self, transactions):
+        """Adds validated transactions (records or a TransactionTable)."""
+        base = self._decoded_base()
+        precision = self.precision
+        hashes = {}
+        for t in transactions:
+            key = (t['Date'], t['Region'], t['ProductName'])
+            cell = base.get(key)
+            if cell is None:
+                cell = base[key] = [0.0, 0, 0, HyperLogLog(precision)]
+            qty = t['Quantity']
+            cell[0] += qty * t['UnitPrice']
+            cell[1] += qty
+            cell[2] += 1
+            customer = t['CustomerID']
+            hashed = hashes.get(customer)
+            if hashed is None:
+                hashed = hashes[customer] = hash64(customer)
+            cell[3].add_hash(hashed)
+        self.views = None
+        return self
+
+    def merge(self, other):
+        """Folds another cube (e.g. another shard or file) into this one."""
+        self._decoded_base()
+        for key, (revenue, qty, txns, sketch) in other._decoded_base().items():
+            cell = self.base.get(key)
+            if cell is None:
+                self.base[key] = [revenue, qty, txns, sketch.copy()]
+            else:
+                cell[0] += revenue
+                cell[1] += qty
+                cell[2] += txns
+                cell[3].merge(sketch)
+        self.views = None
+        return self
+
+    def _decoded_base(self):
+        self._load_cells()
+        if self._stored_base is not None:
+            self.base = {tuple(key): [revenue, qty, txns, HyperLogLog.from_json(sketch)]
+                         for key, revenue, qty, txns, sketch in self._stored_base}
+            self._stored_base = None
+        return self.base
+
+    def _build_views(self):
+        # Day views from the base cells, coarser grains from the day views
+        # (month for 'all'), so every level merges the fewest cells it can
+        combos = [(True, True), (True, False), (False, True), (False, False)]
+        views = {('day',) + combo: {} for combo in combos}
+        for (day, region, product), cell in self._decoded_base().items():
+            views[('day', True, True)][(day, region, product)] = cell[:4] + [None]
+            _fold(views[('day', True, False)], (day, region, ALL), cell)
+            _fold(views[('day', False, True)], (day, ALL, product), cell)
+            _fold(views[('day', False, False)], (day, ALL, ALL), cell)
+
+        buckets = {}
+        for grain, source, position in (('week', 'day', 1), ('month', 'day', 2), ('all', 'month', 3)):
+            for combo in combos:
+                view = views[(grain,) + combo] = {}
+                for (bucket, region, product), cell in views[(source,) + combo].items():
+                    keys = buckets.get(bucket)
+                    if keys is None:
+                        keys = buckets[bucket] = date_buckets(bucket)
+                    _fold(view, (keys[position], region, product), cell)
+        self.views = views
+
+    def cells(self, grain='day', region=None, product=None, by_region=False, by_product=False):
+        """
+        {(bucket, region, product): (revenue, quantity, count, unique_customers)}
+        for one grain, optionally restricted to a region and/or product and
+        broken down by region/product (otherwise those are ALL).
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"unknown grain {grain!r}; expected one of {GRAINS}")
+        view_key = (grain, by_region or region is not None, by_product or product is not None)
+        if self.views is not None and view_key not in self.views:
+            self._load_cells()
+        if self.views is None:
+            self._build_views()
+        view = self.views.get(view_key, {})
+        result = {}
+        for key, cell in view.items():
+            if (region is None or key[1] == region) and (product is None or key[2] == product):
+                if cell[4] is None:
+                    cell[4] = cell[3].count()
+                result[key] = (cell[0], cell[1], cell[2], cell[4])
+        return result
+
+    def trend(self, grain='day', region=None, product=None):
+        """
+        {bucket: {'revenue', 'quantity', 'transaction_count', 'unique_customers'}}
+        in bucket order. unique_customers is a HyperLogLog estimate.
+        """
+        return {
+            bucket: {'revenue': revenue, 'quantity': qty, 'transaction_count': txns,
+                     'unique_customers': unique}
+            for (bucket, _, _), (revenue, qty, txns, unique)
+            in sorted(self.cells(grain, region, product).items())
+        }
+
+    def peak(self, grain='day', region=None, product=None):
+        """(bucket, revenue, transaction_count) of the highest-revenue bucket."""
+        cells = self.cells(grain, region, product)
+        if not cells:
+            return None, 0.0, 0
+        (bucket, _, _), (revenue, _, txns, _) = max(cells.items(), key=lambda item: item[1][0])
+        return bucket, revenue, txns
+
+    def regions(self, bucket=None, grain='all'):
+        """{Region: [total_sales, transaction_count]} for one bucket (default: everything)."""
+        return {
+            region: [revenue, txns]
+            for (b, region, _), (revenue, _, txns, _) in self.cells(grain, by_region=True).items()
+            if bucket is None or b == bucket
+        }
+
+    def total(self):
+        """(revenue, transaction_count) over the whole cube."""
+        revenue, _, txns, _ = self.cells('all').get((ALL, ALL, ALL), (0.0, 0, 0, 0))
+        return revenue, txns
+
+    def _load_cells(self):
+        if self._pending_cells is None:
+            return
+        path, generation = self._pending_cells
+        self._pending_cells = None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('generation') != generation:
+            raise ValueError(f"rollup cube cells {path} do not belong to this cube")
+        self._stored_base = data['base']
+        self.views.update(_decode_views(data['views']))
+
+    def save(self, path=CUBE_FILE):
+        """
+        Persists the base cells (with their sketches) and the views with
+        their estimates already counted, so a loaded cube answers queries
+        without touching a sketch. Views without a product breakdown (a few
+        cells per bucket) go in path itself; the base cells and per-product
+        views go in path + CELLS_SUFFIX.
+        """
+        self._load_cells()
+        if self.views is None:
+            self._build_views()
+        for view in self.views.values():
+            for cell in view.values():
+                if cell[4] is None:
+                    cell[4] = cell[3].count()
+        generation = os.urandom(8).hex()
+        views = {False: [], True: []}
+        for (grain, by_region, by_product), view in self.views.items():
+            views[by_product].append([[grain, by_region, by_product], [
+                [list(key), cell[0], cell[1], cell[2], cell[4]] for key, cell in view.items()]])
+        cells = {
+            'generation': generation,
+            'base': self._stored_base if self._stored_base is not None else [
+                [list(key), revenue, qty, txns, sketch.to_json()]
+                for key, (revenue, qty, txns, sketch) in self.base.items()],
+            'views': views[True],
+        }
+        data = {
+            'version': CUBE_VERSION,
+            'generation': generation,
+            'precision': self.precision,
+            'meta': self.meta,
+            'views': views[False],
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            # Cells first: a cube file never points at cells older than itself
+            _write_json(path + CELLS_SUFFIX, cells)
+            _write_json(path, data)
+        except OSError as e:
+            print(f"Error writing rollup cube {path}: {e}")
+
+def _write_json(path, data):
+    tmp_file = f"{path}.tmp{os.getpid()}"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        # dumps() runs the C encoder; dump() would stream through the Python one
+        f.write(json.dumps(data, separators=(',', ':')))
+    os.replace(tmp_file, path)
+
+def _decode_views(views):
+    # Views only need their totals and estimates to answer queries; they
+    # are rebuilt from the base sketches after the next add() or merge()
+    return {tuple(view_key): {tuple(key): [revenue, qty, txns, None, unique]
+                              for key, revenue, qty, txns, unique in cells}
+            for view_key, cells in views}
+
+def load_cube(path=CUBE_FILE):
+    """
+    Loads a cube written by RollupCube.save, or returns None if unusable.
+
+    Only the views without a product breakdown are read here. The cells
+    file is read on the first query by product and its base sketches are
+    decoded only when the cube changes (add/merge).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CUBE_VERSION:
+            return None
+        cube = RollupCube(data['precision'])
+        cube.meta = data.get('meta', {})
+        cube.views = _decode_views(data['views'])
+        cube._pending_cells = (path + CELLS_SUFFIX, data['generation'])
+        return cube
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Warning: ignoring rollup cube {path}: {e}")
+        return None
+
+def build_cube(transactions, precision=12):
+    """Builds a cube from validated transactions."""
+    return RollupCube(precision).add(transactions)
+
+def cube_key(source_file, filters=None):
+    """What a persisted cube is valid for: the source file version and filters."""
+    return {'source': file_version(source_file), 'filters': filters or {}}
+
+def load_saved_cube(source_file, filters=None, path=CUBE_FILE):
+    """
+    Returns the persisted cube if it was built from the current version of
+    source_file (see file_version) with the same filters, else None. Needs
+    no transactions, so callers can check it before processing the rows.
+    """
+    cube = load_cube(path) if os.path.exists(path) else None
+    if cube is not None and cube.meta == cube_key(source_file, filters):
+        return cube
+    return None
+
+def save_new_cube(source_file, transactions, filters=None, path=CUBE_FILE):
+    """Builds a cube from transactions and saves it keyed by cube_key."""
+    cube = build_cube(transactions)
+    cube.meta = cube_key(source_file, filters)
+    cube.save(path)
+    return cube
+
+def _fold(view, key, cell):
+    target = view.get(key)
+    if target is None:
+        view[key] = [cell[0], cell[1], cell[2], cell[3].copy(), None]
+    else:
+        target[0] += cell[0]
+        target[1] += cell[1]
+        target[2] += cell[2]
+        target[3].merge(cell[3])
+
+def date_buckets(day):
+    """(day, week, month, all) buckets of a 'YYYY-MM-DD' date string."""
+    try:
+        parsed = date.fromisoformat(day)
+    except (TypeError, ValueError):
+        return day, day, day, ALL
+    year, week, _ = parsed.isocalendar()
+    return day, f"{year}-W{week:02d}", day[:7], ALL
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Fields with a posting list per value
+INDEXED_FIELDS = ('Region', 'ProductID', 'CustomerID')
+_NO_ROWS = array('q')
+
+class SalesIndex:
+    """
+    Validated transactions with secondary indexes for filtered analytics.
+
+    postings: {field: {value: array of row numbers}} for Region, ProductID
+              and CustomerID, in row order
+    revenue:  Quantity * UnitPrice per row, computed once
+    Date and revenue also get row numbers sorted by value, so a range is two
+    bisects; these are built on the first range query after rows are added.
+
+    select() drives from the most selective predicate (posting lengths and
+    range widths are known without touching any row) and checks the others
+    on those rows only, so a selective filter costs time proportional to
+    the rows it matches rather than to the dataset.
+    """
+
+    def __init__(self, transactions=()):
+        self.records = []
+        self.revenue = array('d')
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        # {'Date' | 'revenue': (sorted keys, row numbers in that order)}
+        self._sorted = {}
+        self.extend(transactions)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def extend(self, transactions):
+        """Appends validated transactions (records or a TransactionTable)."""
+        records, revenue = self.records, self.revenue
+        postings = [(field, self.postings[field]) for field in INDEXED_FIELDS]
+        for t in transactions:
+            row = len(records)
+            records.append(t)
+            revenue.append(t['Quantity'] * t['UnitPrice'])
+            for field, index in postings:
+                rows = index.get(t[field])
+                if rows is None:
+                    rows = index[t[field]] = array('q')
+                rows.append(row)
+        self._sorted = {}
+        return self
+
+    def _bounds(self, name, low, high):
+        """(row numbers sorted by name, start, end) of the rows in [low, high]."""
+        index = self._sorted.get(name)
+        if index is None:
+            if name == 'Date':
+                keys = [t['Date'] for t in self.records]
+            else:
+                keys = self.revenue
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            if name == 'Date':
+                index = ([keys[row] for row in order], array('q', order))
+            else:
+                index = (array('d', [keys[row] for row in order]), array('q', order))
+            self._sorted[name] = index
+        keys, order = index
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return order, start, max(start, end)
+
+    def select(self, region=None, min_amount=None, max_amount=None, product_id=None,
+               customer_id=None, start_date=None, end_date=None):
+        """
+        Row numbers, ascending, of the rows matching every given predicate.
+
+        region, min_amount and max_amount behave as in validate_and_filter:
+        falsy values are ignored and amounts are inclusive bounds on
+        Quantity * UnitPrice. start_date / end_date are inclusive
+        'YYYY-MM-DD' bounds.
+        """
+        records, revenue = self.records, self.revenue
+        # (matching rows, rows or range slice, test for one row)
+        predicates = []
+        for field, value in (('Region', region), ('ProductID', product_id),
+                             ('CustomerID', customer_id)):
+            if value:
+                rows = self.postings[field].get(value, _NO_ROWS)
+                predicates.append((len(rows), rows,
+                                   lambda row, field=field, value=value: records[row][field] == value))
+        if start_date or end_date:
+            first, last = start_date or None, end_date or None
+            order, start, end = self._bounds('Date', first, last)
+            predicates.append((end - start, (order, start, end), lambda row: (
+                (first is None or records[row]['Date'] >= first) and
+                (last is None or records[row]['Date'] <= last))))
+        if min_amount or max_amount:
+            low, high = min_amount or None, max_amount or None
+            order, start, end = self._bounds('revenue', low, high)
+            predicates.append((end - start, (order, start, end), lambda row: (
+                (low is None or revenue[row] >= low) and (high is None or revenue[row] <= high))))
+
+        if not predicates:
+            return range(len(records))
+        predicates.sort(key=lambda predicate: predicate[0])
+        size, rows, _ = predicates[0]
+        if not size:
+            return []
+        ranged = isinstance(rows, tuple)
+        if ranged:
+            order, start, end = rows
+            rows = order[start:end]
+        for _, _, test in predicates[1:]:
+            rows = [row for row in rows if test(row)]
+        # Posting lists are in row order already; range slices are in key order
+        return sorted(rows) if ranged else list(rows)
+
+    def filter(self, **predicates):
+        """The matching records in row order (see select for the predicates)."""
+        records = self.records
+        return [records[row] for row in self.select(**predicates)]
+
+    def count(self, **predicates):
+        return len(self.select(**predicates))
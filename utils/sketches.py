@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+import base64
+import hashlib
+import math
+
+_numpy_module = False
+
+def _numpy():
+    """
+    numpy, or None when it is not installed. Imported on the first merge of
+    dense sketches (the only place it helps), not when the module loads.
+    """
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy as np
+        except ImportError:  # numpy only speeds up merging dense sketches
+            np = None
+        _numpy_module = np
+    return _numpy_module
+
+def hash64(value):
+    """
+    Stable 64-bit hash of a string. Unlike hash(), it is the same in every
+    process and run, so sketches built in different places can be merged.
+    """
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision registers (relative error
+    about 1.04 / sqrt(2**precision): 1.6% at the default precision 12).
+
+    Small sketches are kept sparse ({register: rank}) and switch to a dense
+    bytearray once that would be smaller, so a rollup with many small cells
+    does not pay for a full register array per cell.
+    """
+
+    __slots__ = ('precision', 'sparse', 'dense')
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.sparse = {}
+        self.dense = None
+
+    def add(self, value):
+        """Adds a string value."""
+        self.add_hash(hash64(value))
+
+    def add_hash(self, hashed):
+        """Adds a value already hashed with hash64()."""
+        p = self.precision
+        index = hashed >> (64 - p)
+        rest = hashed & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if self.dense is not None:
+            if rank > self.dense[index]:
+                self.dense[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > (1 << p) // 32:
+                self._densify()
+
+    def _densify(self):
+        dense = bytearray(1 << self.precision)
+        for index, rank in self.sparse.items():
+            dense[index] = rank
+        self.dense = dense
+        self.sparse = {}
+
+    def merge(self, other):
+        """Folds another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        if other.dense is not None:
+            if self.dense is None:
+                self._densify()
+            np = _numpy()
+            if np is not None:
+                registers = np.frombuffer(self.dense, dtype=np.uint8)
+                np.maximum(registers, np.frombuffer(other.dense, dtype=np.uint8), out=registers)
+            else:
+                self.dense = bytearray(map(max, self.dense, other.dense))
+        elif self.dense is not None:
+            dense = self.dense
+            for index, rank in other.sparse.items():
+                if rank > dense[index]:
+                    dense[index] = rank
+        else:
+            sparse = self.sparse
+            for index, rank in other.sparse.items():
+                if rank > sparse.get(index, 0):
+                    sparse[index] = rank
+            if len(sparse) > (1 << self.precision) // 32:
+                self._densify()
+        return self
+
+    def copy(self):
+        clone = HyperLogLog(self.precision)
+        clone.sparse = dict(self.sparse)
+        clone.dense = None if self.dense is None else bytearray(self.dense)
+        return clone
+
+    def count(self):
+        """Estimated number of distinct values added."""
+        m = 1 << self.precision
+        if self.dense is None:
+            zeros = m - len(self.sparse)
+            total = zeros + sum(2.0 ** -rank for rank in self.sparse.values())
+        else:
+            # Histogram of register values with C-level counts, not a Python loop
+            dense = self.dense
+            zeros = dense.count(0)
+            total = sum(dense.count(rank) * 2.0 ** -rank
+                        for rank in range(65 - self.precision + 1))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / total
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate while registers are empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+    def to_json(self):
+        """JSON-serializable form (see from_json)."""
+        if self.dense is not None:
+            return {'p': self.precision, 'dense': base64.b64encode(bytes(self.dense)).decode('ascii')}
+        return {'p': self.precision, 'sparse': [x for item in self.sparse.items() for x in item]}
+
+    @classmethod
+    def from_json(cls, data):
+        sketch = cls(data['p'])
+        if 'dense' in data:
+            sketch.dense = bytearray(base64.b64decode(data['dense']))
+        else:
+            pairs = data['sparse']
+            sketch.sparse = dict(zip(pairs[0::2], pairs[1::2]))
+        return sketch
+
+    @classmethod
+    def for_error(cls, relative_error):
+        """Smallest sketch whose standard error is at most relative_error."""
+        return cls(hll_precision(relative_error))
+
+def hll_precision(relative_error):
+    """Register-count exponent giving a standard error of relative_error."""
+    return min(18, max(4, math.ceil(math.log2((1.04 / relative_error) ** 2))))
+
+
+# In[ ]:
+
+
+import heapq
+from array import array
+
+class CountMinSketch:
+    """
+    Approximate per-key totals in a fixed depth x width table of counters.
+
+    Estimates never undercount; with probability 1 - delta they overcount
+    by at most epsilon * (sum of everything added), for width e / epsilon
+    and depth ln(1 / delta). Sketches of equal shape add up cell by cell.
+    """
+
+    __slots__ = ('width', 'depth', 'table', 'total')
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.table = [array('d', bytes(8 * width)) for _ in range(depth)]
+        self.total = 0.0
+
+    @classmethod
+    def for_error(cls, epsilon, delta):
+        return cls(math.ceil(math.e / epsilon), max(1, math.ceil(math.log(1 / delta))))
+
+    def _columns(self, hashed):
+        # Double hashing: row i uses h1 + i * h2
+        h1, h2 = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, key, value=1):
+        self.add_hash(hash64(key), value)
+
+    def add_hash(self, hashed, value=1):
+        # _columns() inlined: this runs once per row
+        h1, h2 = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        width = self.width
+        for row in self.table:
+            row[h1 % width] += value
+            h1 += h2
+        self.total += value
+
+    def estimate(self, key):
+        return min(row[column] for row, column in zip(self.table, self._columns(hash64(key))))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge Count-Min sketches of different shape")
+        np = _numpy()
+        for row, other_row in zip(self.table, other.table):
+            if np is not None:
+                counters = np.frombuffer(row, dtype=np.float64)
+                np.add(counters, np.frombuffer(other_row, dtype=np.float64), out=counters)
+            else:
+                row[:] = array('d', map(sum, zip(row, other_row)))
+        self.total += other.total
+        return self
+
+    def to_json(self):
+        return {'width': self.width, 'depth': self.depth, 'total': self.total,
+                'table': [base64.b64encode(row.tobytes()).decode('ascii') for row in self.table]}
+
+    @classmethod
+    def from_json(cls, data):
+        sketch = cls(data['width'], data['depth'])
+        sketch.total = data['total']
+        for row, encoded in zip(sketch.table, data['table']):
+            row[:] = array('d', base64.b64decode(encoded))
+        return sketch
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary: the heaviest keys of a stream in at most
+    `capacity` counters.
+
+    counters maps key -> [estimate, error]. Every estimate overcounts by at
+    most its error, and error <= total / capacity, so any key heavier than
+    total / capacity is guaranteed to be monitored. Summaries merge by
+    adding counters (a key missing from a full summary is charged that
+    summary's smallest counter) and keeping the heaviest `capacity`.
+    """
+
+    __slots__ = ('capacity', 'counters', 'heap', 'total')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}
+        # (estimate, key) per monitored key; entries go stale as estimates
+        # grow and are refreshed lazily when they reach the top
+        self.heap = []
+        self.total = 0.0
+
+    @classmethod
+    def for_error(cls, epsilon):
+        return cls(math.ceil(1 / epsilon))
+
+    def add(self, key, weight=1):
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0.0]
+            heapq.heappush(self.heap, (weight, key))
+            return
+        # Evict the smallest counter; the newcomer inherits it as error
+        heap, counters = self.heap, self.counters
+        while True:
+            estimate, smallest = heap[0]
+            current = counters[smallest][0]
+            if current == estimate:
+                break
+            heapq.heapreplace(heap, (current, smallest))
+        del counters[smallest]
+        counters[key] = [estimate + weight, estimate]
+        heapq.heapreplace(heap, (estimate + weight, key))
+
+    def minimum(self):
+        """Smallest monitored estimate (0 while not full)."""
+        if len(self.counters) < self.capacity:
+            return 0.0
+        return min(counter[0] for counter in self.counters.values())
+
+    def top(self, n=None):
+        """[(key, estimate, error)] heaviest first."""
+        ordered = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, estimate, error) for key, (estimate, error) in ordered[:n]]
+
+    def merge(self, other):
+        mine, theirs = self.minimum(), other.minimum()
+        merged = {}
+        for key, (estimate, error) in self.counters.items():
+            extra = other.counters.get(key, (theirs, theirs))
+            merged[key] = [estimate + extra[0], error + extra[1]]
+        for key, (estimate, error) in other.counters.items():
+            if key not in merged:
+                merged[key] = [estimate + mine, error + mine]
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0])
+        self.counters = dict(kept)
+        self.heap = [(counter[0], key) for key, counter in kept]
+        heapq.heapify(self.heap)
+        self.total += other.total
+        return self
+
+    def to_json(self):
+        return {'capacity': self.capacity, 'total': self.total,
+                'counters': [[key, estimate, error] for key, (estimate, error) in self.counters.items()]}
+
+    @classmethod
+    def from_json(cls, data):
+        summary = cls(data['capacity'])
+        summary.total = data['total']
+        summary.counters = {key: [estimate, error] for key, estimate, error in data['counters']}
+        summary.heap = [(counter[0], key) for key, counter in summary.counters.items()]
+        heapq.heapify(summary.heap)
+        return summary
@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# In[ ]:
+
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the columnar code path
+    np = None
+
+# Field order of the pipe-delimited sales file
+FIELDS = ['TransactionID', 'Date', 'ProductID', 'ProductName',
+          'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+
+# Text fields stored as dictionary-encoded integer codes
+CATEGORICAL_FIELDS = ['TransactionID', 'Date', 'ProductID', 'ProductName',
+                      'CustomerID', 'Region']
+
+# Longest TransactionID suffix kept as an integer (fits in int64)
+MAX_ID_DIGITS = 18
+
+class TransactionTable:
+    """
+    Columnar, NumPy-backed store of parsed transactions.
+
+    Quantity and UnitPrice are int64/float64 arrays. Every text field is
+    dictionary-encoded: codes[field] is an int32 array of row codes and
+    categories[field] is the array of distinct values those codes index,
+    stored as UTF-8 bytes ('S'); labels() decodes them.
+
+    TransactionID is unique per row, so it is not given a dictionary entry
+    per row: it is split into a prefix (the categorical part, e.g. 'T' or
+    'T00') and transaction_numbers, the integer suffix (-1 when there is
+    none), so that prefix + str(number) is the original ID.
+
+    The constructor also accepts TransactionID codes into categories of
+    whole IDs (transaction_numbers=None) and splits them.
+    """
+
+    def __init__(self, codes, categories, quantity, unit_price, transaction_numbers=None):
+        if np is None:
+            raise ImportError("TransactionTable requires numpy (pip install numpy)")
+        self.codes = {f: np.asarray(codes[f], dtype=np.int32) for f in CATEGORICAL_FIELDS}
+        self.categories = {f: _as_bytes(categories[f]) for f in CATEGORICAL_FIELDS}
+        self.quantity = np.asarray(quantity, dtype=np.int64)
+        self.unit_price = np.asarray(unit_price, dtype=np.float64)
+        if transaction_numbers is None:
+            prefixes, prefix_codes, numbers = split_transaction_ids(self.categories['TransactionID'])
+            ids = self.codes['TransactionID']
+            self.categories['TransactionID'] = prefixes
+            self.codes['TransactionID'] = prefix_codes[ids]
+            transaction_numbers = numbers[ids]
+        self.transaction_numbers = np.asarray(transaction_numbers, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __iter__(self):
+        # Dict-style rows keep list-of-dict consumers (enrichment, saving) working
+        return iter(self.to_records())
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column and category arrays."""
+        total = self.quantity.nbytes + self.unit_price.nbytes + self.transaction_numbers.nbytes
+        for field in CATEGORICAL_FIELDS:
+            total += self.codes[field].nbytes + self.categories[field].nbytes
+        return total
+
+    def labels(self, field, index=None):
+        """Decoded (str) categories of field, optionally indexed by codes or a mask."""
+        values = self.categories[field]
+        if index is not None:
+            values = values[index]
+        return np.char.decode(values, 'utf-8') if len(values) else values.astype(str)
+
+    def revenue(self):
+        """Quantity * UnitPrice for every row."""
+        return self.quantity * self.unit_price
+
+    def column(self, field):
+        """Returns the decoded values of one field as an array."""
+        if field == 'Quantity':
+            return self.quantity
+        if field == 'UnitPrice':
+            return self.unit_price
+        if field == 'TransactionID':
+            numbers = self.transaction_numbers
+            suffixes = np.where(numbers >= 0, numbers.astype(str), '')
+            return np.char.add(self.labels(field, self.codes[field]), suffixes)
+        return self.labels(field, self.codes[field])
+
+    def category_mask(self, field, predicate):
+        """
+        Evaluates predicate once per distinct value of field and broadcasts
+        the result to every row through the codes.
+        """
+        per_category = np.array([bool(predicate(v.decode('utf-8')))
+                                 for v in self.categories[field].tolist()], dtype=bool)
+        if not len(per_category):
+            return np.zeros(len(self), dtype=bool)
+        return per_category[self.codes[field]]
+
+    def take(self, rows):
+        """Returns a new table with the selected rows (mask or indices)."""
+        return TransactionTable(
+            {f: self.codes[f][rows] for f in CATEGORICAL_FIELDS},
+            self.categories,
+            self.quantity[rows],
+            self.unit_price[rows],
+            self.transaction_numbers[rows],
+        )
+
+    def group_sum(self, field, values):
+        """
+        Sums values per distinct value of field.
+
+        Returns: (categories in first-appearance order, sums) for the values
+        that occur in this table
+        """
+        codes = self.codes[field]
+        present, first_row = np.unique(codes, return_index=True)
+        order = present[np.argsort(first_row, kind='stable')]
+        sums = np.bincount(codes, weights=values, minlength=len(self.categories[field]))
+        return self.labels(field, order), sums[order]
+
+    def group_stats(self, field, *values):
+        """
+        Row counts and sums of each values array per distinct value of field,
+        with a single unique/ordering pass shared by all of them.
+
+        Returns: (categories in first-appearance order, counts, [sums, ...])
+        """
+        codes = self.codes[field]
+        size = len(self.categories[field])
+        present, first_row = np.unique(codes, return_index=True)
+        order = present[np.argsort(first_row, kind='stable')]
+        counts = np.bincount(codes, minlength=size)[order]
+        sums = [np.bincount(codes, weights=v, minlength=size)[order] for v in values]
+        return self.labels(field, order), counts, sums
+
+    def unique_pairs_per(self, field, other):
+        """
+        Number of distinct `other` values per value of field (e.g. unique
+        customers per day).
+
+        Returns: dictionary {value of field: distinct count}
+        """
+        if not len(self):
+            return {}
+        n_other = len(self.categories[other])
+        pairs = sorted_unique(self.codes[field].astype(np.int64) * n_other + self.codes[other])
+        counts = np.bincount(pairs // n_other, minlength=len(self.categories[field]))
+        present = np.flatnonzero(counts)
+        return dict(zip(self.labels(field, present).tolist(), counts[present].tolist()))
+
+    def to_records(self):
+        """Converts the table back to the list-of-dicts format of parse_transactions."""
+        columns = [self.column(f).tolist() for f in FIELDS]
+        return [dict(zip(FIELDS, row)) for row in zip(*columns)]
+
+    @classmethod
+    def concat(cls, tables):
+        """Concatenates tables, re-encoding codes onto merged categories."""
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        codes, categories = {}, {}
+        for field in CATEGORICAL_FIELDS:
+            merged, inverse = np.unique(
+                np.concatenate([t.categories[field] for t in tables]), return_inverse=True
+            )
+            parts, offset = [], 0
+            for t in tables:
+                remap = inverse[offset:offset + len(t.categories[field])]
+                parts.append(remap[t.codes[field]])
+                offset += len(t.categories[field])
+            codes[field] = np.concatenate(parts)
+            categories[field] = merged
+        return cls(
+            codes, categories,
+            np.concatenate([t.quantity for t in tables]),
+            np.concatenate([t.unit_price for t in tables]),
+            np.concatenate([t.transaction_numbers for t in tables]),
+        )
+
+    @classmethod
+    def empty(cls):
+        return cls({f: [] for f in CATEGORICAL_FIELDS}, {f: [] for f in CATEGORICAL_FIELDS},
+                   [], [], [])
+
+
+def _as_bytes(values):
+    """Category values as a UTF-8 'S' array (str values are encoded)."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'S':
+        return values
+    if not len(values):
+        return np.array([], dtype='S1')
+    return np.char.encode(values.astype(str), 'utf-8')
+
+def split_transaction_id(value):
+    """
+    'T00042' -> ('T000', 42): the prefix and the integer suffix of an ID,
+    with prefix + str(number) == value. (value, -1) when there is no
+    numeric suffix or it is too long for int64.
+    """
+    digits = value[len(value.rstrip('0123456789')):]
+    number = digits.lstrip('0') or digits[-1:]
+    if not number or len(number) > MAX_ID_DIGITS:
+        return value, -1
+    return value[:len(value) - len(number)], int(number)
+
+def split_transaction_ids(ids):
+    """
+    Vectorized split_transaction_id over an 'S' array of IDs, scanning one
+    byte column at a time.
+
+    Returns: (sorted distinct prefixes, prefix code per ID, number per ID)
+    """
+    if not len(ids):
+        return np.array([], dtype='S1'), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+    width = ids.dtype.itemsize
+    matrix = np.ascontiguousarray(ids).view(np.uint8).reshape(len(ids), width)
+    lengths = np.char.str_len(ids)
+    columns = [(j, matrix[:, j], j < lengths) for j in range(width)]
+
+    # Trailing digit run: everything after the last non-digit
+    run_start = np.zeros(len(ids), dtype=np.int64)
+    for j, column, inside in columns:
+        run_start[inside & ((column < ord('0')) | (column > ord('9')))] = j + 1
+    # The number starts at the run's first non-zero digit (its last digit if all zeros)
+    start = lengths - 1
+    for j, column, inside in reversed(columns):
+        start[inside & (column != ord('0')) & (j >= run_start)] = j
+    ok = (run_start < lengths) & (lengths - start <= MAX_ID_DIGITS)
+
+    numbers = np.zeros(len(ids), dtype=np.int64)
+    for j, column, inside in columns:
+        digit = ok & inside & (j >= start)
+        numbers[digit] = numbers[digit] * 10 + (column[digit] - ord('0'))
+    numbers[~ok] = -1
+
+    prefixes = np.zeros((len(ids), max(width, 8)), dtype=np.uint8)
+    prefixes[:, :width] = matrix
+    prefixes[np.arange(prefixes.shape[1]) >= np.where(ok, start, lengths)[:, None]] = 0
+    if width <= 8:
+        # Zero-padded prefixes of up to 8 bytes are unique as 64-bit integers,
+        # which np.unique handles much faster than byte strings
+        keys, codes = np.unique(prefixes.view('<u8').ravel(), return_inverse=True)
+        distinct = keys.view('S8')
+    else:
+        distinct, codes = np.unique(prefixes.view(ids.dtype).ravel(), return_inverse=True)
+    return distinct, codes.astype(np.int32).ravel(), numbers
+
+def parse_transactions_table(raw_lines):
+    """
+    Parses raw lines straight into a TransactionTable.
+
+    Applies exactly the rules of parse_transactions (pipe split, strip,
+    comma removal, int/float conversion, field-count check) but appends to
+    compact typed buffers instead of building one dict per row.
+    """
+    lookups = {f: {} for f in CATEGORICAL_FIELDS}
+    codes = {f: array('i') for f in CATEGORICAL_FIELDS}
+    quantity = array('q')
+    unit_price = array('d')
+    transaction_numbers = array('q')
+    split_id = split_transaction_id
+
+    tid_map, date_map, pid_map = lookups['TransactionID'], lookups['Date'], lookups['ProductID']
+    name_map, cid_map, region_map = lookups['ProductName'], lookups['CustomerID'], lookups['Region']
+
+    for line in raw_lines:
+        # Requirement: Split by pipe delimiter '|' and strip whitespace
+        values = [v.strip() for v in line.split('|')]
+
+        # Requirement: Skip rows with incorrect number of fields
+        if len(values) != len(FIELDS):
+            continue
+        try:
+            # Requirement: Handle commas within ProductName and numeric fields
+            qty = int(values[4].replace(',', ''))
+            price = float(values[5].replace(',', ''))
+            quantity.append(qty)
+        except (ValueError, OverflowError):
+            continue
+        unit_price.append(price)
+
+        prefix, number = split_id(values[0])
+        codes['TransactionID'].append(tid_map.setdefault(prefix, len(tid_map)))
+        transaction_numbers.append(number)
+        codes['Date'].append(date_map.setdefault(values[1], len(date_map)))
+        codes['ProductID'].append(pid_map.setdefault(values[2], len(pid_map)))
+        codes['ProductName'].append(name_map.setdefault(values[3].replace(',', ''), len(name_map)))
+        codes['CustomerID'].append(cid_map.setdefault(values[6], len(cid_map)))
+        codes['Region'].append(region_map.setdefault(values[7], len(region_map)))
+
+    # Dict keys keep insertion order, which is exactly the code order
+    categories = {f: list(lookups[f]) for f in CATEGORICAL_FIELDS}
+    return TransactionTable(
+        {f: np.frombuffer(codes[f], dtype=np.int32) if len(codes[f]) else [] for f in CATEGORICAL_FIELDS},
+        categories,
+        np.frombuffer(quantity, dtype=np.int64) if len(quantity) else [],
+        np.frombuffer(unit_price, dtype=np.float64) if len(unit_price) else [],
+        np.frombuffer(transaction_numbers, dtype=np.int64) if len(transaction_numbers) else [],
+    )
+
+
+def validate_table(table, region=None, min_amount=None, max_amount=None):
+    """
+    Vectorized validate_and_filter for a TransactionTable.
+
+    Returns: (filtered TransactionTable, boolean row mask)
+    """
+    # Validation Rules:
+    # - Quantity/UnitPrice > 0
+    # - TransactionID starts with 'T', ProductID with 'P', CustomerID with 'C'
+    mask = (table.quantity > 0) & (table.unit_price > 0)
+    mask &= table.category_mask('TransactionID', lambda v: v.startswith('T'))
+    mask &= table.category_mask('ProductID', lambda v: v.startswith('P'))
+    mask &= table.category_mask('CustomerID', lambda v: v.startswith('C'))
+
+    # Optional Filter Logic
+    if region:
+        mask &= table.category_mask('Region', lambda v: v == region)
+    if min_amount or max_amount:
+        total_price = table.revenue()
+        if min_amount:
+            mask &= total_price >= min_amount
+        if max_amount:
+            mask &= total_price <= max_amount
+
+    return table.take(mask), mask
+
+
+def low_performing_products_table(table, threshold=10):
+    """
+    Vectorized low_performing_products for a TransactionTable.
+
+    Returns: list of (ProductName, TotalQuantity, TotalRevenue) tuples,
+    sorted by TotalQuantity ascending
+    """
+    names, qty = table.group_sum('ProductName', table.quantity)
+    _, rev = table.group_sum('ProductName', table.revenue())
+
+    low = qty < threshold
+    low_performers = list(zip(names[low].tolist(), qty[low].astype(np.int64).tolist(), rev[low].tolist()))
+    low_performers.sort(key=lambda x: x[1])
+    return low_performers
+
+
+def aggregate_table(table):
+    """
+    Vectorized aggregate_transactions for a TransactionTable.
+
+    Returns: the same aggregates dictionary as aggregate_transactions, with
+    groups in first-appearance order
+    """
+    revenue = table.revenue()
+
+    regions, region_txns, (region_sales,) = table.group_stats('Region', revenue)
+    products, _, (product_qty, product_rev) = table.group_stats('ProductName', table.quantity, revenue)
+    customers, customer_orders, (customer_spent,) = table.group_stats('CustomerID', revenue)
+    dates, daily_txns, (daily_rev,) = table.group_stats('Date', revenue)
+
+    # Unique customers per day: distinct (date, customer) code pairs
+    daily_customers = {date: set() for date in dates.tolist()}
+    if len(table):
+        n_customers = len(table.categories['CustomerID'])
+        pairs = sorted_unique(table.codes['Date'].astype(np.int64) * n_customers + table.codes['CustomerID'])
+        date_names = table.labels('Date', pairs // n_customers).tolist()
+        customer_names = table.labels('CustomerID', pairs % n_customers).tolist()
+        for date, customer in zip(date_names, customer_names):
+            daily_customers[date].add(customer)
+
+    return {
+        'total_revenue': float(revenue.sum()),
+        'transaction_count': len(table),
+        'regions': {r: [s, c] for r, s, c in zip(regions.tolist(), region_sales.tolist(), region_txns.tolist())},
+        'products': {p: [int(q), r] for p, q, r in zip(products.tolist(), product_qty.tolist(), product_rev.tolist())},
+        'customers': {c: [s, o] for c, s, o in zip(customers.tolist(), customer_spent.tolist(), customer_orders.tolist())},
+        'daily': {d: [r, c, daily_customers[d]] for d, r, c in zip(dates.tolist(), daily_rev.tolist(), daily_txns.tolist())},
+    }
+
+
+def sorted_unique(values):
+    """
+    Sorted distinct values of an integer array via sort + adjacent compare,
+    which is much faster than np.unique for large int64 key arrays.
+    """
+    values = np.sort(values)
+    if len(values):
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+    return values
+
+
+def top_n_indices(values, n):
+    """
+    Indices of the n largest values, largest first; ties keep index order
+    (matching heapq.nlargest over the same sequence).
+    """
+    if n is None or n >= len(values):
+        return np.argsort(-values, kind='stable')
+    if n <= 0:
+        return np.array([], dtype=np.int64)
+    kth = np.partition(values, len(values) - n)[len(values) - n]
+    candidates = np.flatnonzero(values >= kth)
+    return candidates[np.argsort(-values[candidates], kind='stable')][:n]
+
+
+# In[ ]:
+
+
+
+